@@ -4,8 +4,6 @@ import argparse, os, sys, traceback, json, glob, subprocess
 
 from typing import List, Dict
 
-import fitz
-
 from pipeline.pdf_to_image import pdf_to_images
 from pipeline.ocr_dots import DotsOCR
 from pipeline.vision_fallback import fallback_vision
@@ -13,7 +11,7 @@ from pipeline.postprocess import assemble_units_from_page
 from pipeline.exaone_struct import structure_and_summarize
 from pipeline.chunker import split_into_chunks
 from pipeline.embedder import get_embedder
-from pipeline.vector_sink import JSONVectorSink, FaissVectorSink
+from pipeline.vector_sink import open_faiss_sink, open_vector_sink
 
 try:
     import yaml  # type: ignore
@@ -58,8 +56,8 @@ def load_config(path: str) -> dict:
 def choose_sink(cfg: dict):
     vcfg = cfg.get("vector_sink", {})
     typ = vcfg.get("type", "faiss")
-    if typ == "json":
-        return JSONVectorSink(vcfg.get("json_path", "./data/index.json"))
+    if typ in ("json", "milvus"):
+        return open_vector_sink(vcfg)
     elif typ == "faiss":
         fc = vcfg.get("faiss", {})
         # metric 추가 지원 (L2, IP 등)
@@ -67,11 +65,24 @@ def choose_sink(cfg: dict):
         if metric not in ("L2", "IP"):
             print(f"[WARN] Unknown FAISS metric={metric}, fallback=L2")
             fc["metric"] = "L2"
-        return FaissVectorSink(fc)
+        return open_faiss_sink(fc)
     else:
         raise ValueError(f"Unknown vector_sink type: {typ}")
 
 
+def sink_path(cfg: dict) -> str:
+    """선택된 벡터 저장소의 기준 파일 경로 (부가 파일은 이 경로 옆에 저장)"""
+    vcfg = cfg.get("vector_sink", {})
+    if vcfg.get("type", "faiss") == "json":
+        return vcfg.get("json_path", "./data/index.json")
+    if vcfg.get("type") == "milvus":
+        mcfg = vcfg.get("milvus", {})
+        uri = mcfg.get("uri") or ""
+        # Milvus Lite 파일이면 그 옆, 서버면 data/<collection>
+        return uri if uri and "://" not in uri else os.path.join("./data", mcfg.get("collection", "docs"))
+    return vcfg.get("faiss", {}).get("index_path", "./data/index.faiss")
+
+
 def review_ocr_pages(out_dir: str) -> None:
     """OCR 이미지와 텍스트를 한 화면에 보여주고 수정 기회를 제공"""
     try:
@@ -148,6 +159,11 @@ def main():
     ap.add_argument("--pdf", required=True, help="Input PDF path")
     ap.add_argument("--out", default="./out", help="Output directory for images")
     ap.add_argument("--config", default="./configs/config.yaml", help="YAML config path")
+    ap.add_argument(
+        "--doc-id",
+        default=None,
+        help="문서 id (기본: PDF 파일명). 같은 id로 다시 넣으면 기존 청크를 교체",
+    )
     ap.add_argument(
         "--ocr-only",
         action="store_true",
@@ -169,6 +185,8 @@ def main():
     print("[INFO] Step 1: Inspect PDF pages")
     text_pages: Dict[int, str] = {}
     image_pages: List[Dict] = []
+    import fitz  # PyMuPDF: --help 등에서는 로드하지 않음
+
     try:
         doc = fitz.open(args.pdf)
         empty_pages: List[int] = []
@@ -273,39 +291,77 @@ def main():
 
     # 4) 청킹
     print("[INFO] Step 4: Chunking")
-    ccfg = cfg["chunk"]
-    chunks = split_into_chunks(
-        units,
-        max_chars=ccfg["max_chars"],
-        min_chars=ccfg["min_chars"],
-        overlap_chars=ccfg["overlap_chars"],
-    )
+    from pipeline.dedup import from_config as near_dup_from_config, signature_path
 
-    # 5) 임베딩
-    print("[INFO] Step 5: Embedding")
-    ecfg = cfg["embedder"]
-    embedder = get_embedder(ecfg)
+    ccfg = cfg["chunk"]
+    doc_id = args.doc_id or os.path.splitext(os.path.basename(args.pdf))[0]
+    sink = choose_sink(cfg)
+    # 임베딩/업서트 실패(sys.exit 포함)에도 메타 저장소/세그먼트 writer를 닫는다
     try:
-        vectors = embedder.encode([c["text"] for c in chunks])
-    except Exception as e:
-        print(f"[ERROR] Embedding failed: {e}")
-        traceback.print_exc()
-        sys.exit(1)
+        near_dup = near_dup_from_config(ccfg, sink_path(cfg))
+        replaced = sink.document_ids(doc_id) if hasattr(sink, "document_ids") else []
+        if replaced:
+            print(f"[INFO] 기존 문서 교체: doc_id={doc_id} ({len(replaced)} chunks)")
+            if near_dup is not None:
+                # 교체될 청크와 중복 판정되지 않도록 기존 서명 제외
+                near_dup.remove(replaced)
+        chunks = split_into_chunks(
+            units,
+            max_chars=ccfg["max_chars"],
+            min_chars=ccfg["min_chars"],
+            overlap_chars=ccfg["overlap_chars"],
+            near_dup=near_dup,
+            doc_id=doc_id,
+        )
+        if near_dup is not None:
+            print(
+                f"[INFO] Near-dup: {len(chunks)} chunks kept, "
+                f"{len(near_dup.merged_pages)} merged into existing rows"
+            )
 
-    assert len(chunks) == len(vectors), f"❌ chunks({len(chunks)}) != vectors({len(vectors)})"
+        # 5) 임베딩
+        print("[INFO] Step 5: Embedding")
+        ecfg = cfg["embedder"]
+        embedder = get_embedder(ecfg)
+        try:
+            vectors = embedder.encode([c["text"] for c in chunks])
+        except Exception as e:
+            print(f"[ERROR] Embedding failed: {e}")
+            traceback.print_exc()
+            sys.exit(1)
+        finally:
+            embedder.close()
 
-    # 6) 벡터 저장소 업서트
-    print("[INFO] Step 6: Vector Upsert")
-    sink = choose_sink(cfg)
-    try:
-        sink.upsert(chunks, vectors)
-    except Exception as e:
-        print(f"[ERROR] Vector sink upsert failed: {e}")
-        traceback.print_exc()
-        sys.exit(1)
+        assert len(chunks) == len(vectors), f"❌ chunks({len(chunks)}) != vectors({len(vectors)})"
+
+        # 6) 벡터 저장소 업서트
+        print("[INFO] Step 6: Vector Upsert")
+        try:
+            ids = sink.upsert(chunks, vectors, model_id=getattr(embedder, "model_id", None))
+            if not chunks and replaced:
+                # 빈 업서트는 문서 교체를 하지 않으므로(모든 청크가 근사 중복으로 합쳐진 경우)
+                # 기존 벡터/메타가 검색에 남지 않도록 직접 삭제
+                n = sink.delete_document(doc_id)
+                print(f"[INFO] 새 청크가 없어 기존 문서 삭제: doc_id={doc_id} ({n} vectors)")
+            if near_dup is not None:
+                sink.merge_pages(near_dup.merged_pages)
+                near_dup.commit(ids)
+                near_dup.save(signature_path(sink_path(cfg)))
+        except Exception as e:
+            print(f"[ERROR] Vector sink upsert failed: {e}")
+            traceback.print_exc()
+            sys.exit(1)
+    finally:
+        sink.close()  # 백그라운드 세그먼트 병합 대기
 
     total_pages = len(text_pages) + len(image_pages)
     print(f"[OK] Ingested {total_pages} pages → {len(units)} units → {len(chunks)} chunks")
+    cache = getattr(embedder, "cache", None)
+    if cache is not None:
+        print(
+            f"[OK] Embedding cache: hit {cache.hits}/{cache.hits + cache.misses} "
+            f"({cache.hit_rate:.1%})"
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+임베딩 batch_size / 스레드 수 자동 튜닝
+- 실제 청크 샘플로 (threads × batch_size 또는 token_budget) 조합을 짧게 측정: texts/s, 최대 RSS
+  (시행마다 새 프로세스에서 측정, 실행 때와 같은 배치 방식)
+- 가장 빠른 조합(선택: RSS 상한 이내)을 모델·호스트별로 저장
+- 이후 get_embedder가 저장된 값을 자동 적용 (embedder.autotune 설정)
+"""
+import json
+import os
+import socket
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_PATH = "./data/autotune.json"
+
+
+def host_key(cfg: Dict[str, Any]) -> str:
+    """모델·provider·장치·호스트(코어 수 포함) 조합 키"""
+    return "|".join(
+        [
+            socket.gethostname(),
+            f"cpu{os.cpu_count()}",
+            (cfg.get("provider") or "qwen").lower(),
+            str(cfg.get("model")),
+            str(cfg.get("device", "cpu")),
+        ]
+    )
+
+
+def load_tuned(cfg: Dict[str, Any], path: str = DEFAULT_PATH) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f).get(host_key(cfg))
+
+
+def save_tuned(cfg: Dict[str, Any], result: Dict[str, Any], path: str = DEFAULT_PATH) -> None:
+    data: Dict[str, Any] = {}
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    data[host_key(cfg)] = result
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def _peak_rss_mb() -> float:
+    """이 프로세스의 최대 RSS(MB). 시행마다 새 프로세스에서 재므로 이전 시행의 고점이 섞이지 않음"""
+    import resource
+    import sys
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024  # macOS는 바이트, 리눅스는 KB
+
+
+def tuning_knob(cfg: Dict[str, Any]) -> str:
+    """실행 시 배치 크기를 정하는 설정: token_budget 이 있으면(local/qwen) 그것, 아니면 batch_size"""
+    prov = (cfg.get("provider") or "qwen").lower()
+    return "token_budget" if cfg.get("token_budget") and prov in ("qwen", "local") else "batch_size"
+
+
+def _trial(cfg: Dict[str, Any], texts: List[str]) -> Dict[str, float]:
+    """새 프로세스에서 cfg로 임베더를 만들고 워밍업 후 texts 인코딩 시간/최대 RSS 측정"""
+    from pipeline.embedder import _build_embedder
+
+    emb = _build_embedder(cfg)
+    emb.encode(texts[: min(len(texts), 4)])  # 워밍업
+    t0 = time.perf_counter()
+    emb.encode(texts)
+    dt = time.perf_counter() - t0
+    emb.close()
+    return {"texts_per_sec": round(len(texts) / max(dt, 1e-9), 2), "peak_rss_mb": round(_peak_rss_mb(), 1)}
+
+
+def calibrate(
+    cfg: Dict[str, Any],
+    texts: List[str],
+    batch_sizes: Optional[List[int]] = None,
+    thread_counts: Optional[List[int]] = None,
+    max_rss_mb: Optional[float] = None,
+    path: str = DEFAULT_PATH,
+    token_budgets: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    """(threads × batch_size 또는 token_budget) 스윕 후 최적 설정을 저장하고 반환
+
+    실행 때와 같은 배치 방식으로 잰다: 설정에 token_budget 이 있으면 batch_size는 쓰이지 않으므로
+    token_budget 값을 바꿔 가며 측정. 각 시행은 새 프로세스(spawn)에서 돌려 최대 RSS를 따로 잰다.
+    풀(embedder.pool) 워커는 threads_per_worker를 쓰므로 여기서 고른 threads는 단일 프로세스에만 적용.
+    """
+    import multiprocessing as mp
+
+    ncpu = os.cpu_count() or 1
+    knob = tuning_knob(cfg)
+    if knob == "token_budget":
+        values = token_budgets or [1024, 2048, 4096, 8192, 16384]
+    else:
+        values = batch_sizes or [4, 8, 16, 32, 64]
+    thread_counts = thread_counts or sorted({1, max(1, ncpu // 4), max(1, ncpu // 2), ncpu})
+    base = {k: v for k, v in cfg.items() if k not in ("pool", "cache", "autotune")}
+
+    trials: List[Dict[str, Any]] = []
+    ctx = mp.get_context("spawn")
+    for th in thread_counts:
+        for v in values:
+            with ctx.Pool(1, maxtasksperchild=1) as pool:
+                res = pool.apply(_trial, ({**base, "threads": th, knob: v}, texts))
+            trial = {"threads": th, knob: v, **res}
+            trials.append(trial)
+            print(
+                f"[INFO] autotune threads={th:<3} {knob}={v:<6} "
+                f"{trial['texts_per_sec']:8.1f} texts/s  rss={trial['peak_rss_mb']:.0f}MB"
+            )
+
+    ok = [t for t in trials if max_rss_mb is None or t["peak_rss_mb"] <= max_rss_mb] or trials
+    best = max(ok, key=lambda t: t["texts_per_sec"])
+    result = {
+        **best,
+        "knob": knob,
+        "n_texts": len(texts),
+        "tuned_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "trials": trials,
+    }
+    save_tuned(cfg, result, path)
+    print(
+        f"[OK] autotune 결과 저장: threads={best['threads']} {knob}={best[knob]} "
+        f"({best['texts_per_sec']} texts/s) → {path}"
+    )
+    return result
+
+
+def apply_tuned(cfg: Dict[str, Any], path: str = DEFAULT_PATH) -> Dict[str, Any]:
+    """저장된 튜닝 결과가 있으면 threads와 batch_size(또는 token_budget)를 덮어쓴 cfg 반환
+
+    튜닝 때와 지금의 배치 방식(token_budget 유무)이 다르면 그 값은 적용하지 않는다.
+    """
+    tuned = load_tuned(cfg, path)
+    if not tuned:
+        return cfg
+    knob = tuning_knob(cfg)
+    out = {**cfg, "threads": tuned["threads"]}
+    if tuned.get("knob", "batch_size") == knob and knob in tuned:
+        out[knob] = tuned[knob]
+    else:
+        print(f"[WARN] autotune 결과가 다른 배치 방식({tuned.get('knob', 'batch_size')})으로 측정됨 → {knob} 미적용, 다시 캘리브레이션하세요")
+    return out
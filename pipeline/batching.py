@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""
+임베딩 배치 스케줄러
+- 텍스트를 토큰 길이순으로 정렬해 길이가 비슷한 것끼리 묶음(패딩 FLOPs 감소)
+- 배치 크기는 고정 개수가 아니라 토큰 예산(가장 긴 길이 × 개수) 기준
+- 반환된 인덱스 목록으로 결과를 원래 순서 위치에 기록한다
+"""
+from typing import List, Optional, Sequence
+
+
+def estimate_lengths(texts: Sequence[str], tokenizer=None, max_len: Optional[int] = None) -> List[int]:
+    """토큰 길이 추정: 토크나이저가 있으면 사용, 없으면 문자 수 기반 근사"""
+    if tokenizer is not None:
+        try:
+            enc = tokenizer(
+                list(texts),
+                add_special_tokens=True,
+                truncation=max_len is not None,
+                max_length=max_len,
+            )
+            return [len(ids) for ids in enc["input_ids"]]
+        except Exception:  # pylint: disable=broad-except
+            pass
+    # 한국어는 대략 1~2자당 1토큰 → 보수적으로 2자당 1토큰 + 특수토큰
+    lens = [len(t) // 2 + 2 for t in texts]
+    if max_len:
+        lens = [min(n, max_len) for n in lens]
+    return lens
+
+
+def token_budget_batches(
+    lengths: Sequence[int], max_tokens: int, max_batch: Optional[int] = None
+) -> List[List[int]]:
+    """길이 내림차순으로 정렬한 뒤 (배치 내 최대 길이 × 개수) <= max_tokens 로 묶음
+
+    예산보다 긴 텍스트 하나는 단독 배치가 된다.
+    """
+    order = sorted(range(len(lengths)), key=lambda i: -lengths[i])
+    batches: List[List[int]] = []
+    cur: List[int] = []
+    cur_max = 0
+    for i in order:
+        n = max(int(lengths[i]), 1)
+        new_max = max(cur_max, n)
+        full = max_batch is not None and len(cur) >= max_batch
+        if cur and (new_max * (len(cur) + 1) > max_tokens or full):
+            batches.append(cur)
+            cur, new_max = [], n
+        cur.append(i)
+        cur_max = new_max
+    if cur:
+        batches.append(cur)
+    return batches
+
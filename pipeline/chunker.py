@@ -2,7 +2,7 @@
 """
 청킹(Chunking) 규칙: 길이 기반 + 타입 감지 + overlap
 """
-from typing import List, Dict
+from typing import List, Dict, Optional
 import hashlib
 
 
@@ -11,7 +11,16 @@ def split_into_chunks(
     max_chars: int = 800,
     min_chars: int = 300,
     overlap_chars: int = 80,
+    near_dup=None,
+    doc_id: Optional[str] = None,
 ) -> List[Dict]:
+    """units를 청크로 묶는다.
+
+    doc_id: 청크 meta.doc_id (벡터 저장소의 문서 단위 교체/삭제 키)
+
+    near_dup: ``pipeline.dedup.NearDupIndex`` 를 넘기면 MD5 중복 제거 뒤
+    같은 문서의 근사 중복 청크를 합치고(pages 병합) 기존 인덱스의 같은 문서 행과 중복인 청크는 제외한다.
+    """
     chunks: List[Dict] = []
     buf: List[Dict] = []
     cur = 0
@@ -81,6 +90,14 @@ def split_into_chunks(
         uniq_chunks.append(c)
     chunks = uniq_chunks
 
+    if doc_id is not None:
+        for c in chunks:
+            c["meta"]["doc_id"] = doc_id
+
+    # 근사 중복(MinHash LSH) 제거: 같은 doc_id 안에서만 합침
+    if near_dup is not None:
+        chunks = near_dup.collapse(chunks)
+
     # ID 부여
     for i, c in enumerate(chunks, start=1):
         c["id"] = f"chunk-{i:06d}"
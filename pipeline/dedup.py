@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+근사 중복(near-duplicate) 청크 제거: 문자 shingle 기반 MinHash + LSH
+- 공백/숫자를 정규화한 문자 n-gram을 사용하므로 한국어에도 그대로 동작
+- 머리말/꼬리말처럼 페이지 번호만 다른 반복 텍스트를 하나로 합침
+- 판정은 같은 문서(meta.doc_id) 안에서만: 다른 문서의 같은 문구는 각자 행을 유지
+  (페이지 번호가 문서를 넘어 섞이거나, 한 문서 삭제 시 다른 문서의 내용이 사라지지 않도록)
+- 서명(signature)은 인덱스 옆 파일(<index>.minhash.json)에 저장해 인덱스 전체 기준으로 판정
+"""
+import json
+import os
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_MERSENNE = (1 << 31) - 1
+_WS = re.compile(r"\s+")
+_DIGITS = re.compile(r"\d+")
+
+
+def normalize_for_shingles(text: str) -> str:
+    """공백 제거 + 숫자열을 '0'으로 치환 (페이지 번호 차이 무시)"""
+    text = _WS.sub("", text or "")
+    return _DIGITS.sub("0", text)
+
+
+def char_shingles(text: str, k: int = 5) -> List[int]:
+    """정규화된 텍스트의 문자 k-gram을 32bit 해시로 변환"""
+    norm = normalize_for_shingles(text)
+    if not norm:
+        return []
+    if len(norm) <= k:
+        return [zlib.crc32(norm.encode("utf-8"))]
+    return sorted(
+        {zlib.crc32(norm[i : i + k].encode("utf-8")) for i in range(len(norm) - k + 1)}
+    )
+
+
+class NearDupIndex:
+    """MinHash 서명과 LSH 버킷을 관리하는 인덱스 단위 근사 중복 검출기
+
+    키(key)는 벡터 저장소의 id(FAISS id, JSON 저장소는 행 번호)다. 아직 저장되지 않은 청크는
+    ``collapse`` 에서 임시로 보관했다가 ``commit`` 시 id를 부여받는다.
+    LSH 버킷은 문서(doc_id)별로 나뉘어 다른 문서의 서명과는 비교하지 않는다.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.85,
+        num_perm: int = 64,
+        bands: int = 16,
+        shingle: int = 5,
+        seed: int = 1,
+    ):
+        if num_perm % bands != 0:
+            raise ValueError(f"num_perm({num_perm})은 bands({bands})의 배수여야 합니다")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        self.seed = seed
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, _MERSENNE, size=num_perm).astype("uint64")
+        self._b = rng.randint(0, _MERSENNE, size=num_perm).astype("uint64")
+
+        self.signatures: Dict[int, np.ndarray] = {}
+        # 키 -> doc_id (버킷 키에 함께 들어감)
+        self.docs: Dict[int, str] = {}
+        self._buckets: List[Dict[int, List[int]]] = [dict() for _ in range(bands)]
+        # collapse()가 만든 미확정 서명, 기존 행에 합칠 페이지
+        self._staged: List[np.ndarray] = []
+        self._staged_chunks: List[Dict] = []
+        self.merged_pages: Dict[int, List[int]] = {}
+
+    # ---------- MinHash ----------
+    def signature(self, text: str) -> np.ndarray:
+        sh = char_shingles(text, self.shingle)
+        if not sh:
+            return np.full(self.num_perm, _MERSENNE, dtype="uint64")
+        x = np.asarray(sh, dtype="uint64")
+        # (a*x + b) mod p : a,x < 2^32 이므로 uint64 범위 내에서 계산 가능
+        hv = (self._a[:, None] * x[None, :] + self._b[:, None]) % _MERSENNE
+        return hv.min(axis=1)
+
+    def similarity(self, s1: np.ndarray, s2: np.ndarray) -> float:
+        return float(np.mean(s1 == s2))
+
+    def _band_keys(self, sig: np.ndarray, doc: str = "") -> List[int]:
+        seed = zlib.crc32(doc.encode("utf-8"))
+        return [
+            zlib.crc32(sig[i * self.rows : (i + 1) * self.rows].tobytes(), seed)
+            for i in range(self.bands)
+        ]
+
+    # ---------- LSH ----------
+    def add(self, key: int, sig: np.ndarray, doc: str = "") -> None:
+        self.signatures[key] = sig
+        self.docs[key] = doc
+        for band, bk in enumerate(self._band_keys(sig, doc)):
+            self._buckets[band].setdefault(bk, []).append(key)
+
+    def query(self, sig: np.ndarray, doc: str = "") -> Optional[int]:
+        """같은 문서에서 threshold 이상 유사한 기존 키 중 가장 유사한 것을 반환"""
+        best: Tuple[float, Optional[int]] = (self.threshold, None)
+        seen = set()
+        for band, bk in enumerate(self._band_keys(sig, doc)):
+            for key in self._buckets[band].get(bk, ()):
+                if key in seen or self.docs.get(key) != doc:
+                    continue
+                seen.add(key)
+                sim = self.similarity(sig, self.signatures[key])
+                if sim >= best[0]:
+                    best = (sim, key)
+        return best[1]
+
+    # ---------- 청킹 단계 연동 ----------
+    def collapse(self, chunks: List[Dict]) -> List[Dict]:
+        """같은 문서(meta.doc_id)의 근사 중복 청크를 하나로 합치고 pages 메타를 병합
+
+        - 같은 배치 안의 중복: 먼저 나온 청크의 ``meta.pages`` 에 합침
+        - 이미 저장된 (같은 문서의) 행과 중복: 청크를 버리고 ``merged_pages[row]`` 에 기록
+        """
+        kept: List[Dict] = []
+        # 배치 내 임시 키는 음수(-1, -2, ...)로 구분
+        for c in chunks:
+            sig = self.signature(c.get("text", ""))
+            doc = _doc_of(c)
+            hit = self.query(sig, doc)
+            pages = c.get("meta", {}).get("pages", [])
+            if hit is None:
+                key = -(len(self._staged) + 1)
+                self._staged.append(sig)
+                self._staged_chunks.append(c)
+                self.add(key, sig, doc)
+                kept.append(c)
+            elif hit < 0:
+                # 미확정 청크 (commit 전 여러 번 collapse하면 앞선 호출의 청크일 수 있음)
+                meta = self._staged_chunks[-hit - 1].setdefault("meta", {})
+                meta["pages"] = _merge_pages(meta.get("pages", []), pages)
+            else:
+                self.merged_pages[hit] = _merge_pages(self.merged_pages.get(hit, []), pages)
+        return kept
+
+    def commit(self, ids) -> None:
+        """collapse()로 남긴 청크가 순서대로 ids에 저장되었음을 확정
+
+        ids: 업서트가 돌려준 id 목록 (int를 넘기면 그 행부터 연속 저장된 것으로 간주)
+        """
+        staged, chunks = self._staged, self._staged_chunks
+        if isinstance(ids, int):
+            ids = range(ids, ids + len(staged))
+        for i in range(len(staged)):
+            self._drop(-(i + 1))
+        self._staged = []
+        self._staged_chunks = []
+        for key, sig, c in zip(ids, staged, chunks):
+            self.add(int(key), sig, _doc_of(c))
+        self.merged_pages = {}
+
+    def remove(self, keys) -> None:
+        """교체/삭제된 문서의 서명 제거 (같은 문서를 다시 넣을 때 자기 자신과 중복 판정 방지)"""
+        for key in keys:
+            self._drop(int(key))
+
+    def _drop(self, key: int) -> None:
+        sig = self.signatures.pop(key, None)
+        if sig is None:
+            return
+        for band, bk in enumerate(self._band_keys(sig, self.docs.pop(key, ""))):
+            bucket = self._buckets[band].get(bk)
+            if bucket and key in bucket:
+                bucket.remove(key)
+                if not bucket:
+                    del self._buckets[band][bk]
+
+    # ---------- 저장/로드 ----------
+    def params(self) -> Dict:
+        return {
+            "threshold": self.threshold,
+            "num_perm": self.num_perm,
+            "bands": self.bands,
+            "shingle": self.shingle,
+            "seed": self.seed,
+            "scope": "doc",
+        }
+
+    def save(self, path: str) -> None:
+        data = {
+            "params": self.params(),
+            "signatures": {
+                str(k): v.tolist() for k, v in self.signatures.items() if k >= 0
+            },
+            "docs": {str(k): d for k, d in self.docs.items() if k >= 0},
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, **params) -> "NearDupIndex":
+        """저장된 서명을 읽어 LSH 버킷 복원 (파라미터가 다르면 빈 인덱스)"""
+        idx = cls(**params)
+        if not os.path.exists(path):
+            return idx
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        saved = data.get("params", {})
+        if any(saved.get(k) != v for k, v in idx.params().items() if k != "threshold"):
+            # scope 없는 파일 = 문서 구분 없이 판정하던 이전 형식
+            print(f"[WARN] MinHash 파라미터 불일치, 기존 서명 무시: {path}")
+            return idx
+        docs = data.get("docs", {})
+        for k, v in data.get("signatures", {}).items():
+            idx.add(int(k), np.asarray(v, dtype="uint64"), docs.get(k, ""))
+        return idx
+
+
+def _doc_of(chunk: Dict) -> str:
+    return str(chunk.get("meta", {}).get("doc_id") or "")
+
+
+def _merge_pages(a: List, b: List) -> List:
+    return sorted({p for p in list(a) + list(b) if p is not None})
+
+
+def signature_path(index_path: str) -> str:
+    """벡터 저장소 경로 옆 서명 파일 경로 (<index>.minhash.json)"""
+    return index_path + ".minhash.json"
+
+
+def from_config(ccfg: Dict, index_path: str) -> Optional[NearDupIndex]:
+    """chunk.near_dup 설정으로 NearDupIndex 생성 (비활성 시 None)"""
+    ncfg = (ccfg or {}).get("near_dup") or {}
+    if not ncfg.get("enabled", False):
+        return None
+    params = {
+        k: ncfg[k]
+        for k in ("threshold", "num_perm", "bands", "shingle", "seed")
+        if k in ncfg
+    }
+    return NearDupIndex.load(signature_path(index_path), **params)
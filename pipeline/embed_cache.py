@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+"""
+내용 주소(content-addressed) 임베딩 캐시
+- 키: (모델 ID, normalize 여부, 텍스트 해시)
+- 벡터: float32 memmap 파일(vectors.f32), 키 인덱스: index.json(스냅숏) + journal.log(이후 삽입 기록)
+- 최대 개수(max_entries)를 넘으면 가장 오래 쓰이지 않은(LRU) 슬롯부터 재사용
+- 여러 프로세스(인제스트, 검색 서버)가 같은 디렉터리를 쓴다: 슬롯 할당·벡터 쓰기·journal 추가는
+  디렉터리 파일 락(.lock, 배타) 안에서 다른 프로세스의 journal을 먼저 반영한 뒤 수행하고, 조회는 공유 락
+- index.json 은 전체 슬롯을 다시 쓰므로 flush_every 개 삽입마다 / close() / 프로세스 종료 때만
+  journal을 접어 새 스냅숏으로 저장 (삽입마다의 디스크 쓰기는 journal 한 줄)
+- 조회/저장은 스레드 락으로도 보호 (검색 서버의 배치 스레드와 요청 스레드가 함께 사용)
+"""
+import atexit
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+def _namespace(model_id: str, normalize: bool) -> str:
+    return hashlib.sha1(f"{model_id}|norm={int(bool(normalize))}".encode("utf-8")).hexdigest()[:16]
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1((text or "").encode("utf-8")).hexdigest()
+
+
+@contextmanager
+def _file_lock(fh, shared: bool = False):
+    """프로세스 간 락 (POSIX flock / Windows는 배타 락만)"""
+    if fcntl is not None:
+        fcntl.flock(fh.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        yield
+
+
+class EmbeddingCache:
+    """모델/normalize 조합별 디렉터리에 벡터를 저장하는 LRU 캐시"""
+
+    def __init__(
+        self, root: str, model_id: str, normalize: bool, max_entries: int = 200_000, flush_every: int = 1024
+    ):
+        self.dir = os.path.join(root, _namespace(model_id, normalize))
+        os.makedirs(self.dir, exist_ok=True)
+        self.vec_path = os.path.join(self.dir, "vectors.f32")
+        self.index_path = os.path.join(self.dir, "index.json")
+        self.journal_path = os.path.join(self.dir, "journal.log")
+        self.model_id = model_id
+        self.normalize = normalize
+        self.max_entries = max_entries
+        self.flush_every = max(1, int(flush_every))
+
+        self.dim: Optional[int] = None
+        self.capacity = 0
+        # key -> slot (앞쪽일수록 오래 사용 안 됨), slot -> key
+        self.slots: "OrderedDict[str, int]" = OrderedDict()
+        self._owner: Dict[int, str] = {}
+        self._free: set = set()
+        self._mm = None
+        # 반영한 스냅숏 세대와 journal 위치 (다른 프로세스가 스냅숏을 새로 쓰면 세대가 바뀜)
+        self._gen = -1
+        self._snap_gen = 0
+        self._jpos = 0
+        self._unflushed = 0
+        self._lock = threading.RLock()
+        self._lock_fh = open(os.path.join(self.dir, ".lock"), "a+b")
+        self.hits = 0
+        self.misses = 0
+        with self._lock, _file_lock(self._lock_fh):
+            self._sync()
+            if self._gen < 0 and self.dim:
+                # journal 도입 전 캐시: 스냅숏 세대로 journal 시작
+                self._new_journal(self._snap_gen)
+        # close() 없이 끝나는 스크립트도 journal을 스냅숏으로 접도록
+        atexit.register(self.flush)
+
+    # ---------- 저장/로드 ----------
+    def _read_header(self):
+        """journal 첫 줄 ({"gen", "dim"}, 바이트 길이). journal이 없으면 (None, 0)"""
+        if not os.path.exists(self.journal_path):
+            return None, 0
+        with open(self.journal_path, "rb") as f:
+            line = f.readline()
+        return (json.loads(line), len(line)) if line.endswith(b"\n") else (None, 0)
+
+    def _load_snapshot(self, header: Optional[Dict], header_len: int):
+        """index.json 스냅숏을 읽고 journal은 헤더 다음부터 다시 반영하도록 위치를 되돌림"""
+        self.slots, self._owner = OrderedDict(), {}
+        self.dim, self.capacity, self._mm = None, 0, None
+        self._gen, self._jpos = -1, 0
+        data: Dict = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        # 스냅숏은 같은 세대 journal의 내용을 모두 포함 (세대가 하나 앞선 경우 = journal 교체 직전 중단)
+        self._snap_gen = int(data.get("generation", 0))
+        self.dim = data.get("dim") or (header or {}).get("dim")
+        for k, v in data.get("slots", []):
+            self.slots[k] = int(v)
+            self._owner[int(v)] = k
+        if self.dim and not os.path.exists(self.vec_path) and self.slots:
+            print(f"[WARN] 임베딩 캐시 손상, 초기화: {self.dir}")
+            self.slots, self._owner = OrderedDict(), {}
+        if header is not None:
+            self._gen = header["gen"]
+            self._jpos = header_len
+        self._free = set()
+
+    def _sync(self):
+        """다른 프로세스가 쓴 스냅숏/journal/파일 크기를 반영 (파일 락 안에서 호출)"""
+        header, header_len = self._read_header()
+        if header is None or header["gen"] != self._gen:
+            self._load_snapshot(header, header_len)
+        if header is not None:
+            with open(self.journal_path, "rb") as f:
+                f.seek(self._jpos)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # 쓰는 중인 마지막 줄 (락 밖 쓰기는 없지만 방어)
+                    key, slot = line.decode("ascii").split()
+                    self._assign(key, int(slot))
+                    self._jpos += len(line)
+        if not self.dim or not os.path.exists(self.vec_path):
+            return
+        cap = os.path.getsize(self.vec_path) // (self.dim * 4)
+        if cap != self.capacity or self._mm is None:
+            self._free |= set(range(self.capacity, cap))
+            self.capacity = cap
+            self._free -= set(self._owner)
+            # 용량보다 뒤의 슬롯(손상된 스냅숏)은 버림
+            for slot in [s for s in self._owner if s >= cap]:
+                self.slots.pop(self._owner.pop(slot), None)
+            self._open()
+
+    def _assign(self, key: str, slot: int):
+        prev = self._owner.get(slot)
+        if prev is not None and prev != key:
+            self.slots.pop(prev, None)
+        old = self.slots.get(key)
+        if old is not None and old != slot:
+            self._owner.pop(old, None)
+            self._free.add(old)
+        self.slots[key] = slot
+        self.slots.move_to_end(key)
+        self._owner[slot] = key
+        self._free.discard(slot)
+
+    def _open(self):
+        self._mm = None
+        if self.capacity:
+            self._mm = np.memmap(self.vec_path, dtype="float32", mode="r+", shape=(self.capacity, self.dim))
+
+    def _grow(self, need: int):
+        """필요한 슬롯 수만큼 파일을 늘림 (2배씩, max_entries 한도)"""
+        new_cap = min(max(need, self.capacity * 2, 1024), self.max_entries)
+        if new_cap <= self.capacity:
+            return
+        if self._mm is not None:
+            self._mm.flush()
+        with open(self.vec_path, "ab") as f:
+            f.truncate(new_cap * self.dim * 4)
+        self._free |= set(range(self.capacity, new_cap))
+        self.capacity = new_cap
+        self._open()
+
+    def _new_journal(self, gen: int):
+        line = json.dumps({"gen": gen, "dim": self.dim}).encode("utf-8") + b"\n"
+        tmp = self.journal_path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(line)
+        os.replace(tmp, self.journal_path)
+        self._gen = gen
+        self._jpos = len(line)
+
+    def flush(self):
+        with self._lock:
+            if self._unflushed == 0:
+                return
+            with _file_lock(self._lock_fh):
+                self._sync()
+                self._flush()
+
+    def _flush(self):
+        """journal을 접어 index.json 스냅숏으로 (파일 락 안에서, _sync 직후 호출)"""
+        if self._mm is not None:
+            self._mm.flush()
+        gen = max(self._gen, self._snap_gen) + 1
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "model_id": self.model_id,
+                    "normalize": self.normalize,
+                    "dim": self.dim,
+                    "capacity": self.capacity,
+                    "generation": gen,
+                    "slots": list(self.slots.items()),
+                },
+                f,
+            )
+        os.replace(tmp, self.index_path)
+        self._new_journal(gen)
+        self._unflushed = 0
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+        self._lock_fh.close()
+
+    # ---------- 조회/저장 ----------
+    def get_many(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found: Dict[str, np.ndarray] = {}
+        with self._lock, _file_lock(self._lock_fh, shared=True):
+            self._sync()
+            for k in keys:
+                slot = self.slots.get(k)
+                if slot is None:
+                    continue
+                self.slots.move_to_end(k)
+                found[k] = np.array(self._mm[slot])
+        return found
+
+    def put_many(self, keys: List[str], vecs) -> None:
+        vecs = np.asarray(vecs, dtype="float32")
+        if len(keys) == 0:
+            return
+        with self._lock, _file_lock(self._lock_fh):
+            self._sync()
+            if self.dim is None:
+                self.dim = int(vecs.shape[1])
+            if vecs.shape[1] != self.dim:
+                raise ValueError(f"캐시 차원({self.dim})과 벡터 차원({vecs.shape[1]})이 다릅니다")
+            if self._gen < 0:
+                self._new_journal(self._snap_gen)
+            lines = []
+            for k, v in zip(keys, vecs):
+                if k in self.slots:
+                    # 다른 프로세스가 먼저 저장 (내용 주소라 같은 벡터)
+                    self.slots.move_to_end(k)
+                    continue
+                if not self._free:
+                    self._grow(len(self.slots) + 1)
+                if self._free:
+                    slot = self._free.pop()
+                else:
+                    # 가득 참 → LRU 슬롯 재사용
+                    slot = next(iter(self.slots.values()))
+                self._assign(k, slot)
+                self._mm[slot] = v
+                lines.append(f"{k} {slot}\n")
+            if lines:
+                data = "".join(lines).encode("ascii")
+                with open(self.journal_path, "ab") as f:
+                    f.write(data)
+                self._jpos += len(data)
+                self._unflushed += len(lines)
+            if self._unflushed >= self.flush_every:
+                self._flush()
+
+    def record(self, hits: int, misses: int) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+"""
+멀티프로세스 CPU 임베딩 풀 (대량 인제스트용)
+- 워커 프로세스마다 모델을 따로 로드하고 intra-op 스레드 수를 고정
+- 텍스트를 shard_size 단위로 나눠 분배, 끝나는 순서대로 받아 원래 위치에 기록
+- embedder.pool 설정: workers(2 이상이면 사용), threads_per_worker, shard_size
+- model_id/dim은 워커가 실제로 만든 임베더에서 받는다 (onnx → local 대체 시에도 캐시/인덱스의
+  모델 구분이 비풀 경로와 같도록: 예) <모델>@onnx-int8)
+"""
+import multiprocessing as mp
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pipeline.embedder import BaseEmbedder
+
+_WORKER_EMB = None
+
+
+def _init_worker(cfg: Dict[str, Any], threads: int):
+    """워커 초기화: 스레드 수 고정 후 모델 로드 (프로세스당 1회)"""
+    global _WORKER_EMB
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except Exception:  # pylint: disable=broad-except
+        pass
+    from pipeline.embedder import _build_embedder
+
+    _WORKER_EMB = _build_embedder(cfg)
+
+
+def _worker_info():
+    return _WORKER_EMB.model_id, _WORKER_EMB.dim
+
+
+def _encode_shard(job: Tuple[int, List[str]]):
+    start, texts = job
+    return start, _WORKER_EMB.encode(texts)
+
+
+class PooledEmbedder(BaseEmbedder):
+    """워커 프로세스 풀에 텍스트를 샤딩해 인코딩"""
+
+    def __init__(
+        self,
+        cfg: Dict[str, Any],
+        workers: int,
+        threads_per_worker: int = 1,
+        shard_size: int = 256,
+    ):
+        # 워커에서는 풀/캐시 없이 단일 임베더를 만든다. 스레드 수는 threads_per_worker 고정
+        # (autotune의 단일 프로세스 threads를 워커마다 쓰면 코어를 워커 수배로 초과 사용)
+        self.worker_cfg = {k: v for k, v in cfg.items() if k not in ("pool", "cache")}
+        self.worker_cfg["threads"] = threads_per_worker
+        self.workers = workers
+        self.threads = threads_per_worker
+        self.shard_size = shard_size
+        self.normalize = cfg.get("normalize", True)
+        self._pool = None
+        if (cfg.get("provider") or "").lower() == "onnx":
+            self._export_onnx()
+        # 워커 한 곳에서 실제 model_id/dim 확인 (풀을 미리 띄움)
+        self.model_id, dim = self._get_pool().apply(_worker_info)
+        self.dim: Optional[int] = dim or cfg.get("dim")
+
+    def _export_onnx(self):
+        """워커들이 같은 디렉터리에 동시에 내보내지 않도록 부모 프로세스에서 한 번 내보냄"""
+        from pipeline.embedder import default_onnx_dir, export_onnx, pooling_mode
+
+        model = self.worker_cfg.get("model", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+        self.worker_cfg["onnx_dir"] = self.worker_cfg.get("onnx_dir") or default_onnx_dir(model)
+        try:
+            export_onnx(model, self.worker_cfg["onnx_dir"], quantize=self.worker_cfg.get("quantize", True))
+            if not self.worker_cfg.get("pooling"):
+                self.worker_cfg["pooling"] = pooling_mode(model, self.worker_cfg["onnx_dir"])
+        except Exception as e:  # pylint: disable=broad-except
+            print(f"[WARN] ONNX 내보내기 실패({e}): 워커는 provider=local 로 대체됩니다")
+
+    def _get_pool(self):
+        if self._pool is None:
+            # fork 후 torch 스레드 풀이 꼬이지 않도록 spawn 사용
+            ctx = mp.get_context("spawn")
+            self._pool = ctx.Pool(
+                self.workers,
+                initializer=_init_worker,
+                initargs=(self.worker_cfg, self.threads),
+            )
+        return self._pool
+
+    def iter_encode(self, texts: List[str]) -> Iterator[Tuple[int, Any]]:
+        """(시작 위치, 행렬)을 완료되는 순서대로 반환"""
+        jobs = [(i, texts[i : i + self.shard_size]) for i in range(0, len(texts), self.shard_size)]
+        if not jobs:
+            return
+        yield from self._get_pool().imap_unordered(_encode_shard, jobs)
+
+    def encode(self, texts: List[str]):
+        import numpy as np
+
+        out = None
+        for start, embs in self.iter_encode(texts):
+            if out is None:
+                out = np.empty((len(texts), embs.shape[1]), dtype="float32")
+                self.dim = embs.shape[1]
+            out[start : start + len(embs)] = embs
+        if out is None:
+            return np.zeros((0, self.dim or 0), dtype="float32")
+        return out
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __del__(self):
+        try:
+            if self._pool is not None:
+                self._pool.terminate()
+        except Exception:  # pylint: disable=broad-except
+            pass
@@ -1,10 +1,68 @@
 # -*- coding: utf-8 -*-
 from typing import List, Optional, Dict, Any
+import json
 import os
 
 class BaseEmbedder:
+    """encode()는 (len(texts), dim) 크기의 C-contiguous float32 행렬을 반환"""
+
     def encode(self, texts: List[str]): raise NotImplementedError
 
+    def close(self):
+        """워커 풀 등 보유 자원 정리 (기본은 없음)"""
+
+
+def _as_matrix(embs):
+    """float32 C-contiguous 행렬로 변환 (이미 그렇다면 복사하지 않음)"""
+    import numpy as np
+
+    return np.ascontiguousarray(embs, dtype="float32")
+
+
+def _l2_rows(m):
+    """행 단위 L2 정규화 (제자리 연산)"""
+    import numpy as np
+
+    if len(m):
+        norms = np.linalg.norm(m, axis=1, keepdims=True)
+        norms += 1e-12
+        m /= norms
+    return m
+
+
+def _st_encode(model, texts: List[str], batch_size: int, token_budget: Optional[int] = None):
+    """SentenceTransformer 인코딩
+
+    token_budget이 있으면 토큰 길이로 정렬·버킷팅해 (최대 길이 × 개수) 예산 안에서
+    배치를 만들고, 결과는 원래 순서로 되돌린다. 없으면 고정 batch_size.
+    """
+    import numpy as np
+
+    def run(batch: List[str], bs: int):
+        return model.encode(
+            batch,
+            normalize_embeddings=False,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            batch_size=bs,
+        )
+
+    if not token_budget or len(texts) <= 1:
+        return _as_matrix(run(texts, batch_size))
+
+    from pipeline.batching import estimate_lengths, token_budget_batches
+
+    lengths = estimate_lengths(
+        texts, getattr(model, "tokenizer", None), getattr(model, "max_seq_length", None)
+    )
+    out = None
+    for idxs in token_budget_batches(lengths, token_budget):
+        embs = run([texts[i] for i in idxs], len(idxs))
+        if out is None:
+            out = np.empty((len(texts), embs.shape[1]), dtype="float32")
+        out[idxs] = embs
+    return out
+
 # -------------------
 # A) Qwen 임베딩
 # -------------------
@@ -15,6 +73,7 @@ class QwenEmbedder(BaseEmbedder):
         normalize: bool = True,
         device: str = "cpu",
         batch_size: int = 16,
+        token_budget: Optional[int] = None,
     ):
         try:
             from sentence_transformers import SentenceTransformer
@@ -25,66 +84,174 @@ class QwenEmbedder(BaseEmbedder):
                 "sentence-transformers 임포트 실패. 'pip install \"transformers>=4.41,<5\" \"sentence-transformers>=2.7,<3\"' 로 설치했는지 확인하세요"
             ) from e
 
+        self.model_id = model_name
         self.normalize = normalize
         self.dim = self.model.get_sentence_embedding_dimension()
         self.batch_size = batch_size
-
-    def _l2(self, v):
-        import numpy as np
-        v = np.asarray(v, dtype="float32")
-        return v / (np.linalg.norm(v) + 1e-12)
+        self.token_budget = token_budget
 
     def encode(self, texts: List[str]):
-        embs = self.model.encode(
-            texts,
-            normalize_embeddings=False,
-            show_progress_bar=False,
-            convert_to_numpy=True,
-            batch_size=self.batch_size,
-        )
-        if self.normalize:
-            embs = [self._l2(v) for v in embs]
-        else:
-            embs = [v.astype("float32") for v in embs]
-        return embs
+        embs = _st_encode(self.model, texts, self.batch_size, self.token_budget)
+        return _l2_rows(embs) if self.normalize else embs
 
 # -------------------
 # B) OpenAI 임베딩
 # -------------------
 class OpenAIEmbedder(BaseEmbedder):
+    """asyncio 기반 OpenAI 임베딩
+
+    - 토큰 예산(max_request_tokens)과 개수(batch_size) 안에서 요청 단위로 묶음
+    - 최대 concurrency개 요청을 동시에 보냄
+    - 429/5xx/연결 오류는 지수 백오프(+지터)로 재시도
+    - dim을 ``dimensions`` 파라미터로 전달 (text-embedding-3 계열)
+    - base_url로 로컬 스텁 서버(scripts/openai_stub_server.py)에 연결 가능
+    - 이벤트 루프 안(비동기 서버, 노트북)에서는 aencode()를 await 하거나, encode()가
+      별도 스레드에서 루프를 돌려 결과를 기다림
+    """
+
+    # 입력 1개당 토큰 상한 (text-embedding-3 / ada-002 공통)
+    MAX_INPUT_TOKENS = 8191
+
     def __init__(
         self,
         model: str = "text-embedding-3-large",
-        dim: int = 3072,
+        dim: Optional[int] = 3072,
         normalize: bool = True,
         batch_size: int = 64,
+        concurrency: int = 4,
+        max_request_tokens: int = 300_000,
+        max_retries: int = 6,
+        base_url: Optional[str] = None,
     ):
         api_key = os.getenv("OPENAI_API_KEY")
         if not api_key:
             raise RuntimeError("OPENAI_API_KEY 환경변수가 필요합니다.")
-        from openai import OpenAI
+        from openai import AsyncOpenAI  # noqa: F401  (설치 여부 확인)
 
-        self.client = OpenAI(api_key=api_key)
+        self.api_key = api_key
+        self.base_url = base_url or os.getenv("OPENAI_BASE_URL")
         self.model = model
         self.dim = dim
+        # ada-002는 dimensions 파라미터를 받지 않는다
+        self.send_dimensions = bool(dim) and not model.startswith("text-embedding-ada")
+        self.model_id = f"{model}@{dim}" if self.send_dimensions else model
         self.normalize = normalize
         self.batch_size = batch_size
+        self.concurrency = max(1, concurrency)
+        self.max_request_tokens = max_request_tokens
+        self.max_retries = max_retries
+        self.retries = 0
+        try:
+            import tiktoken
+
+            try:
+                self._enc = tiktoken.encoding_for_model(model)
+            except KeyError:
+                self._enc = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # pylint: disable=broad-except
+            self._enc = None
+
+    # ---------- 토큰 예산 ----------
+    def _fit(self, text: str):
+        """(입력 상한에 맞춘 텍스트, 토큰 수). tiktoken이 없으면 1자=1토큰으로 보수적 추정"""
+        text = text or " "
+        if self._enc is not None:
+            ids = self._enc.encode(text)
+            if len(ids) > self.MAX_INPUT_TOKENS:
+                ids = ids[: self.MAX_INPUT_TOKENS]
+                text = self._enc.decode(ids)
+            return text, len(ids)
+        text = text[: self.MAX_INPUT_TOKENS]
+        return text, len(text)
+
+    def pack(self, texts: List[str]):
+        """순서를 유지하며 (시작 위치, 입력 목록) 요청 단위로 묶음"""
+        batches = []
+        cur: List[str] = []
+        cur_tokens = 0
+        start = 0
+        for i, t in enumerate(texts):
+            t, n = self._fit(t)
+            if cur and (cur_tokens + n > self.max_request_tokens or len(cur) >= self.batch_size):
+                batches.append((start, cur))
+                cur, cur_tokens, start = [], 0, i
+            cur.append(t)
+            cur_tokens += n
+        if cur:
+            batches.append((start, cur))
+        return batches
+
+    # ---------- 비동기 요청 ----------
+    async def _request(self, client, sem, batch: List[str]):
+        import asyncio
+        import random
+
+        import openai
+
+        kwargs = {"model": self.model, "input": batch}
+        if self.send_dimensions:
+            kwargs["dimensions"] = self.dim
+        attempt = 0
+        while True:
+            try:
+                async with sem:
+                    resp = await client.embeddings.create(**kwargs)
+                return [e.embedding for e in sorted(resp.data, key=lambda e: e.index)]
+            except (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError) as e:
+                err = e
+            except openai.APIStatusError as e:
+                if e.status_code < 500:
+                    raise
+                err = e
+            attempt += 1
+            if attempt > self.max_retries:
+                raise err
+            self.retries += 1
+            delay = min(30.0, 0.5 * 2 ** (attempt - 1)) * (0.5 + random.random())
+            print(f"[WARN] OpenAI 임베딩 재시도 {attempt}/{self.max_retries} ({delay:.1f}s): {err}")
+            await asyncio.sleep(delay)
+
+    async def _encode_async(self, texts: List[str]):
+        import asyncio
 
-    def _l2(self, v):
         import numpy as np
-        v = np.asarray(v, dtype="float32")
-        return v / (np.linalg.norm(v) + 1e-12)
+        from openai import AsyncOpenAI
 
-    def encode(self, texts: List[str]):
-        out = []
-        for i in range(0, len(texts), self.batch_size):
-            batch = texts[i : i + self.batch_size]
-            resp = self.client.embeddings.create(model=self.model, input=batch)
-            for e in resp.data:
-                v = e.embedding
-                out.append(self._l2(v) if self.normalize else v)
+        client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+        sem = asyncio.Semaphore(self.concurrency)
+        batches = self.pack(texts)
+        try:
+            results = await asyncio.gather(*(self._request(client, sem, b) for _, b in batches))
+        finally:
+            await client.close()
+        out = None
+        for (start, batch), embs in zip(batches, results):
+            if out is None:
+                out = np.empty((len(texts), len(embs[0])), dtype="float32")
+            out[start : start + len(batch)] = embs
         return out
 
+    async def aencode(self, texts: List[str]):
+        import numpy as np
+
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype="float32")
+        out = await self._encode_async(texts)
+        return _l2_rows(out) if self.normalize else out
+
+    def encode(self, texts: List[str]):
+        import asyncio
+
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.aencode(texts))
+        # 이미 루프가 도는 스레드에서는 asyncio.run 불가 → 새 스레드의 새 루프에서 실행
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=1) as ex:
+            return ex.submit(asyncio.run, self.aencode(texts)).result()
+
 # -------------------
 # C) Local 경량 SBERT
 # -------------------
@@ -96,6 +263,7 @@ class LocalSBERTEmbedder(BaseEmbedder):
         normalize: bool = True,
         device: str = "cpu",
         batch_size: int = 16,
+        token_budget: Optional[int] = None,
     ):
         try:
             from sentence_transformers import SentenceTransformer
@@ -106,40 +274,323 @@ class LocalSBERTEmbedder(BaseEmbedder):
                 "sentence-transformers 임포트 실패. 'pip install \"transformers>=4.41,<5\" \"sentence-transformers>=2.7,<3\"' 로 설치했는지 확인하세요"
             ) from e
 
+        self.model_id = model_name
         self.normalize = normalize
         self.dim = dim or self.model.get_sentence_embedding_dimension()
         self.batch_size = batch_size
+        self.token_budget = token_budget
+
+    def encode(self, texts: List[str]):
+        embs = _st_encode(self.model, texts, self.batch_size, self.token_budget)
+        return _l2_rows(embs) if self.normalize else embs
+
+# -------------------
+# D) ONNX Runtime (int8) CPU 임베딩
+# -------------------
+def default_onnx_dir(model_name: str) -> str:
+    return os.path.join("./data/onnx", model_name.replace("/", "__"))
+
+
+def export_onnx(model_name: str, out_dir: str, quantize: bool = True) -> str:
+    """HF 모델을 ONNX로 내보내고 동적 int8 양자화. 최종 모델 경로 반환
+
+    이미 내보낸 파일이 있으면 재사용한다. torch/transformers/onnxruntime 필요.
+    """
+    fp32_path = os.path.join(out_dir, "model.onnx")
+    int8_path = os.path.join(out_dir, "model.int8.onnx")
+    final = int8_path if quantize else fp32_path
+    if os.path.exists(final):
+        return final
+
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tok = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    dummy = tok(["임베딩 내보내기 예시 문장"], return_tensors="pt")
+    names = list(dummy.keys())
+    axes = {n: {0: "batch", 1: "seq"} for n in names}
+    axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+    if not os.path.exists(fp32_path):
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(dummy[n] for n in names),
+                fp32_path,
+                input_names=names,
+                output_names=["last_hidden_state"],
+                dynamic_axes=axes,
+                opset_version=14,
+            )
+    tok.save_pretrained(out_dir)
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+    return final
+
+
+_POOLING_KEYS = {
+    "pooling_mode_cls_token": "cls",
+    "pooling_mode_mean_tokens": "mean",
+    "pooling_mode_max_tokens": "max",
+    "pooling_mode_lasttoken": "lasttoken",
+}
+
+
+def pooling_mode(model_name: str, onnx_dir: Optional[str] = None) -> str:
+    """sentence-transformers 모델 설정(modules.json → Pooling/config.json)의 풀링 방식
+
+    cls | mean | max | lasttoken (Qwen3-Embedding 등). 찾은 값은 onnx_dir/pooling.json 에 저장해
+    다음 로드부터는 허브 조회 없이 쓴다. 설정을 찾지 못하면 mean.
+    """
+    cached = os.path.join(onnx_dir, "pooling.json") if onnx_dir else None
+    if cached and os.path.exists(cached):
+        with open(cached, "r", encoding="utf-8") as f:
+            return json.load(f)["mode"]
+
+    def read(rel: str):
+        if os.path.isdir(model_name):
+            path = os.path.join(model_name, rel)
+        else:
+            from huggingface_hub import hf_hub_download
+
+            path = hf_hub_download(model_name, rel)
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    mode = None
+    try:
+        for m in read("modules.json"):
+            if m.get("type", "").endswith("models.Pooling"):
+                conf = read(f"{m['path']}/config.json" if m.get("path") else "config.json")
+                mode = next((v for k, v in _POOLING_KEYS.items() if conf.get(k)), None)
+                break
+    except Exception as e:  # pylint: disable=broad-except
+        print(f"[WARN] 풀링 설정을 읽지 못했습니다({model_name}: {e})")
+    if mode is None:
+        print(f"[WARN] {model_name}: 풀링 설정이 없어 mean pooling 사용 (embedder.pooling 으로 지정 가능)")
+        return "mean"
+    if cached:
+        os.makedirs(onnx_dir, exist_ok=True)
+        with open(cached, "w", encoding="utf-8") as f:
+            json.dump({"mode": mode}, f)
+    return mode
+
+
+def _pool(hidden, mask, mode: str):
+    """(B, T, H) 은닉 상태 + (B, T) attention mask → (B, H) 문장 벡터"""
+    import numpy as np
+
+    m = mask[..., None].astype("float32")
+    if mode == "cls":
+        return hidden[:, 0]
+    if mode == "max":
+        return np.where(m > 0, hidden, -np.inf).max(axis=1)
+    if mode == "lasttoken":
+        # 마스크가 1인 마지막 위치 (오른쪽/왼쪽 패딩 모두)
+        last = (mask * np.arange(mask.shape[1])).argmax(axis=1)
+        return hidden[np.arange(len(hidden)), last]
+    return (hidden * m).sum(axis=1) / np.maximum(m.sum(axis=1), 1e-9)
+
+
+class OnnxEmbedder(BaseEmbedder):
+    """같은 모델을 ONNX(동적 int8 양자화)로 돌리는 CPU 전용 임베더
+
+    풀링은 모델 설정(Pooling/config.json)을 따르고 pooling 인자로 덮어쓸 수 있다.
+    """
+
+    def __init__(
+        self,
+        model_name: str = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2",
+        onnx_dir: Optional[str] = None,
+        quantize: bool = True,
+        normalize: bool = True,
+        batch_size: int = 16,
+        max_seq_length: int = 128,
+        threads: Optional[int] = None,
+        pooling: Optional[str] = None,
+    ):
+        try:
+            import onnxruntime as ort
+            from transformers import AutoTokenizer
+        except Exception as e:
+            raise ImportError(
+                "onnxruntime/transformers 임포트 실패. 'pip install onnxruntime \"transformers>=4.41,<5\"' 로 설치했는지 확인하세요"
+            ) from e
+
+        onnx_dir = onnx_dir or default_onnx_dir(model_name)
+        path = export_onnx(model_name, onnx_dir, quantize=quantize)
+        opts = ort.SessionOptions()
+        if threads:
+            opts.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(onnx_dir)
+        self.pooling = (pooling or pooling_mode(model_name, onnx_dir)).lower()
+        if self.pooling not in _POOLING_KEYS.values():
+            raise ValueError(f"Unknown pooling: {self.pooling}")
+
+        self.model_id = f"{model_name}@onnx-{'int8' if quantize else 'fp32'}"
+        self.normalize = normalize
+        self.batch_size = batch_size
+        self.max_seq_length = max_seq_length
+        self.dim = None
 
-    def _l2(self, v):
+    def _run(self, batch: List[str]):
+        enc = self.tokenizer(
+            batch,
+            padding=True,
+            truncation=True,
+            max_length=self.max_seq_length,
+            return_tensors="np",
+        )
+        feeds = {k: v.astype("int64") for k, v in enc.items() if k in self.input_names}
+        hidden = self.session.run(None, feeds)[0]
+        return _as_matrix(_pool(hidden, enc["attention_mask"], self.pooling))
+
+    def encode(self, texts: List[str]):
         import numpy as np
-        v = np.asarray(v, dtype="float32")
-        return v / (np.linalg.norm(v) + 1e-12)
+
+        # 길이순으로 묶어 패딩을 줄이고 원래 순서에 기록
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        out = None
+        for s in range(0, len(order), self.batch_size):
+            idxs = order[s : s + self.batch_size]
+            embs = self._run([texts[i] for i in idxs])
+            if out is None:
+                out = np.empty((len(texts), embs.shape[1]), dtype="float32")
+                self.dim = embs.shape[1]
+            out[idxs] = embs
+        if out is None:
+            return np.zeros((0, self.dim or 0), dtype="float32")
+        return _l2_rows(out) if self.normalize else out
+
+# -------------------
+# 임베딩 캐시 래퍼
+# -------------------
+class CachedEmbedder(BaseEmbedder):
+    """모든 provider 앞단에서 (모델, normalize, 텍스트 해시) 기준으로 캐시 조회"""
+
+    def __init__(self, inner: BaseEmbedder, cache):
+        self.inner = inner
+        self.cache = cache
+        self.model_id = inner.model_id
+        self.normalize = inner.normalize
+        self.dim = inner.dim
 
     def encode(self, texts: List[str]):
-        embs = self.model.encode(
-            texts,
-            normalize_embeddings=False,
-            show_progress_bar=False,
-            convert_to_numpy=True,
-            batch_size=self.batch_size,
-        )
-        if self.normalize:
-            embs = [self._l2(v) for v in embs]
-        else:
-            embs = [v.astype("float32") for v in embs]
-        return embs
+        import numpy as np
+
+        from pipeline.embed_cache import text_key
+
+        keys = [text_key(t) for t in texts]
+        found = self.cache.get_many(keys)
+        # 같은 텍스트가 여러 번 나와도 한 번만 인코딩
+        miss_keys: List[str] = []
+        miss_texts: List[str] = []
+        pending = set()
+        for k, t in zip(keys, texts):
+            if k not in found and k not in pending:
+                pending.add(k)
+                miss_keys.append(k)
+                miss_texts.append(t)
+        self.cache.record(len(texts) - len(miss_keys), len(miss_keys))
+        if miss_texts:
+            new = self.inner.encode(miss_texts)
+            # 키 인덱스 저장은 flush_every 삽입마다 / close() 때 (질의마다 전체를 다시 쓰지 않음)
+            self.cache.put_many(miss_keys, new)
+            for k, v in zip(miss_keys, new):
+                found[k] = v
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype="float32")
+        out = np.empty((len(texts), len(next(iter(found.values())))), dtype="float32")
+        for i, k in enumerate(keys):
+            out[i] = found[k]
+        return out
+
+    def close(self):
+        self.cache.close()
+        self.inner.close()
+
 
 # -------------------
 # Factory 함수
 # -------------------
-def get_embedder(cfg: Dict[str, Any]) -> BaseEmbedder:
+def get_embedder(cfg: Dict[str, Any], calibrate: Optional[List[str]] = None) -> BaseEmbedder:
+    """설정으로 임베더 생성
+
+    calibrate: 실제 청크 텍스트 샘플을 넘기면 batch_size/스레드 수 스윕을 먼저 돌려
+    결과를 저장한다. embedder.autotune.enabled 이면 저장된 값을 자동 적용한다.
+    """
     prov = (cfg.get("provider") or "qwen").lower()
+    acfg = cfg.get("autotune") or {}
+    if prov != "openai" and (acfg.get("enabled", False) or calibrate is not None):
+        from pipeline import autotune
+
+        path = acfg.get("path", autotune.DEFAULT_PATH)
+        if calibrate is not None:
+            autotune.calibrate(
+                cfg,
+                calibrate,
+                batch_sizes=acfg.get("batch_sizes"),
+                thread_counts=acfg.get("threads"),
+                max_rss_mb=acfg.get("max_rss_mb"),
+                path=path,
+                token_budgets=acfg.get("token_budgets"),
+            )
+        cfg = autotune.apply_tuned(cfg, path)
+
+    pcfg = cfg.get("pool") or {}
+    if pcfg.get("workers", 0) > 1 and prov in ("qwen", "local", "onnx"):
+        from pipeline.embed_pool import PooledEmbedder
+
+        emb = PooledEmbedder(
+            cfg,
+            workers=pcfg["workers"],
+            threads_per_worker=pcfg.get("threads_per_worker", 1),
+            shard_size=pcfg.get("shard_size", 256),
+        )
+    else:
+        emb = _build_embedder(cfg)
+    ccfg = cfg.get("cache") or {}
+    if ccfg.get("enabled", False):
+        from pipeline.embed_cache import EmbeddingCache
+
+        cache = EmbeddingCache(
+            ccfg.get("dir", "./data/emb_cache"),
+            model_id=emb.model_id,
+            normalize=emb.normalize,
+            max_entries=ccfg.get("max_entries", 200_000),
+            flush_every=ccfg.get("flush_every", 1024),
+        )
+        emb = CachedEmbedder(emb, cache)
+    return emb
+
+
+def _set_torch_threads(threads: Optional[int]):
+    if not threads:
+        return
+    try:
+        import torch
+
+        torch.set_num_threads(int(threads))
+    except Exception:  # pylint: disable=broad-except
+        pass
+
+
+def _build_embedder(cfg: Dict[str, Any]) -> BaseEmbedder:
+    prov = (cfg.get("provider") or "qwen").lower()
+    if prov in ("qwen", "local"):
+        _set_torch_threads(cfg.get("threads"))
     if prov == "qwen":
         return QwenEmbedder(
             model_name=cfg.get("model", "Qwen/Qwen2.5-Embedding"),
             normalize=cfg.get("normalize", True),
             device=cfg.get("device", "cpu"),
             batch_size=cfg.get("batch_size", 16),
+            token_budget=cfg.get("token_budget"),
         )
     elif prov == "openai":
         return OpenAIEmbedder(
@@ -147,6 +598,10 @@ def get_embedder(cfg: Dict[str, Any]) -> BaseEmbedder:
             dim=cfg.get("dim", 3072),
             normalize=cfg.get("normalize", True),
             batch_size=cfg.get("batch_size", 64),
+            concurrency=cfg.get("concurrency", 4),
+            max_request_tokens=cfg.get("max_request_tokens", 300_000),
+            max_retries=cfg.get("max_retries", 6),
+            base_url=cfg.get("base_url"),
         )
     elif prov == "local":
         return LocalSBERTEmbedder(
@@ -155,6 +610,23 @@ def get_embedder(cfg: Dict[str, Any]) -> BaseEmbedder:
             normalize=cfg.get("normalize", True),
             device=cfg.get("device", "cpu"),
             batch_size=cfg.get("batch_size", 16),
+            token_budget=cfg.get("token_budget"),
         )
+    elif prov == "onnx":
+        try:
+            return OnnxEmbedder(
+                model_name=cfg.get("model", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"),
+                onnx_dir=cfg.get("onnx_dir"),
+                quantize=cfg.get("quantize", True),
+                normalize=cfg.get("normalize", True),
+                batch_size=cfg.get("batch_size", 16),
+                max_seq_length=cfg.get("max_seq_length", 128),
+                threads=cfg.get("threads"),
+                pooling=cfg.get("pooling"),
+            )
+        except Exception as e:  # pylint: disable=broad-except
+            # 내보내기/런타임을 쓸 수 없으면 같은 모델의 PyTorch 경로로 대체
+            print(f"[WARN] ONNX 임베더 사용 불가({e}), provider=local 로 대체합니다")
+            return _build_embedder({**cfg, "provider": "local"})
     else:
         raise ValueError(f"Unknown embeddings provider: {prov}")
@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+FAISS 세그먼트 저장소 (append-only)
+- 업서트마다 작은 불변 세그먼트(인덱스 파일)를 새로 쓰고
+  manifest.json 을 임시 파일 → os.replace 로 교체해 원자적으로 커밋한다.
+- manifest에 없는 파일은 아직 커밋되지 않았거나 병합으로 대체된 것이므로 읽지 않는다.
+  (쓰기 도중 중단돼도 마지막으로 커밋된 상태가 그대로 유지됨)
+- 세그먼트 파일은 한 번 쓰면 수정하지 않는다. 청크 메타는 manifest의 meta_db(SQLite)에 저장.
+- writer는 한 프로세스를 가정 (검색 프로세스는 여러 개여도 됨)
+"""
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+MANIFEST = "manifest.json"
+
+
+def atomic_write_json(path: str, data: Any, indent: int = 2) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def merge_topk(Ds: List[Any], Is: List[Any], k: int, metric: str):
+    """세그먼트/샤드별 (D, I) 검색 결과를 전역 top-k로 병합
+
+    L2는 거리 오름차순, IP는 점수 내림차순. 결과가 모자란 자리(-1)는
+    FAISS가 ±FLT_MAX로 채우므로 정렬하면 자연히 뒤로 밀린다.
+    """
+    import numpy as np
+
+    D = np.concatenate(Ds, axis=1)
+    I = np.concatenate(Is, axis=1)
+    if D.shape[1] < k:
+        fill = np.finfo("float32").min if metric == "IP" else np.finfo("float32").max
+        pad = k - D.shape[1]
+        D = np.hstack([D, np.full((len(D), pad), fill, dtype=D.dtype)])
+        I = np.hstack([I, np.full((len(I), pad), -1, dtype=I.dtype)])
+    order = np.argsort(-D if metric == "IP" else D, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(D, order, axis=1), np.take_along_axis(I, order, axis=1)
+
+
+def empty_manifest() -> Dict[str, Any]:
+    return {
+        "format": 1,
+        "version": 0,
+        "dim": None,
+        "metric": None,
+        "template": None,
+        "next_seq": 1,
+        "segments": [],
+        "meta_db": None,
+    }
+
+
+class SegmentStore:
+    """<root>/manifest.json + 세그먼트 파일 입출력"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.manifest = self._read() or empty_manifest()
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.root, MANIFEST)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.manifest_path)
+
+    def path(self, rel: str) -> str:
+        return os.path.normpath(os.path.join(self.root, rel))
+
+    def _read(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def reload(self) -> bool:
+        """다른 프로세스가 커밋한 manifest가 있으면 다시 읽음 (변경 여부 반환)"""
+        m = self._read()
+        if m is None or m.get("version") == self.manifest.get("version"):
+            return False
+        self.manifest = m
+        return True
+
+    def new_name(self, m: Dict[str, Any], prefix: str) -> str:
+        seq = m["next_seq"]
+        m["next_seq"] = seq + 1
+        return f"{prefix}-{seq:06d}"
+
+    # --- 파일 입출력 ---
+    def write_index(self, faiss, index, rel: str) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        tmp = self.path(rel) + ".tmp"
+        faiss.write_index(index, tmp)
+        os.replace(tmp, self.path(rel))
+
+    def read_index(self, faiss, rel: str, mmap: bool = False):
+        """mmap=True: 읽기 전용 mmap 로드 (프로세스 간 페이지 캐시 공유)
+
+        IVF 역리스트는 IO_FLAG_MMAP, Flat/HNSW 등의 코드 배열은 IO_FLAG_MMAP_IFC로 매핑한다.
+        둘을 함께 줄 수 없는 인덱스(IVF)는 IO_FLAG_MMAP만으로 다시 시도.
+        """
+        path = self.path(rel)
+        if not mmap:
+            return faiss.read_index(path)
+        ro = faiss.IO_FLAG_READ_ONLY
+        ifc = getattr(faiss, "IO_FLAG_MMAP_IFC", 0)  # 구버전 faiss에는 없음
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | ifc | ro)
+        except RuntimeError:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | ro)
+
+    def read_items(self, rel: str) -> List[Dict]:
+        """SQLite 이전 전의 세그먼트 메타 파일 (메타 저장소 이전 시에만 사용)"""
+        path = self.path(rel)
+        with open(path, "r", encoding="utf-8") as f:
+            if not path.endswith(".jsonl"):
+                # 세그먼트 도입 전 단일 메타 파일 ({"items": [...]})
+                data = json.load(f)
+                return data.get("items", []) if isinstance(data, dict) else data
+            return [json.loads(ln) for ln in f if ln.strip()]
+
+    # --- 커밋 / 정리 ---
+    def commit(self, m: Dict[str, Any]) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        m["version"] = int(m.get("version", 0)) + 1
+        m["committed_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        atomic_write_json(self.manifest_path, m)
+        self.manifest = m
+
+    def referenced(self) -> set:
+        refs = {MANIFEST}
+        if self.manifest.get("template"):
+            refs.add(self.manifest["template"])
+        if self.manifest.get("meta_db"):
+            db = self.manifest["meta_db"]
+            refs.update((db, db + "-wal", db + "-shm", db + "-journal"))
+        for s in self.manifest["segments"]:
+            refs.add(s["index"])
+            if s.get("meta"):
+                refs.add(s["meta"])
+        return refs
+
+    def cleanup(self) -> List[str]:
+        """manifest가 참조하지 않는 파일(병합 전 세그먼트, 중단된 쓰기의 .tmp) 삭제"""
+        if not os.path.isdir(self.root):
+            return []
+        refs = self.referenced()
+        removed = []
+        for name in os.listdir(self.root):
+            if name not in refs and os.path.isfile(os.path.join(self.root, name)):
+                os.remove(os.path.join(self.root, name))
+                removed.append(name)
+        return removed
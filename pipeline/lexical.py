@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+어휘(lexical) 검색 + 벡터 검색 결합 (하이브리드)
+- 토큰: 단어(소문자, 식별자/부품번호의 -._ 유지) + 한글 연속 구간의 문자 n-gram(기본 2)
+  → 띄어쓰기/조사가 달라도 "성취수준을" ↔ "성취 수준" 이 겹치는 n-gram으로 맞춰짐
+- 역색인/BM25는 메타 SQLite의 FTS5 테이블(pipeline/meta_store.py)이 담당하고,
+  여기서는 미리 자른 토큰을 공백으로 이어 넣는다 (FTS5 토크나이저는 공백 분리만 하도록 설정)
+- 벡터 top-k와 BM25 top-k를 reciprocal rank fusion(RRF)으로 합침: score = Σ 1 / (rrf_k + rank)
+  (BM25 점수 자체는 질의·코퍼스마다 크기가 달라 쓰지 않고 순위만 사용)
+"""
+import re
+from typing import Dict, List, Optional
+
+_WORD = re.compile(r"\w+(?:[\-.]\w+)*")
+_HANGUL = re.compile(r"[가-힣]+")
+
+
+def tokenize(text: str, ngram: int = 2) -> List[str]:
+    """텍스트 → 색인 토큰 (중복 포함, 등장 순서)"""
+    out: List[str] = []
+    for m in _WORD.finditer((text or "").lower()):
+        word = m.group(0)
+        out.append(word)
+        parts = re.split(r"[\-.]", word)
+        if len(parts) > 1:
+            out.extend(p for p in parts if p)
+        for run in _HANGUL.findall(word):
+            if len(run) > ngram:
+                out.extend(run[i : i + ngram] for i in range(len(run) - ngram + 1))
+            elif len(run) == ngram and run != word:
+                out.append(run)
+    return out
+
+
+def match_query(text: str, ngram: int = 2) -> Optional[str]:
+    """질의 → FTS5 MATCH 식 (토큰 OR). 토큰이 없으면 None"""
+    toks = list(dict.fromkeys(tokenize(text, ngram)))
+    if not toks:
+        return None
+    return " OR ".join('"' + t.replace('"', '""') + '"' for t in toks)
+
+
+def rrf_fuse(rankings: List[List[int]], k: int, rrf_k: int = 60):
+    """id 순위 목록들 → RRF 점수 상위 k (ids, scores). -1은 무시"""
+    scores: Dict[int, float] = {}
+    for ids in rankings:
+        rank = 0
+        for i in ids:
+            if i < 0:
+                continue
+            rank += 1
+            scores[int(i)] = scores.get(int(i), 0.0) + 1.0 / (rrf_k + rank)
+    top = sorted(scores.items(), key=lambda kv: -kv[1])[:k]
+    return [i for i, _ in top], [s for _, s in top]
+
+
+def hybrid_search(sink, vectors, queries: List[str], k: int = 5, filter: Optional[Dict] = None, cfg=None):
+    """벡터 검색 + BM25 검색을 RRF로 합친 (D, I). D는 RRF 점수(클수록 관련)
+
+    cfg (vector_sink.faiss.hybrid): depth = 각 검색에서 가져올 후보 수, rrf_k = RRF 상수
+    """
+    import numpy as np
+
+    cfg = cfg or {}
+    depth = max(k, int(cfg.get("depth", 50)))
+    rrf_k = int(cfg.get("rrf_k", 60))
+    if filter:
+        _, dense = sink.search(vectors, k=depth, filter=filter)
+    else:
+        _, dense = sink.search(vectors, k=depth)
+    D = np.zeros((len(queries), k), dtype="float32")
+    I = np.full((len(queries), k), -1, dtype="int64")
+    for qi, text in enumerate(queries):
+        lex_ids, _ = sink.lexical_search(text, depth, filter=filter)
+        ids, scores = rrf_fuse([dense[qi].tolist(), list(lex_ids)], k, rrf_k)
+        I[qi, : len(ids)] = ids
+        D[qi, : len(scores)] = scores
+    return D, I
@@ -0,0 +1,345 @@
+# -*- coding: utf-8 -*-
+"""
+청크 메타데이터 저장소 (SQLite, FAISS id 키) + 문서 레지스트리
+- 검색 결과 k개 행만 조회하므로 전체 메타를 읽어 파싱할 필요가 없다.
+- 업서트는 트랜잭션 한 번으로 행을 추가하고, 커밋 순서는 메타 → manifest.
+  manifest의 세그먼트에 없는 id의 행은 조회되지 않는다 (중단된 업서트 잔여분).
+- 문서 레지스트리: doc_id(문자열) → doc_key(정수, AUTOINCREMENT라 삭제 후에도 재사용 안 함)
+  FAISS id = doc_key << DOC_SHIFT | 문서 내 청크 순번 → 문서 단위 교체/삭제는 id 구간 하나
+- WAL 모드: 검색 프로세스가 읽는 중에도 인제스트가 쓸 수 있음
+- 필터 검색용 posting 테이블: (필드, 값) → FAISS id. 업서트 때 meta의 doc_id/block_type/source/pages로
+  함께 채우고, filter_ids()가 조건별 id 집합의 교집합을 돌려준다 (FAISS IDSelector로 사전 필터링)
+- 어휘 검색용 FTS5 테이블(lexical): 업서트 때 청크 텍스트를 pipeline/lexical.py 토큰(단어 + 한글 n-gram)으로
+  넣어 두고 lexical_search()가 BM25 상위 행을 돌려준다 (FTS5가 없는 SQLite면 비활성)
+"""
+import json
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pipeline.lexical import tokenize
+
+# row: FAISS id (레지스트리 도입 전 인덱스는 행 번호 = id)
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    row INTEGER PRIMARY KEY,
+    id TEXT,
+    chunk_id TEXT,
+    text TEXT,
+    meta TEXT
+);
+CREATE TABLE IF NOT EXISTS postings (
+    field TEXT NOT NULL,
+    value NOT NULL,
+    row INTEGER NOT NULL,
+    PRIMARY KEY (field, value, row)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_row ON postings (row);
+CREATE TABLE IF NOT EXISTS docs (
+    doc_key INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc_id TEXT UNIQUE NOT NULL,
+    chunks INTEGER NOT NULL DEFAULT 0,
+    updated TEXT
+);
+"""
+
+# 문서당 최대 2^24(약 1,600만) 청크. doc_key 0 구간은 레지스트리 도입 전 행 번호 id
+DOC_SHIFT = 24
+
+
+def make_ids(doc_key: int, n: int, start: int = 0) -> List[int]:
+    """문서의 청크 순번 start..start+n-1 → FAISS id"""
+    return [(doc_key << DOC_SHIFT) | i for i in range(start, start + n)]
+
+
+def doc_range(doc_key: int) -> Tuple[int, int]:
+    """문서의 FAISS id 구간 [lo, hi)"""
+    return doc_key << DOC_SHIFT, (doc_key + 1) << DOC_SHIFT
+
+
+# SQLite 바인딩 변수 상한(기본 999) 이하로 나눠 조회
+_MAX_VARS = 900
+
+# posting을 만드는 meta 필드 (pages는 쪽마다 "page" posting 하나)
+FILTER_FIELDS = ("doc_id", "block_type", "source")
+# PRAGMA user_version: 1 = posting 테이블 채워짐, 2 = 어휘(FTS5) 색인까지 채워짐
+_POSTINGS_VERSION = 1
+_LEXICAL_VERSION = 2
+
+# 토큰을 공백으로 이어 넣으므로 FTS5는 공백에서만 자르도록 (식별자의 -._ 유지).
+# detail=column: 단일 토큰 질의만 쓰므로 위치 정보 없이 색인 크기를 줄임
+_LEXICAL_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS lexical USING fts5("
+    "body, tokenize=\"unicode61 remove_diacritics 0 tokenchars '-._'\", detail=column)"
+)
+
+
+def _postings(row: int, meta: Dict[str, Any]) -> List[Tuple[str, Any, int]]:
+    out = [(f, str(meta[f]), row) for f in FILTER_FIELDS if meta.get(f) is not None]
+    out.extend(("page", int(p), row) for p in set(meta.get("pages") or []))
+    return out
+
+
+def filter_clauses(flt: Dict[str, Any]) -> List[Tuple[str, str, List[Any]]]:
+    """검색 필터 → (필드, 조건 SQL, 인자) 목록 (조건끼리는 AND, 한 필드의 여러 값은 OR)
+
+    {"doc_id": "a" | ["a", "b"], "block_type": ..., "source": ..., "pages": 5 | [3, 10] | "3-10"}
+    pages 범위는 청크의 쪽 중 하나라도 [lo, hi] 안에 있으면 통과.
+    """
+    out = []
+    for key, val in (flt or {}).items():
+        if val is None or val == []:
+            continue
+        field = "doc_id" if key == "doc" else "page" if key == "pages" else key
+        if field == "page":
+            if isinstance(val, str):
+                lo, _, hi = val.partition("-")
+                rng = (int(lo), int(hi or lo))
+            elif isinstance(val, (list, tuple)):
+                rng = (int(val[0]), int(val[-1]))
+            else:
+                rng = (int(val), int(val))
+            out.append((field, "value BETWEEN ? AND ?", list(rng)))
+        elif field in FILTER_FIELDS:
+            vals = [str(v) for v in (val if isinstance(val, (list, tuple, set)) else [val])]
+            out.append((field, f"value IN ({','.join('?' * len(vals))})", vals))
+        else:
+            raise ValueError(f"지원하지 않는 필터 필드: {key} (doc_id, block_type, source, pages)")
+    return out
+
+
+def _filter_sql(clauses) -> Tuple[str, List[Any]]:
+    sql = " INTERSECT ".join(f"SELECT row FROM postings WHERE field = ? AND {cond}" for _, cond, _ in clauses)
+    return sql, [a for field, _, vals in clauses for a in [field, *vals]]
+
+
+def lexical_body(text: Optional[str]) -> str:
+    """청크 텍스트 → FTS5에 넣을 토큰 문자열"""
+    return " ".join(tokenize(text or ""))
+
+
+def _row_to_item(r) -> Dict[str, Any]:
+    return {
+        "faiss_id": r[0],
+        "id": r[1],
+        "chunk_id": r[2],
+        "text": r[3],
+        "meta": json.loads(r[4] or "{}"),
+    }
+
+
+class MetaStore:
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        else:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
+            self.conn.executescript(_SCHEMA)
+            self.conn.commit()
+        # 검색 서버의 여러 스레드가 연결 하나를 공유
+        self._lock = threading.Lock()
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        self.has_postings = version >= _POSTINGS_VERSION
+        self.has_lexical = version >= _LEXICAL_VERSION
+        if readonly:
+            return
+        lexical_ok = self._create_lexical()
+        if not self.has_postings:
+            self._build_postings()
+        if lexical_ok and not self.has_lexical:
+            self._build_lexical()
+
+    def _create_lexical(self) -> bool:
+        try:
+            with self.conn:
+                self.conn.execute(_LEXICAL_SCHEMA)
+            return True
+        except sqlite3.OperationalError as e:
+            print(f"[WARN] SQLite FTS5 사용 불가 → 어휘(BM25) 검색 비활성: {e}")
+            return False
+
+    def _build_lexical(self):
+        """어휘 색인 도입 전 DB: 저장된 텍스트로 한 번 채움"""
+        t0 = time.perf_counter()
+        with self._lock, self.conn:
+            rows = self.conn.execute("SELECT row, text FROM items").fetchall()
+            self.conn.executemany(
+                "INSERT INTO lexical (rowid, body) VALUES (?, ?)", [(r, lexical_body(t)) for r, t in rows]
+            )
+            self.conn.execute(f"PRAGMA user_version = {_LEXICAL_VERSION}")
+        self.has_lexical = True
+        if rows:
+            print(f"[INFO] 어휘(BM25) 색인 생성: {len(rows)} rows ({time.perf_counter() - t0:.2f}s) → {self.path}")
+
+    def _build_postings(self):
+        """posting 테이블 도입 전 DB: 저장된 meta로 한 번 채움"""
+        with self._lock, self.conn:
+            n = 0
+            for row, meta in self.conn.execute("SELECT row, meta FROM items").fetchall():
+                ps = _postings(row, json.loads(meta or "{}"))
+                self.conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?)", ps)
+                n += 1
+            self.conn.execute(f"PRAGMA user_version = {_POSTINGS_VERSION}")
+        self.has_postings = True
+        if n:
+            print(f"[INFO] 필터 검색 posting 생성: {n} rows → {self.path}")
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+
+    def put(self, ids: Iterable[int], items: Iterable[Dict[str, Any]]) -> int:
+        """FAISS id별로 저장 (같은 id가 있으면 덮어씀). 저장한 행 수 반환"""
+        items_list = list(items)
+        rows = [
+            (
+                int(fid),
+                it.get("id"),
+                it.get("chunk_id"),
+                it.get("text"),
+                json.dumps(it.get("meta", {}), ensure_ascii=False),
+            )
+            for fid, it in zip(ids, items_list)
+        ]
+        postings = [p for (row, _, _, _, _), it in zip(rows, items_list) for p in _postings(row, it.get("meta", {}))]
+        keys = [(r[0],) for r in rows]
+        with self._lock, self.conn:
+            # 덮어쓰는 id의 이전 posting/어휘 색인 제거
+            self.conn.executemany("DELETE FROM postings WHERE row = ?", keys)
+            self.conn.executemany("INSERT OR REPLACE INTO items VALUES (?, ?, ?, ?, ?)", rows)
+            self.conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?)", postings)
+            if self.has_lexical:
+                self.conn.executemany("DELETE FROM lexical WHERE rowid = ?", keys)
+                self.conn.executemany(
+                    "INSERT INTO lexical (rowid, body) VALUES (?, ?)", [(r[0], lexical_body(r[3])) for r in rows]
+                )
+        return len(rows)
+
+    def get(self, rows: List[int]) -> List[Optional[Dict[str, Any]]]:
+        """FAISS id 목록 → 아이템 목록 (같은 순서, 없으면 None)"""
+        found: Dict[int, Dict[str, Any]] = {}
+        uniq = sorted({int(r) for r in rows if r is not None and r >= 0})
+        with self._lock:
+            for i in range(0, len(uniq), _MAX_VARS):
+                part = uniq[i : i + _MAX_VARS]
+                q = f"SELECT * FROM items WHERE row IN ({','.join('?' * len(part))})"
+                for r in self.conn.execute(q, part):
+                    found[r[0]] = _row_to_item(r)
+        return [found.get(int(r)) if r is not None else None for r in rows]
+
+    def merge_pages(self, row_pages: Dict[int, List[int]]) -> None:
+        """근사 중복으로 합쳐진 청크의 페이지를 meta.pages에 병합"""
+        items = self.get(list(row_pages))
+        updates, postings = [], []
+        for (row, pages), it in zip(row_pages.items(), items):
+            if it is None:
+                continue
+            meta = it["meta"]
+            meta["pages"] = sorted(set(meta.get("pages", [])) | set(pages))
+            updates.append((json.dumps(meta, ensure_ascii=False), int(row)))
+            postings.extend(("page", int(p), int(row)) for p in pages)
+        with self._lock, self.conn:
+            self.conn.executemany("UPDATE items SET meta = ? WHERE row = ?", updates)
+            self.conn.executemany("INSERT OR IGNORE INTO postings VALUES (?, ?, ?)", postings)
+
+    def delete(self, ids: Iterable[int]) -> int:
+        rows = [(int(i),) for i in ids]
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM postings WHERE row = ?", rows)
+            if self.has_lexical:
+                self.conn.executemany("DELETE FROM lexical WHERE rowid = ?", rows)
+            cur = self.conn.executemany("DELETE FROM items WHERE row = ?", rows)
+            return cur.rowcount
+
+    def filter_ids(self, flt: Dict[str, Any]):
+        """필터 조건을 모두 만족하는 FAISS id (정렬된 int64 배열). 조건이 없으면 None"""
+        import numpy as np
+
+        clauses = filter_clauses(flt)
+        if not clauses:
+            return None
+        if not self.has_postings:
+            return self._scan_filter(clauses)
+        sql, args = _filter_sql(clauses)
+        with self._lock:
+            rows = self.conn.execute(sql + " ORDER BY row", args).fetchall()
+        return np.fromiter((r[0] for r in rows), dtype="int64", count=len(rows))
+
+    def lexical_search(self, match: str, k: int, flt: Optional[Dict[str, Any]] = None) -> List[Tuple[int, float]]:
+        """FTS5 MATCH 식 → BM25 상위 k개 (FAISS id, 점수). 점수는 클수록 관련 (FTS5 bm25의 부호 반전)
+
+        점수는 한 질의 안의 순위용이다. IDF/문서 길이 정규화 때문에 크기가 코퍼스·질의마다 크게 달라
+        (작은 코퍼스에서는 1e-6 수준) 질의 사이나 벡터 점수와 비교할 수 없다. 하이브리드는 순위만 쓴다.
+        """
+        if not self.has_lexical or not match:
+            return []
+        sql = "SELECT rowid, bm25(lexical) FROM lexical WHERE lexical MATCH ?"
+        args: List[Any] = [match]
+        clauses = filter_clauses(flt) if flt else []
+        if clauses:
+            if not self.has_postings:
+                return []
+            fsql, fargs = _filter_sql(clauses)
+            sql += f" AND rowid IN ({fsql})"
+            args += fargs
+        with self._lock:
+            rows = self.conn.execute(sql + " ORDER BY bm25(lexical) LIMIT ?", args + [int(k)]).fetchall()
+        return [(r[0], -r[1]) for r in rows]
+
+    def _scan_filter(self, clauses):
+        """posting이 아직 없는 DB를 읽기 전용으로 열었을 때: meta를 순회해 거름 (느린 경로)"""
+        import numpy as np
+
+        def ok(meta):
+            for field, _, vals in clauses:
+                if field == "page":
+                    if not any(vals[0] <= int(p) <= vals[1] for p in meta.get("pages") or []):
+                        return False
+                elif str(meta.get(field)) not in vals:
+                    return False
+            return True
+
+        with self._lock:
+            rows = [r for r, m in self.conn.execute("SELECT row, meta FROM items") if ok(json.loads(m or "{}"))]
+        return np.array(sorted(rows), dtype="int64")
+
+    # --- 문서 레지스트리 ---
+    def doc_key(self, doc_id: str, create: bool = False) -> Optional[int]:
+        with self._lock:
+            r = self.conn.execute("SELECT doc_key FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+            if r is not None or not create:
+                return r[0] if r else None
+            with self.conn:
+                cur = self.conn.execute("INSERT INTO docs (doc_id) VALUES (?)", (doc_id,))
+            return cur.lastrowid
+
+    def set_doc_chunks(self, doc_key: int, chunks: int) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE docs SET chunks = ?, updated = datetime('now') WHERE doc_key = ?",
+                (chunks, doc_key),
+            )
+
+    def drop_doc(self, doc_key: int) -> None:
+        """문서 등록 해제 + 해당 id 구간의 메타 행 삭제"""
+        lo, hi = doc_range(doc_key)
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM items WHERE row >= ? AND row < ?", (lo, hi))
+            self.conn.execute("DELETE FROM postings WHERE row >= ? AND row < ?", (lo, hi))
+            if self.has_lexical:
+                self.conn.execute("DELETE FROM lexical WHERE rowid >= ? AND rowid < ?", (lo, hi))
+            self.conn.execute("DELETE FROM docs WHERE doc_key = ?", (doc_key,))
+
+    def documents(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute("SELECT doc_key, doc_id, chunks, updated FROM docs ORDER BY doc_key")
+            return [{"doc_key": r[0], "doc_id": r[1], "chunks": r[2], "updated": r[3]} for r in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+동시 요청 마이크로 배칭
+- 여러 스레드에서 들어온 요청을 최대 max_wait_ms 동안 또는 max_batch개까지 모아
+  한 번의 batch_fn 호출로 처리하고, 결과를 각 호출자에게 돌려준다.
+- 첫 요청 도착 시점부터 대기 시간을 재므로 지연 증가분은 max_wait_ms 로 제한된다.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch: int = 32,
+        max_wait_ms: float = 2.0,
+    ):
+        self.batch_fn = batch_fn
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max_wait_ms / 1000.0
+        self._q: "queue.Queue" = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self._closed = False
+        self._t = threading.Thread(target=self._loop, name="micro-batcher", daemon=True)
+        self._t.start()
+
+    def submit(self, item: Any) -> Future:
+        if self._closed:
+            raise RuntimeError("MicroBatcher가 종료되었습니다")
+        fut: Future = Future()
+        self._q.put((item, fut))
+        return fut
+
+    def __call__(self, item: Any, timeout: float = None) -> Any:
+        return self.submit(item).result(timeout)
+
+    @property
+    def mean_batch(self) -> float:
+        return self.items / self.batches if self.batches else 0.0
+
+    def _loop(self):
+        while True:
+            first = self._q.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.perf_counter() + self.max_wait
+            while len(batch) < self.max_batch:
+                remain = deadline - time.perf_counter()
+                if remain <= 0:
+                    break
+                try:
+                    nxt = self._q.get(timeout=remain)
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    self._q.put(None)  # 남은 배치 처리 후 종료
+                    break
+                batch.append(nxt)
+            self._run(batch)
+
+    def _run(self, batch):
+        items = [it for it, _ in batch]
+        self.batches += 1
+        self.items += len(items)
+        try:
+            results = self.batch_fn(items)
+        except Exception as e:  # pylint: disable=broad-except
+            for _, fut in batch:
+                fut.set_exception(e)
+            return
+        for (_, fut), res in zip(batch, results):
+            fut.set_result(res)
+
+    def close(self):
+        self._closed = True
+        self._q.put(None)
+        self._t.join()
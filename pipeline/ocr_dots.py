@@ -6,19 +6,27 @@
 from collections import defaultdict
 from typing import Dict, List
 
-try:  # 선택적 임포트: 설치되어 있지 않으면 None 으로 둔다
-    from PIL import Image
-    import pytesseract
-    from pykospacing import Spacing
-    import cv2
-    import numpy as np
-
-except Exception:  # pragma: no cover - optional dependency
-    Image = None  # type: ignore
-    pytesseract = None  # type: ignore
-    Spacing = None  # type: ignore
-    cv2 = None  # type: ignore
-    np = None  # type: ignore
+# 선택적 백엔드: PyKoSpacing(TensorFlow), OpenCV 등은 임포트 비용이 커서
+# DotsOCR 생성 시점에 _load_backends()로 불러온다. 설치되어 있지 않으면 None.
+Image = None  # type: ignore
+pytesseract = None  # type: ignore
+Spacing = None  # type: ignore
+cv2 = None  # type: ignore
+np = None  # type: ignore
+
+
+def _load_backends() -> None:
+    global Image, pytesseract, Spacing, cv2, np
+    if None not in (Image, pytesseract, Spacing, cv2, np):
+        return
+    try:
+        from PIL import Image
+        import pytesseract
+        from pykospacing import Spacing
+        import cv2
+        import numpy as np
+    except Exception:  # pragma: no cover - optional dependency
+        pass
 
 
 
@@ -104,6 +112,7 @@ class DotsOCR:
         self.opts = kwargs
         self.psm = psm
         self.oem = oem
+        _load_backends()
         if None in (Image, pytesseract, Spacing, cv2, np):
             raise ImportError(
                 "pytesseract, Pillow, OpenCV, numpy, PyKoSpacing 패키지가 필요합니다",
@@ -9,8 +9,6 @@ PyMuPDF(fitz)를 이용해 PDF 페이지를 이미지로 렌더링한다.
 import os
 from typing import Dict, List
 
-import fitz  # PyMuPDF
-
 
 def pdf_to_images(
     pdf_path: str,
@@ -34,6 +32,8 @@ def pdf_to_images(
         각 페이지에 대한 메타데이터 리스트. 페이지 번호, 이미지 경로, dpi,
         폭/높이, 색공간 정보를 포함한다.
     """
+    import fitz  # PyMuPDF (임포트 비용이 있어 호출 시점에 로드)
+
     os.makedirs(out_dir, exist_ok=True)
     doc = fitz.open(pdf_path)
     images: List[Dict] = []
@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+검색 결과 캐시 (검색 서버 프로세스 메모리, LRU)
+- 정확 일치: (정규화한 질의, k, 필터, 검색 모드) 키 → 임베딩/인덱스 검색 모두 생략
+- 근사 일치: 질의 임베딩과 캐시된 질의 임베딩의 코사인 거리가 max_distance 이하이고
+  k/필터/모드가 같으면 그 결과를 재사용 → 인덱스 검색 생략
+  (k/필터/모드 묶음마다 최근 near_max_entries개 질의 벡터를 쌓은 행렬과 행렬곱 1회로 비교)
+  hybrid/lexical 모드는 어휘 토큰(pipeline.lexical.tokenize)까지 같아야 재사용: 임베딩이 거의 같은
+  "AB-1234" / "AB-1235" 가 서로의 BM25 결과를 받지 않도록
+- 인덱스 버전(sink.version: manifest 버전 등)이 바뀌면(업서트/삭제/병합) 캐시 전체를 비움
+"""
+import json
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from pipeline.lexical import tokenize
+
+_WS = re.compile(r"\s+")
+_EDGE_PUNCT = re.compile(r"^[\s\?\.!,~]+|[\s\?\.!,~]+$")
+
+
+def normalize_query(text: str) -> str:
+    """NFKC + 소문자 + 공백 하나로 + 앞뒤 문장부호 제거 ("최소 성취수준?" == "최소  성취수준")"""
+    text = unicodedata.normalize("NFKC", text or "").lower()
+    return _EDGE_PUNCT.sub("", _WS.sub(" ", text))
+
+
+def index_version(sink) -> Any:
+    """캐시 무효화 기준 버전 (버전이 없는 저장소는 None → 무효화 안 됨)"""
+    return getattr(sink, "version", None)
+
+
+class QueryCache:
+    def __init__(self, max_entries: int = 1024, max_distance: float = 0.0, near_max_entries: int = 256):
+        self.max_entries = int(max_entries)
+        # 코사인 거리(1 - cos) 임계값. 0이면 근사 일치 사용 안 함
+        self.max_distance = float(max_distance)
+        # 근사 일치 비교 후보 상한 (k/필터/모드 묶음별 최근 질의 수): 락 안의 비교 비용 상한
+        self.near_max_entries = int(near_max_entries)
+        # key -> (정규화 질의 벡터 또는 None, 결과)
+        self._entries: "OrderedDict[Tuple, Tuple[Optional[np.ndarray], Any]]" = OrderedDict()
+        # (k, 필터, 모드) -> {key: 정규화 질의 벡터} (근사 일치 후보), 쌓은 행렬은 바뀔 때까지 재사용
+        self._groups: "Dict[Tuple, OrderedDict[Tuple, np.ndarray]]" = {}
+        self._mats: Dict[Tuple, Tuple[List[Tuple], np.ndarray]] = {}
+        self._version: Any = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(query: str, k: int, filter: Optional[Dict] = None, mode: str = "dense") -> Tuple:
+        """(정규화 질의, k, 필터, 모드[, 어휘 토큰]). key[1:]이 같은 항목끼리만 근사 일치 비교"""
+        flt = json.dumps(filter, sort_keys=True, ensure_ascii=False) if filter else ""
+        if mode == "dense":
+            return (normalize_query(query), int(k), flt, mode)
+        return (normalize_query(query), int(k), flt, mode, tuple(sorted(set(tokenize(query)))))
+
+    def _check_version(self, version: Any):
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._clear()
+            self._version = version
+
+    def _clear(self):
+        self._entries.clear()
+        self._groups.clear()
+        self._mats.clear()
+
+    def _forget(self, key: Tuple):
+        """근사 일치 후보에서 제거 (LRU 제거/덮어쓰기)"""
+        group = self._groups.get(key[1:])
+        if group is not None and group.pop(key, None) is not None:
+            self._mats.pop(key[1:], None)
+            if not group:
+                del self._groups[key[1:]]
+
+    def _matrix(self, gkey: Tuple) -> Tuple[List[Tuple], np.ndarray]:
+        mat = self._mats.get(gkey)
+        if mat is None:
+            group = self._groups[gkey]
+            mat = self._mats[gkey] = (list(group), np.stack(list(group.values())))
+        return mat
+
+    def get(self, key: Tuple, version: Any):
+        """정확 일치 결과 (없으면 None)"""
+        with self._lock:
+            self._check_version(version)
+            ent = self._entries.get(key)
+            if ent is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return ent[1]
+
+    def get_near(self, key: Tuple, vec, version: Any):
+        """질의 벡터가 가까운(같은 k/필터/모드, hybrid면 어휘 토큰도 같은) 캐시 결과. 없으면 None (miss로 집계)"""
+        with self._lock:
+            self._check_version(version)
+            if self.max_distance > 0 and key[1:] in self._groups:
+                keys, mat = self._matrix(key[1:])
+                sims = mat @ _unit(vec)
+                j = int(np.argmax(sims))
+                if 1.0 - float(sims[j]) <= self.max_distance:
+                    best_key = keys[j]
+                    self._entries.move_to_end(best_key)
+                    self.near_hits += 1
+                    return self._entries[best_key][1]
+            self.misses += 1
+            return None
+
+    def put(self, key: Tuple, vec, result: Any, version: Any):
+        with self._lock:
+            self._check_version(version)
+            uvec = _unit(vec) if vec is not None else None
+            self._entries[key] = (uvec, result)
+            self._entries.move_to_end(key)
+            self._forget(key)
+            if uvec is not None and self.max_distance > 0 and self.near_max_entries > 0:
+                group = self._groups.setdefault(key[1:], OrderedDict())
+                group[key] = uvec
+                if len(group) > self.near_max_entries:
+                    group.popitem(last=False)
+                self._mats.pop(key[1:], None)
+            while len(self._entries) > self.max_entries:
+                self._forget(self._entries.popitem(last=False)[0])
+
+    def clear(self):
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self.hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.hits + self.near_hits) / total, 4) if total else None,
+                "invalidations": self.invalidations,
+            }
+
+
+def _unit(vec) -> np.ndarray:
+    v = np.asarray(vec, dtype="float32").ravel()
+    n = float(np.linalg.norm(v))
+    return v / n if n > 0 else v
+
+
+def from_config(cfg: Optional[Dict]) -> Optional[QueryCache]:
+    """search_server.cache 설정 → QueryCache (enabled: false 면 None)"""
+    cfg = cfg or {}
+    if not cfg.get("enabled", True):
+        return None
+    return QueryCache(cfg.get("max_entries", 1024), cfg.get("max_distance", 0.0), cfg.get("near_max_entries", 256))
+
+
+def cached_search(cache: Optional[QueryCache], sink, keys: List[Tuple], qv, run) -> List[Any]:
+    """근사 일치를 먼저 찾고, 남은 질의만 run(인덱스 위치 목록) 으로 검색해 캐시에 저장"""
+    if cache is None:
+        return run(list(range(len(keys))))
+    version = index_version(sink)
+    out: List[Any] = [cache.get_near(key, qv[i], version) for i, key in enumerate(keys)]
+    todo = [i for i, r in enumerate(out) if r is None]
+    if todo:
+        for i, res in zip(todo, run(todo)):
+            out[i] = res
+            cache.put(keys[i], qv[i], res, version)
+    return out
@@ -0,0 +1,268 @@
+# -*- coding: utf-8 -*-
+"""
+상주형 로컬 검색 서비스
+- 임베더와 FAISS 인덱스를 한 번만 로드해 두고 HTTP/JSON으로 검색 제공
+- POST /search {"query": str, "k": int, "filter": {...}} → 상위 k개 결과
+  (filter: doc_id / block_type / source / pages, FAISS IDSelector 사전 필터링)
+- GET /stats → 지연시간 백분위(p50/p90/p99), 요청 수, 평균 배치 크기
+- GET /health
+- vector_sink.faiss.hybrid.enabled: 벡터 top-k + BM25 어휘 top-k를 RRF로 결합 (score = RRF 점수)
+- 동시 질의는 MicroBatcher로 모아 encode 1회 + index.search 1회로 처리
+- search_server.cache: 같은 질의(정규화 텍스트) 또는 임베딩이 가까운 질의의 결과를 재사용 (LRU,
+  인덱스 버전이 바뀌면 비움, pipeline/query_cache.py)
+- 다른 프로세스(인제스트/삭제/병합)가 커밋하면 요청마다 manifest stat으로 감지해 인덱스를 다시 열고
+  (sink.refresh) 캐시도 그 버전 기준으로 비워짐
+- remote_search(): scripts/search.py, faiss_search.py 의 --server 클라이언트
+"""
+import json
+import threading
+import time
+import urllib.request
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from pipeline.lexical import hybrid_search
+from pipeline.microbatch import MicroBatcher
+from pipeline.query_cache import QueryCache, cached_search, from_config, index_version
+
+
+class LatencyStats:
+    """최근 N개 요청의 지연시간(ms) 백분위"""
+
+    def __init__(self, window: int = 10000):
+        self.samples: deque = deque(maxlen=window)
+        self.count = 0
+        self.errors = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def add(self, ms: float):
+        with self._lock:
+            self.samples.append(ms)
+            self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            xs = sorted(self.samples)
+            count, errors = self.count, self.errors
+
+        def pct(p: float) -> Optional[float]:
+            if not xs:
+                return None
+            return round(xs[min(len(xs) - 1, int(p / 100.0 * len(xs)))], 3)
+
+        return {
+            "count": count,
+            "errors": errors,
+            "window": len(xs),
+            "p50_ms": pct(50),
+            "p90_ms": pct(90),
+            "p99_ms": pct(99),
+            "max_ms": round(xs[-1], 3) if xs else None,
+            "mean_ms": round(sum(xs) / len(xs), 3) if xs else None,
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+
+def make_hits(D, I, items, text: bool = True) -> List[Dict[str, Any]]:
+    """한 질의의 (D, I) 행과 get_items 결과 → 검색 결과 dict 목록 (없는 행은 건너뜀)"""
+    out: List[Dict[str, Any]] = []
+    for rank, (idx, score, it) in enumerate(zip(I, D, items), start=1):
+        if it is None:
+            continue
+        meta = it.get("meta", {})
+        hit = {
+            "rank": rank,
+            "score": float(score),
+            "faiss_id": int(idx),
+            "doc_id": meta.get("doc_id"),
+            "id": it.get("id"),
+            "chunk_id": it.get("chunk_id"),
+            "pages": meta.get("pages"),
+            "heading_path": meta.get("heading_path"),
+        }
+        if text:
+            hit["text"] = it.get("text", "")
+        out.append(hit)
+    return out
+
+
+class SearchService:
+    """get_embedder + FaissVectorSink.search 를 프로세스 안에 상주시킴"""
+
+    def __init__(self, cfg: Dict[str, Any]):
+        from pipeline.embedder import get_embedder
+        from pipeline.vector_sink import open_vector_sink
+
+        t0 = time.perf_counter()
+        self.cfg = cfg
+        self.embedder = get_embedder(cfg["embedder"])
+        # 검색 전용 mmap 로드: 여러 워커가 같은 인덱스 페이지를 공유
+        # (vector_sink.type: json 이면 faiss 없이 numpy 검색)
+        self.sink = open_vector_sink(cfg["vector_sink"], readonly=True)
+        if self.sink.ntotal == 0:
+            path = getattr(self.sink, "index_path", None) or self.sink.path
+            raise RuntimeError(f"벡터 인덱스가 존재하지 않습니다: {path}")
+        # 벡터 + BM25 어휘 검색 RRF 결합 (FAISS 저장소만 어휘 색인 보유)
+        self.hybrid_cfg = (cfg["vector_sink"].get("faiss") or {}).get("hybrid") or {}
+        self.hybrid = self.hybrid_cfg.get("enabled", True) and hasattr(self.sink, "lexical_search")
+        self.mode = "hybrid" if self.hybrid else "dense"
+        self.stats = LatencyStats()
+        self._embed_lock = threading.Lock()
+        scfg = cfg.get("search_server") or {}
+        self.cache: Optional[QueryCache] = from_config(scfg.get("cache"))
+        bcfg = scfg.get("batching") or {}
+        self.batcher: Optional[MicroBatcher] = None
+        if bcfg.get("enabled", True):
+            self.batcher = MicroBatcher(
+                self._search_batch,
+                max_batch=bcfg.get("max_batch", 32),
+                max_wait_ms=bcfg.get("max_wait_ms", 2.0),
+            )
+        self.load_s = time.perf_counter() - t0
+
+    def hits(self, D, I, k: int) -> List[Dict[str, Any]]:
+        return make_hits(D[:k], I[:k], self.sink.get_items(I[:k]))  # k개 행만 조회
+
+    def _search_batch(
+        self, reqs: List[Tuple[str, int]], filter: Optional[Dict[str, Any]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        """여러 질의를 encode 1회 + index.search 1회로 처리 (k는 최댓값으로 검색 후 자름)
+
+        캐시에 임베딩이 가까운 질의가 있으면 그 결과를 쓰고 나머지 질의만 검색한다.
+        배치 스레드와 필터 질의(요청 스레드) 모두 이 경로를 타므로 _embed_lock으로 직렬화
+        (임베더 encode는 동시 호출에 안전하지 않음)
+        """
+        with self._embed_lock:
+            return self._search_batch_locked(reqs, filter)
+
+    def _search_batch_locked(
+        self, reqs: List[Tuple[str, int]], filter: Optional[Dict[str, Any]]
+    ) -> List[List[Dict[str, Any]]]:
+        qv = self.embedder.encode([q for q, _ in reqs])
+        keys = [QueryCache.key(q, k, filter, self.mode) for q, k in reqs]
+
+        def run(idx: List[int]) -> List[List[Dict[str, Any]]]:
+            sub = [reqs[i] for i in idx]
+            kmax = max(k for _, k in sub)
+            if self.hybrid:
+                D, I = hybrid_search(self.sink, qv[idx], [q for q, _ in sub], kmax, filter, self.hybrid_cfg)
+            elif filter:
+                D, I = self.sink.search(qv[idx], k=kmax, filter=filter)
+            else:
+                D, I = self.sink.search(qv[idx], k=kmax)
+            return [self.hits(D[i], I[i], k) for i, (_, k) in enumerate(sub)]
+
+        return cached_search(self.cache, self.sink, keys, qv, run)
+
+    def _sync_index(self):
+        """다른 프로세스가 커밋한 인덱스 반영 (stat만 하고, 바뀌었을 때만 검색을 멈추고 다시 엶)"""
+        stale = getattr(self.sink, "stale", None)
+        if stale is not None and stale():
+            with self._embed_lock:
+                self.sink.refresh()
+
+    def search(self, query: str, k: int = 5, filter: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        t0 = time.perf_counter()
+        self._sync_index()
+        res = None
+        if self.cache is not None:
+            # 정규화한 질의가 같으면 임베딩/검색 없이 바로 반환
+            res = self.cache.get(QueryCache.key(query, k, filter, self.mode), index_version(self.sink))
+        if res is None:
+            if self.batcher is not None and not filter:
+                res = self.batcher((query, k))
+            else:
+                # 필터가 있는 질의는 배치에 섞지 않고 단독 처리
+                res = self._search_batch([(query, k)], filter)[0]
+        ms = (time.perf_counter() - t0) * 1000.0
+        self.stats.add(ms)
+        out = {"query": query, "k": k, "took_ms": round(ms, 3), "hits": res}
+        if filter:
+            out["filter"] = filter
+        return out
+
+    def close(self):
+        """배치 스레드 종료 후 임베더(캐시 저장)/인덱스 정리"""
+        if self.batcher is not None:
+            self.batcher.close()
+        self.embedder.close()
+        self.sink.close()
+
+
+def make_handler(service: SearchService):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body: Dict[str, Any]):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, fmt, *a):  # 요청 로그 생략 (지연은 /stats)
+            pass
+
+        def do_GET(self):
+            if self.path == "/stats":
+                snap = service.stats.snapshot()
+                if service.batcher is not None:
+                    snap["batches"] = service.batcher.batches
+                    snap["mean_batch"] = round(service.batcher.mean_batch, 2)
+                if service.cache is not None:
+                    snap["cache"] = service.cache.stats()
+                return self._send(200, snap)
+            if self.path == "/health":
+                return self._send(200, {"ok": True, "ntotal": service.sink.ntotal})
+            self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self.path != "/search":
+                return self._send(404, {"error": "not found"})
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                query = body["query"]
+                k = int(body.get("k", 5))
+                flt = body.get("filter") or None
+                if flt is not None and not isinstance(flt, dict):
+                    raise ValueError("filter must be an object")
+            except Exception as e:  # pylint: disable=broad-except
+                return self._send(400, {"error": f"bad request: {e}"})
+            try:
+                self._send(200, service.search(query, k, flt))
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+            except Exception as e:  # pylint: disable=broad-except
+                service.stats.errors += 1
+                self._send(500, {"error": str(e)})
+
+    return Handler
+
+
+def serve(cfg: Dict[str, Any], host: str = "127.0.0.1", port: int = 8765) -> ThreadingHTTPServer:
+    service = SearchService(cfg)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    server.service = service  # type: ignore[attr-defined]
+    print(
+        f"[INFO] 검색 서버 준비 완료 ({service.load_s:.2f}s, ntotal={service.sink.ntotal}): "
+        f"http://{host}:{port}"
+    )
+    return server
+
+
+def remote_search(
+    url: str, query: str, k: int = 5, timeout: float = 30.0, filter: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """검색 서버에 질의 (stdlib만 사용하므로 클라이언트는 모델/인덱스를 로드하지 않음)"""
+    body: Dict[str, Any] = {"query": query, "k": k}
+    if filter:
+        body["filter"] = filter
+    req = urllib.request.Request(
+        url.rstrip("/") + "/search",
+        data=json.dumps(body, ensure_ascii=False).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode("utf-8"))
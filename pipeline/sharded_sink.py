@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+"""
+샤딩된 FAISS 벡터 저장소
+- 벡터를 여러 인덱스(샤드)에 나눠 저장: 샤드마다 독립된 FaissVectorSink(세그먼트 + 메타 DB)
+- 문서(doc_id) 단위로 배치: 이미 있는 문서는 그 샤드에서 교체, 새 문서는 정책대로
+  - hash: crc32(doc_id) % 샤드 수
+  - size: 마지막 샤드가 max_rows를 넘으면 새 샤드를 추가해 채움
+- 전역 FAISS id = 샤드 번호 << SHARD_SHIFT | 샤드 내 id (샤드 0은 단일 인덱스와 id가 같음)
+- 검색은 샤드별 스레드로 병렬 실행 후 전역 top-k 병합 (L2 오름차순 / IP 내림차순)
+- 샤드 목록은 <index_path>.shards.json (임시 파일 → os.replace). 샤드 0은 기존 index_path 그대로라
+  단일 인덱스에 샤드를 추가해도 기존 벡터를 다시 만들 필요가 없다.
+"""
+import copy
+import os
+import threading
+import zlib
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from pipeline.faiss_store import atomic_write_json, merge_topk
+from pipeline.vector_sink import FaissVectorSink
+
+# 샤드 내 id는 doc_key(최대 2^32) << 24 로 56비트 이내. 샤드는 최대 127개
+SHARD_SHIFT = 56
+_LOCAL_MASK = (1 << SHARD_SHIFT) - 1
+
+
+def shards_path(index_path: str) -> str:
+    return index_path + ".shards.json"
+
+
+def is_sharded(cfg: Dict) -> bool:
+    """설정에서 샤딩을 켰거나 이미 샤드 목록 파일이 있으면 True"""
+    index_path = cfg.get("index_path", "./data/index.faiss")
+    return bool((cfg.get("shards") or {}).get("enabled")) or os.path.exists(shards_path(index_path))
+
+
+class ShardedFaissSink:
+    """FaissVectorSink와 같은 인터페이스의 샤딩 저장소 (id는 전역 FAISS id)"""
+
+    def __init__(self, cfg: Dict, readonly: bool = False):
+        self.cfg = cfg
+        self.readonly = readonly
+        self.index_path = cfg.get("index_path", "./data/index.faiss")
+        self.path = shards_path(self.index_path)
+        scfg = cfg.get("shards") or {}
+        self.search_threads = int(scfg.get("search_threads", 0))
+        self._lock = threading.RLock()
+        self._executor = None
+
+        if os.path.exists(self.path):
+            import json
+
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.layout = json.load(f)
+        else:
+            self.layout = {
+                "format": 1,
+                "policy": (scfg.get("policy") or "hash").lower(),
+                "max_rows": int(scfg.get("max_rows", 2_000_000)),
+                "shards": [],
+            }
+        if self.layout["policy"] not in ("hash", "size"):
+            raise ValueError(f"Unknown shard policy: {self.layout['policy']}")
+        self.shards: List[FaissVectorSink] = [self._open(s) for s in self.layout["shards"]]
+        self._stamp = self._layout_stamp()
+        if not self.shards and readonly:
+            # 샤드 목록이 아직 없는 단일 인덱스: 샤드 0(= index_path)으로 읽음 (목록 파일은 쓰지 않음)
+            self.shards = [self._open({"id": 0, "index": os.path.basename(self.index_path)})]
+        elif not self.shards:
+            # size 정책은 샤드 1개로 시작해 필요할 때 추가
+            n = 1 if self.layout["policy"] == "size" else max(1, int(scfg.get("count", 2)))
+            for _ in range(n):
+                self.add_shard()
+
+    # --- 샤드 관리 ---
+    def _shard_cfg(self, entry: Dict) -> Dict:
+        cfg = {k: v for k, v in self.cfg.items() if k not in ("shards", "meta_path")}
+        cfg["index_path"] = os.path.join(os.path.dirname(self.index_path) or ".", entry["index"])
+        if entry["id"] == 0:
+            cfg["index_path"] = self.index_path
+            if "meta_path" in self.cfg:
+                cfg["meta_path"] = self.cfg["meta_path"]
+        elif (cfg.get("segments") or {}).get("dir"):
+            # segments.dir 지정은 샤드 0에만 적용 (나머지는 <샤드 경로>.segments)
+            cfg["segments"] = {k: v for k, v in cfg["segments"].items() if k != "dir"}
+        return cfg
+
+    def _open(self, entry: Dict) -> FaissVectorSink:
+        return FaissVectorSink(self._shard_cfg(entry), readonly=self.readonly)
+
+    def _save_layout(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        atomic_write_json(self.path, self.layout)
+
+    def add_shard(self) -> int:
+        """빈 샤드 추가 (기존 샤드는 그대로). 새 샤드 번호 반환"""
+        if self.readonly:
+            raise RuntimeError("읽기 전용(mmap)으로 연 FAISS 저장소에는 쓸 수 없습니다")
+        with self._lock:
+            sid = len(self.layout["shards"])
+            if sid >= 1 << (63 - SHARD_SHIFT):
+                raise ValueError(f"샤드 수 상한 초과: {sid}")
+            base = os.path.basename(self.index_path)
+            entry = {"id": sid, "index": base if sid == 0 else f"{base}.shard-{sid:03d}"}
+            layout = copy.deepcopy(self.layout)
+            layout["shards"].append(entry)
+            self.shards.append(self._open(entry))
+            self.layout = layout
+            self._save_layout()
+            self._stamp = self._layout_stamp()
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+        print(f"[INFO] 샤드 추가: #{sid} ({entry['index']})")
+        return sid
+
+    def _layout_stamp(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def stale(self) -> bool:
+        """다른 프로세스가 샤드를 추가했거나 어느 샤드든 manifest를 커밋했는지 (stat만)"""
+        return self._layout_stamp() != self._stamp or any(sh.stale() for sh in self.shards)
+
+    def refresh(self) -> bool:
+        """다른 프로세스의 샤드 추가/커밋 반영 (FaissVectorSink.refresh). 변경 여부 반환"""
+        changed = False
+        with self._lock:
+            stamp = self._layout_stamp()
+            if stamp != self._stamp:
+                import json
+
+                self._stamp = stamp
+                with open(self.path, "r", encoding="utf-8") as f:
+                    layout = json.load(f)
+                added = layout["shards"][len(self.shards) :]
+                if added:
+                    self.shards.extend(self._open(s) for s in added)
+                    if self._executor is not None:
+                        self._executor.shutdown()
+                        self._executor = None
+                    print(f"[INFO] 샤드 추가 반영: {len(added)}개 (총 {len(self.shards)})")
+                    changed = True
+                self.layout = layout
+            for sh in self.shards:
+                changed = sh.refresh() or changed
+        return changed
+
+    # --- id 변환 ---
+    @staticmethod
+    def to_global(sid: int, local) -> Any:
+        return (sid << SHARD_SHIFT) | local
+
+    @staticmethod
+    def split_id(fid: int):
+        return fid >> SHARD_SHIFT, fid & _LOCAL_MASK
+
+    def _globalize(self, sid: int, I):
+        import numpy as np
+
+        if sid == 0:
+            return I
+        return np.where(I >= 0, I | np.int64(sid << SHARD_SHIFT), I)
+
+    # --- 배치 ---
+    def _find_doc(self, doc_id: str) -> Optional[int]:
+        for sid, sh in enumerate(self.shards):
+            if sh.items is not None and sh.items.doc_key(doc_id) is not None:
+                return sid
+        return None
+
+    def _route(self, doc_id: str, n: int, fill: Dict[str, int], reuse: bool = True) -> int:
+        if reuse:
+            sid = self._find_doc(doc_id)
+            if sid is not None:
+                return sid
+        if self.layout["policy"] == "hash":
+            return zlib.crc32(doc_id.encode("utf-8")) % len(self.shards)
+        # size: 현재 샤드가 차면 다음 샤드로 (없으면 추가). 문서 하나는 쪼개지 않는다
+        if fill["rows"] and fill["rows"] + n > self.layout["max_rows"]:
+            fill["shard"] += 1
+            fill["rows"] = 0
+            if fill["shard"] >= len(self.shards):
+                self.add_shard()
+        fill["rows"] += n
+        return fill["shard"]
+
+    def _partition(
+        self,
+        chunks: List[Dict],
+        fresh: bool = False,
+        fill: Optional[Dict[str, int]] = None,
+        placed: Optional[Dict[str, int]] = None,
+    ) -> Dict[int, List[int]]:
+        """청크 위치를 샤드별로 묶음 (문서 단위). fresh: 전체 교체용 (기존 배치 무시, 샤드 0부터 채움)
+
+        fill/placed: 블록 단위 전체 교체에서 블록 사이에 이어 쓰는 채움 상태와 문서 → 샤드 배치
+        """
+        docs: Dict[str, List[int]] = {}
+        for i, c in enumerate(chunks):
+            docs.setdefault(c.get("meta", {}).get("doc_id", "unknown"), []).append(i)
+        if fill is None:
+            last = len(self.shards) - 1
+            fill = {"shard": 0, "rows": 0} if fresh else {"shard": last, "rows": self.shards[last].ntotal}
+        parts: Dict[int, List[int]] = {}
+        for doc_id, pos in docs.items():
+            sid = placed.get(doc_id) if placed is not None else None
+            if sid is None:
+                sid = self._route(doc_id, len(pos), fill, reuse=not fresh)
+                if placed is not None:
+                    placed[doc_id] = sid
+            elif sid == fill["shard"]:
+                # 앞 블록에서 배치한 문서의 나머지 청크: 같은 샤드에 이어 붙이고 채움에 반영
+                fill["rows"] += len(pos)
+            parts.setdefault(sid, []).extend(pos)
+        return parts
+
+    # --- 쓰기 ---
+    def upsert(self, chunks: List[Dict], vectors, model_id: Optional[str] = None) -> List[int]:
+        import numpy as np
+
+        if len(vectors) == 0:
+            return []
+        vecs = np.asarray(vectors, dtype="float32")
+        ids = np.empty(len(chunks), dtype="int64")
+        with self._lock:
+            for sid, pos in self._partition(chunks).items():
+                local = self.shards[sid].upsert([chunks[i] for i in pos], vecs[pos], model_id)
+                ids[pos] = self._globalize(sid, np.asarray(local, dtype="int64"))
+        return ids.tolist()
+
+    def replace_all(self, chunks: List[Dict], vectors, model_id: Optional[str] = None) -> List[int]:
+        """전체 교체 (reindex용). 샤드마다 manifest 교체로 전환, 배정되지 않은 샤드는 비움"""
+        with self.replacing(model_id) as add:
+            ids = add(chunks, vectors)
+        return ids
+
+    @contextmanager
+    def replacing(self, model_id: Optional[str] = None) -> Iterator[Callable[[List[Dict], Any], List[int]]]:
+        """블록 단위 전체 교체 (FaissVectorSink.replacing). 샤드는 처음 배정될 때 교체를 시작하고,
+        끝날 때 배정되지 않은 샤드도 비운다"""
+        import numpy as np
+
+        fill = {"shard": 0, "rows": 0}
+        placed: Dict[str, int] = {}
+        adders: Dict[int, Callable] = {}
+        with self._lock, ExitStack() as stack:
+
+            def shard_add(sid: int) -> Callable:
+                if sid not in adders:
+                    adders[sid] = stack.enter_context(self.shards[sid].replacing(model_id))
+                return adders[sid]
+
+            def add(chunks: List[Dict], vectors) -> List[int]:
+                vecs = np.asarray(vectors, dtype="float32")
+                ids = np.empty(len(chunks), dtype="int64")
+                for sid, pos in self._partition(chunks, fresh=True, fill=fill, placed=placed).items():
+                    local = shard_add(sid)([chunks[i] for i in pos], vecs[pos])
+                    ids[pos] = self._globalize(sid, np.asarray(local, dtype="int64"))
+                return ids.tolist()
+
+            yield add
+            for sid in range(len(self.shards)):
+                shard_add(sid)
+
+    def delete_document(self, doc_id: str) -> int:
+        with self._lock:
+            sid = self._find_doc(doc_id)
+            return self.shards[sid].delete_document(doc_id) if sid is not None else 0
+
+    def merge_pages(self, row_pages: Dict[int, List[int]]):
+        by_shard: Dict[int, Dict[int, List[int]]] = {}
+        for fid, pages in row_pages.items():
+            sid, local = self.split_id(int(fid))
+            by_shard.setdefault(sid, {})[local] = pages
+        for sid, rp in by_shard.items():
+            self.shards[sid].merge_pages(rp)
+
+    def compact(self) -> int:
+        return sum(sh.compact() for sh in self.shards)
+
+    def convert(self, index_cfg: Dict) -> Dict:
+        info: Dict = {}
+        for sh in self.shards:
+            if sh.ntotal:
+                info = sh.convert(index_cfg)
+        return info
+
+    def set_search_params(self, **params):
+        for sh in self.shards:
+            sh.set_search_params(**params)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for sh in self.shards:
+            sh.close()
+
+    # --- 읽기 ---
+    @property
+    def ntotal(self) -> int:
+        return sum(sh.ntotal for sh in self.shards)
+
+    def count(self) -> int:
+        return self.ntotal
+
+    @property
+    def version(self):
+        """샤드별 버전 묶음 (샤드 추가/어느 샤드든 쓰기가 있으면 바뀜)"""
+        return tuple(sh.version for sh in self.shards)
+
+    def _first(self) -> FaissVectorSink:
+        """차원/메트릭 등 공통 속성을 읽을 샤드 (벡터가 있는 첫 샤드)"""
+        if not self.shards:
+            raise RuntimeError(f"샤드가 없습니다: {self.path}")
+        return next((sh for sh in self.shards if sh.ntotal), self.shards[0])
+
+    @property
+    def meta(self) -> Dict:
+        return self._first().meta
+
+    @property
+    def metric(self) -> str:
+        return self._first().metric
+
+    @property
+    def search_params(self) -> Dict:
+        return self._first().search_params
+
+    @property
+    def index_spec(self) -> str:
+        return self._first().index_spec
+
+    @property
+    def model_id(self) -> Optional[str]:
+        return self._first().model_id
+
+    @property
+    def is_reduced(self) -> bool:
+        return any(sh.is_reduced for sh in self.shards)
+
+    @property
+    def is_lossy(self) -> bool:
+        return any(sh.is_lossy for sh in self.shards)
+
+    def documents(self) -> List[Dict]:
+        out = []
+        for sid, sh in enumerate(self.shards):
+            out.extend({**d, "shard": sid} for d in sh.documents())
+        return out
+
+    def document_ids(self, doc_id: str) -> List[int]:
+        sid = self._find_doc(doc_id)
+        if sid is None:
+            return []
+        return [self.to_global(sid, i) for i in self.shards[sid].document_ids(doc_id)]
+
+    def all_ids(self):
+        import numpy as np
+
+        parts = [self._globalize(sid, sh.all_ids()) for sid, sh in enumerate(self.shards)]
+        return np.concatenate(parts) if parts else np.zeros(0, dtype="int64")
+
+    def get_items(self, ids) -> List[Optional[Dict]]:
+        ids = [int(i) for i in ids]
+        out: List[Optional[Dict]] = [None] * len(ids)
+        by_shard: Dict[int, List[int]] = {}
+        for pos, fid in enumerate(ids):
+            if fid >= 0:
+                by_shard.setdefault(fid >> SHARD_SHIFT, []).append(pos)
+        for sid, pos in by_shard.items():
+            if sid >= len(self.shards):
+                continue
+            items = self.shards[sid].get_items([ids[p] & _LOCAL_MASK for p in pos])
+            for p, it in zip(pos, items):
+                if it is not None:
+                    it["faiss_id"] = ids[p]
+                out[p] = it
+        return out
+
+    def iter_items(self, batch: int = 2000):
+        for sid, sh in enumerate(self.shards):
+            for it in sh.iter_items(batch):
+                it["faiss_id"] = self.to_global(sid, it["faiss_id"])
+                yield it
+
+    def reconstruct(self, fid: int):
+        sid, local = self.split_id(int(fid))
+        return self.shards[sid].reconstruct(local)
+
+    def reconstruct_n(self, start: int = 0, n: Optional[int] = None):
+        """샤드 순서로 이어 붙인 벡터 중 [start, start+n) (id 무관)"""
+        import numpy as np
+
+        stop = self.ntotal if n is None else min(self.ntotal, start + n)
+        parts = []
+        base = 0
+        for sh in self.shards:
+            lo, hi = max(start, base), min(stop, base + sh.ntotal)
+            if lo < hi:
+                parts.append(sh.reconstruct_n(lo - base, hi - lo))
+            base += sh.ntotal
+        if not parts:
+            return np.zeros((0, self.meta.get("dim") or 0), dtype="float32")
+        return np.vstack(parts)
+
+    def lexical_search(self, query: str, k: int = 5, filter: Optional[Dict] = None):
+        """샤드별 BM25 상위 k를 순위로 병합 (RRF, 점수 = RRF 점수)
+
+        BM25 점수는 샤드마다 자기 통계(IDF/평균 길이)로 계산되어 샤드 사이에 비교할 수 없으므로
+        원점수 대신 샤드 안의 순위만 쓴다 (각 샤드의 1위들 → 2위들 → ... 순서).
+        """
+        from pipeline.lexical import rrf_fuse
+
+        rankings = []
+        for sid, sh in enumerate(self.shards):
+            ids, _ = sh.lexical_search(query, k, filter)
+            rankings.append([self.to_global(sid, i) for i in ids])
+        return rrf_fuse(rankings, k)
+
+    def _search_shard(self, sid: int, q, k: int, filter=None):
+        D, I = self.shards[sid].search(q, k, filter=filter)
+        return D, self._globalize(sid, I)
+
+    def search(self, vectors, k: int = 5, filter: Optional[Dict] = None):
+        """샤드별 병렬 검색 후 전역 top-k 병합 (I는 전역 FAISS id, filter는 샤드마다 적용)"""
+        import numpy as np
+
+        live = [sid for sid, sh in enumerate(self.shards) if sh.ntotal]
+        if not live:
+            raise RuntimeError("FAISS 인덱스가 존재하지 않습니다")
+        q = np.ascontiguousarray(vectors, dtype="float32")
+        if len(live) == 1:
+            return self._search_shard(live[0], q, k, filter)
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            n = self.search_threads or min(len(self.shards), os.cpu_count() or 1)
+            self._executor = ThreadPoolExecutor(max_workers=n, thread_name_prefix="faiss-shard")
+        res = list(self._executor.map(lambda sid: self._search_shard(sid, q, k, filter), live))
+        return merge_topk([d for d, _ in res], [i for _, i in res], k, self.metric)
@@ -1,80 +1,519 @@
 # -*- coding: utf-8 -*-
 """
 벡터 저장소(Vector Sink)
-- JSON 파일 : 의존성 없이 간단히 확인 가능
-- FAISS : CPU 기반 벡터 검색 지원
+- Milvus : pymilvus MilvusClient (서버 또는 Milvus Lite 파일), 배치 insert + 종료 시 flush 1회
+- JSON : faiss 없이 쓰는 대체 경로 (float32 블록 파일 + JSONL, numpy 블록 행렬곱 검색)
+- FAISS : CPU 기반 벡터 검색 지원 (선택적 차원 축소: PCA / Matryoshka 절단)
+  append-only 세그먼트 + manifest 원자 교체 (pipeline/faiss_store.py)
+  청크 텍스트/메타는 FAISS id 키 SQLite (pipeline/meta_store.py)
+  문서(doc_id) 단위 교체/삭제: FAISS id = doc_key << 24 | 청크 순번
 """
 
 import os
+import copy
 import json
+import time
 import hashlib
-from typing import List, Dict, Sequence
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, List, Dict, Optional
+
+from pipeline.faiss_store import SegmentStore, empty_manifest, merge_topk
+from pipeline.meta_store import MetaStore, doc_range, make_ids
 
 
 class JSONVectorSink:
-    """JSON 파일에 벡터를 저장"""
+    """faiss 없이 쓰는 경량 벡터 저장소 (numpy만 필요)
+
+    - <path>        : 헤더 JSON (dim, metric, count, 파일 크기, 페이지 병합 patches)
+    - <path>.f32    : float32 행렬을 업서트마다 블록으로 이어 붙인 raw 파일 (memmap으로 검색)
+    - <path>.jsonl  : 행 순서대로 청크 텍스트/메타 한 줄씩, <path>.offsets : 행별 시작 바이트(int64)
+    업서트는 세 파일에 덧붙인 뒤 헤더를 임시 파일 → os.replace 로 교체해 커밋한다.
+    헤더의 count/크기 뒤에 남은 꼬리(중단된 업서트)는 다음 업서트에서 잘라낸다.
+    검색: block_rows 행씩 memmap을 읽어 행렬곱 → 블록별 top-k → 전역 top-k 병합 (I = 행 번호)
+    """
 
-    def __init__(self, path: str = "./data/index.json"):
+    def __init__(self, path: str = "./data/index.json", metric: str = "L2", block_rows: int = 65536):
         self.path = path
-        os.makedirs(os.path.dirname(self.path), exist_ok=True)
-        if not os.path.exists(self.path):
-            with open(self.path, "w", encoding="utf-8") as f:
-                json.dump({"meta": "rag-index", "items": []}, f, ensure_ascii=False, indent=2)
+        self.block_rows = int(block_rows)
+        self.vec_path = path + ".f32"
+        self.items_path = path + ".jsonl"
+        self.offsets_path = path + ".offsets"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._mm = None
+        self._offsets = None
+        self.header = self._load()
+        self.metric = (self.header.get("metric") or metric or "L2").upper()
+        if self.header.get("items") is not None:
+            self._migrate(self.header.pop("items"))
+        elif not os.path.exists(self.path):
+            self._save(self.header)
 
-    def _load(self):
+    @staticmethod
+    def _empty() -> Dict[str, Any]:
+        return {"meta": "rag-index", "format": 2, "dim": None, "metric": None, "count": 0, "items_bytes": 0, "patches": {}, "version": 0}
+
+    def _load(self) -> Dict[str, Any]:
         if not os.path.exists(self.path):
-            return {"meta": "rag-index", "items": []}
+            return self._empty()
         with open(self.path, "r", encoding="utf-8") as f:
             try:
-                return json.load(f)
+                data = json.load(f)
             except json.JSONDecodeError:
-                return {"meta": "rag-index", "items": []}
+                print(f"[WARN] 벡터 저장소 헤더를 읽을 수 없어 새로 시작합니다: {self.path}")
+                return self._empty()
+        return {**self._empty(), **data}
+
+    def _save(self, header: Dict[str, Any]):
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(header, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+
+    def _migrate(self, items: List[Dict]):
+        """벡터를 JSON 숫자로 담던 이전 index.json → 바이너리 블록 + JSONL (최초 1회)"""
+        import numpy as np
+
+        t0 = time.perf_counter()
+        vecs = np.asarray([it.pop("vector") for it in items], dtype="float32")
+        self.header = self._empty()
+        if len(items):
+            self._append(items, vecs.reshape(len(items), -1))
+        else:
+            self._save(self.header)
+        print(f"[INFO] index.json → 바이너리 벡터 + JSONL 이전: {len(items)} rows ({time.perf_counter() - t0:.2f}s)")
+
+    def _append(self, items: List[Dict], vecs, model_id: Optional[str] = None) -> List[int]:
+        import numpy as np
+
+        h = copy.deepcopy(self.header)
+        if model_id:
+            h["model_id"] = model_id
+        n, dim = vecs.shape
+        if h["dim"] is None:
+            h["dim"], h["metric"] = int(dim), self.metric
+        elif h["dim"] != dim:
+            raise ValueError(f"벡터 차원 불일치: 저장소 {h['dim']} vs 입력 {dim}")
+        start = h["count"]
+        # 커밋되지 않은 꼬리를 잘라낸 뒤 덧붙임
+        lines = [json.dumps(it, ensure_ascii=False).encode("utf-8") + b"\n" for it in items]
+        sizes = np.array([len(ln) for ln in lines], dtype="int64")
+        offsets = h["items_bytes"] + np.cumsum(sizes) - sizes
+        for path, size, data in (
+            (self.vec_path, start * dim * 4, vecs.tobytes()),
+            (self.offsets_path, start * 8, offsets.tobytes()),
+            (self.items_path, h["items_bytes"], b"".join(lines)),
+        ):
+            with open(path, "ab") as f:
+                f.truncate(size)
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        h["count"] = start + n
+        h["items_bytes"] += int(sizes.sum())
+        h["version"] += 1
+        self._save(h)
+        self.header = h
+        self._mm = self._offsets = None
+        return list(range(start, start + n))
+
+    def upsert(self, chunks: List[Dict], vectors, model_id: Optional[str] = None) -> List[int]:
+        """vectors: (n, dim) float32 행렬 (또는 행 벡터 시퀀스). 반환: 추가된 행 번호
 
-    def _save(self, data):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        model_id: 벡터를 만든 임베더 (헤더에 기록, reindex 벡터 재사용 판단용)
+        """
+        import numpy as np
 
-    def upsert(self, chunks: List[Dict], vectors: List[Sequence[float]]):
-        data = self._load()
-        items = data.get("items", [])
-        for c, v in zip(chunks, vectors):
-            vec = v.tolist() if hasattr(v, "tolist") else list(v)
+        items = []
+        for c in chunks:
             doc_id = c.get("meta", {}).get("doc_id", "unknown")
             key_src = f"{doc_id}-{c.get('id')}"
             uid = hashlib.md5(key_src.encode("utf-8")).hexdigest()
-            items.append(
+            items.append({"id": uid, "chunk_id": c.get("id"), "text": c.get("text"), "meta": c.get("meta", {})})
+        if not items:
+            return []
+        vecs = np.ascontiguousarray(np.asarray(vectors, dtype="float32").reshape(len(items), -1))
+        return self._append(items, vecs, model_id)
+
+    @property
+    def ntotal(self) -> int:
+        return int(self.header["count"])
+
+    @property
+    def version(self) -> int:
+        """업서트/페이지 병합마다 증가 (검색 결과 캐시 무효화 기준)"""
+        return int(self.header["version"])
+
+    @property
+    def model_id(self) -> Optional[str]:
+        return self.header.get("model_id")
+
+    def count(self) -> int:
+        return self.ntotal
+
+    def merge_pages(self, row_pages: Dict[int, List[int]]):
+        """근사 중복으로 합쳐진 청크의 페이지를 헤더 patches에 기록 (조회 시 meta.pages에 병합)"""
+        if not row_pages:
+            return
+        h = copy.deepcopy(self.header)
+        for row, pages in row_pages.items():
+            if 0 <= row < h["count"]:
+                old = h["patches"].get(str(row), [])
+                h["patches"][str(row)] = sorted(set(old) | set(pages))
+        h["version"] += 1
+        self._save(h)
+        self.header = h
+
+    def _matrix(self):
+        """(count, dim) float32 읽기 전용 memmap"""
+        import numpy as np
+
+        if self._mm is None and self.ntotal:
+            shape = (self.ntotal, self.header["dim"])
+            self._mm = np.memmap(self.vec_path, dtype="float32", mode="r", shape=shape)
+            self._offsets = np.memmap(self.offsets_path, dtype="int64", mode="r", shape=(self.ntotal,))
+        return self._mm
+
+    def get_items(self, rows) -> List[Optional[Dict]]:
+        """행 번호 목록 → 아이템(faiss_id=행 번호, id, chunk_id, text, meta) 목록. -1/범위 밖은 None"""
+        n = self.ntotal
+        if not n:
+            return [None] * len(rows)
+        self._matrix()
+        out: List[Optional[Dict]] = []
+        with open(self.items_path, "rb") as f:
+            for r in rows:
+                r = int(r)
+                if not 0 <= r < n:
+                    out.append(None)
+                    continue
+                f.seek(int(self._offsets[r]))
+                it = json.loads(f.readline())
+                pages = self.header["patches"].get(str(r))
+                if pages:
+                    meta = it.setdefault("meta", {})
+                    meta["pages"] = sorted(set(meta.get("pages", [])) | set(pages))
+                out.append({"faiss_id": r, **it})
+        return out
+
+    def iter_items(self):
+        for s in range(0, self.ntotal, 2000):
+            yield from self.get_items(range(s, min(s + 2000, self.ntotal)))
+
+    def reconstruct(self, row: int):
+        import numpy as np
+
+        return np.array(self._matrix()[int(row)])
+
+    def search(self, vectors, k: int = 5):
+        """블록 단위 numpy 행렬곱 전수 검색 → (D, I). L2는 제곱 거리 오름차순, IP는 내적 내림차순"""
+        import numpy as np
+
+        X = self._matrix()
+        if X is None:
+            raise RuntimeError(f"벡터 저장소가 비어 있습니다: {self.path}")
+        q = np.ascontiguousarray(vectors, dtype="float32").reshape(-1, X.shape[1])
+        ip = self.metric == "IP"
+        qn = None if ip else np.einsum("ij,ij->i", q, q)[:, None]
+        D = np.zeros((len(q), 0), dtype="float32")
+        I = np.zeros((len(q), 0), dtype="int64")
+        for s in range(0, len(X), self.block_rows):
+            xb = np.asarray(X[s : s + self.block_rows])
+            S = q @ xb.T
+            if not ip:
+                S = np.maximum(qn + np.einsum("ij,ij->i", xb, xb)[None, :] - 2.0 * S, 0.0)
+            kk = min(k, S.shape[1])
+            part = np.argpartition(-S if ip else S, kk - 1, axis=1)[:, :kk]
+            D = np.hstack([D, np.take_along_axis(S, part, axis=1)])
+            I = np.hstack([I, part + s])
+            if D.shape[1] > k:
+                D, I = merge_topk([D], [I], k, self.metric)
+        return merge_topk([D], [I], k, self.metric)
+
+    def close(self):
+        self._mm = self._offsets = None
+
+
+# 프로세스당 Milvus 클라이언트 하나를 (uri, token)별로 재사용
+_MILVUS_CLIENTS: Dict[Any, Any] = {}
+_MILVUS_LOCK = threading.Lock()
+
+# VARCHAR 필드 최대 바이트 수
+_MILVUS_VARCHAR = 65535
+
+
+def _milvus_client(uri: str, token: str = ""):
+    from pymilvus import MilvusClient  # type: ignore
+
+    with _MILVUS_LOCK:
+        client = _MILVUS_CLIENTS.get((uri, token))
+        if client is None:
+            client = MilvusClient(uri=uri, token=token) if token else MilvusClient(uri=uri)
+            _MILVUS_CLIENTS[(uri, token)] = client
+        return client
+
+
+def _milvus_id(uid: str) -> int:
+    """청크 uid(md5) → 양의 int64 기본 키 (같은 문서/청크를 다시 넣으면 같은 키)"""
+    return int(uid[:15], 16)
+
+
+def _clip_utf8(text: Optional[str], limit: int = _MILVUS_VARCHAR) -> str:
+    b = (text or "").encode("utf-8")
+    return b[:limit].decode("utf-8", "ignore") if len(b) > limit else (text or "")
+
+
+class MilvusVectorSink:
+    """Milvus 벡터 저장소 (pymilvus MilvusClient)
+
+    - uri 가 로컬 파일 경로(예: ./data/milvus.db)면 Milvus Lite, 없으면 http://host:port
+    - 컬렉션/인덱스는 첫 업서트 때 벡터 차원과 설정(metric_type, index)으로 생성
+    - 업서트는 batch_size 행씩 모아 insert 하고, flush 는 close() 때 한 번만 호출
+    - 기본 키 = 청크 uid(md5) 앞 60비트 → 같은 문서를 다시 넣으면 기존 행을 지우고 새로 넣는다
+    """
+
+    def __init__(self, cfg: Dict):
+        self.cfg = cfg
+        self.uri = cfg.get("uri") or f"http://{cfg.get('host', 'localhost')}:{cfg.get('port', 19530)}"
+        self.collection = cfg.get("collection", "docs")
+        self.metric_type = str(cfg.get("metric_type", "COSINE")).upper()
+        # merge_topk / 검색 결과 해석용 (COSINE/IP: 클수록 가까움)
+        self.metric = "L2" if self.metric_type == "L2" else "IP"
+        self.batch_size = int(cfg.get("batch_size", 1000))
+        self.search_params = dict(cfg.get("search_params") or {})
+        self.client = _milvus_client(self.uri, cfg.get("token", ""))
+        self._ready = self.client.has_collection(self.collection)
+        if self._ready:
+            self.client.load_collection(self.collection)
+        self._pending: List[Dict] = []
+        self._docs_seen: set = set()
+        self._dirty = False
+        # 이 프로세스에서 쓴 횟수 (검색 결과 캐시 무효화 기준, 다른 writer의 변경은 반영 안 됨)
+        self._writes = 0
+
+    def _create_collection(self, dim: int):
+        from pymilvus import DataType, MilvusClient  # type: ignore
+
+        schema = MilvusClient.create_schema(auto_id=False, enable_dynamic_field=False)
+        schema.add_field("pk", DataType.INT64, is_primary=True)
+        schema.add_field("vector", DataType.FLOAT_VECTOR, dim=dim)
+        schema.add_field("doc_id", DataType.VARCHAR, max_length=512)
+        schema.add_field("uid", DataType.VARCHAR, max_length=64)
+        schema.add_field("chunk_id", DataType.VARCHAR, max_length=512)
+        schema.add_field("text", DataType.VARCHAR, max_length=_MILVUS_VARCHAR)
+        schema.add_field("meta", DataType.JSON)
+
+        icfg = self.cfg.get("index") or {}
+        params = self.client.prepare_index_params()
+        params.add_index(
+            field_name="vector",
+            index_type=icfg.get("type", "AUTOINDEX"),
+            metric_type=self.metric_type,
+            params=dict(icfg.get("params") or {}),
+        )
+        try:
+            self.client.create_collection(self.collection, schema=schema, index_params=params)
+        except Exception as e:  # pylint: disable=broad-except
+            # Milvus Lite 등 일부 배포는 HNSW 등을 지원하지 않음 → AUTOINDEX
+            print(f"[WARN] Milvus 인덱스 {icfg.get('type')} 생성 실패 ({e}) → AUTOINDEX")
+            if self.client.has_collection(self.collection):
+                self.client.drop_collection(self.collection)
+            params = self.client.prepare_index_params()
+            params.add_index(field_name="vector", index_type="AUTOINDEX", metric_type=self.metric_type)
+            self.client.create_collection(self.collection, schema=schema, index_params=params)
+        self.client.load_collection(self.collection)
+        self._ready = True
+        print(f"[INFO] Milvus 컬렉션 생성: {self.collection} (dim={dim}, {self.metric_type}) @ {self.uri}")
+
+    @staticmethod
+    def _filter_in(field: str, values) -> str:
+        return f"{field} in {json.dumps(sorted(values), ensure_ascii=False)}"
+
+    def upsert(self, chunks: List[Dict], vectors, model_id: Optional[str] = None) -> List[int]:
+        """vectors: (n, dim) 행렬. 반환: 기본 키(pk) 목록. 문서(doc_id) 단위 교체
+
+        model_id 는 기록하지 않음 (다른 저장소와 같은 호출 형태를 위해 받기만 함)
+        """
+        if not chunks:
+            return []
+        # 행렬을 한 번에 리스트로 변환 (행별 tolist 호출 방지)
+        rows = vectors.tolist() if hasattr(vectors, "tolist") else [list(v) for v in vectors]
+        if not self._ready:
+            self._create_collection(len(rows[0]))
+
+        docs = {c.get("meta", {}).get("doc_id", "unknown") for c in chunks}
+        new_docs = docs - self._docs_seen
+        if new_docs:
+            # 이번 세션에서 처음 보는 문서의 기존 행 제거 (남은 버퍼는 먼저 보냄)
+            self._flush_pending()
+            self.client.delete(self.collection, filter=self._filter_in("doc_id", new_docs))
+            self._docs_seen |= new_docs
+
+        ids = []
+        for c, vec in zip(chunks, rows):
+            it = _faiss_item(c)
+            pk = _milvus_id(it["id"])
+            ids.append(pk)
+            self._pending.append(
                 {
-                    "id": uid,
-                    "chunk_id": c.get("id"),
-                    "text": c.get("text"),
+                    "pk": pk,
                     "vector": vec,
-                    "meta": c.get("meta", {}),
+                    "doc_id": it["meta"].get("doc_id", "unknown"),
+                    "uid": it["id"],
+                    "chunk_id": it.get("chunk_id") or "",
+                    "text": _clip_utf8(it.get("text")),
+                    "meta": it["meta"],
                 }
             )
-        data["items"] = items
-        self._save(data)
+            if len(self._pending) >= self.batch_size:
+                self._flush_pending()
+        self._writes += 1
+        return ids
 
+    def _flush_pending(self):
+        """버퍼를 batch_size 단위로 insert (flush 는 close 때 한 번)"""
+        for i in range(0, len(self._pending), self.batch_size):
+            self.client.insert(self.collection, self._pending[i : i + self.batch_size])
+            self._dirty = True
+        self._pending = []
 
-class MilvusVectorSink:
-    """Milvus 스텁"""
+    def merge_pages(self, row_pages: Dict[int, List[int]]):
+        """근사 중복으로 합쳐진 청크의 페이지를 meta.pages에 병합 (버퍼에 있으면 바로, 아니면 행을 다시 씀)"""
+        if not row_pages:
+            return
+        pending = {r["pk"]: r for r in self._pending}
+        remote = [int(r) for r in row_pages if int(r) not in pending]
+        rows = self.client.get(self.collection, ids=remote, output_fields=["*"]) if remote and self._ready else []
+        updates = []
+        for r in list(rows) + [pending[int(k)] for k in row_pages if int(k) in pending]:
+            meta = r["meta"]
+            meta["pages"] = sorted(set(meta.get("pages", [])) | set(row_pages[r["pk"]]))
+            if r["pk"] not in pending:
+                updates.append(r)
+        if updates:
+            self.client.upsert(self.collection, updates)
+            self._dirty = True
+        self._writes += 1
 
-    def __init__(self, cfg: Dict):
-        self.cfg = cfg
-        # TODO: pymilvus 연동 구현
+    @property
+    def ntotal(self) -> int:
+        if not self._ready:
+            return 0
+        return int(self.client.get_collection_stats(self.collection).get("row_count", 0))
+
+    @property
+    def version(self) -> int:
+        return self._writes
+
+    def count(self) -> int:
+        return self.ntotal
+
+    def document_ids(self, doc_id: str) -> List[int]:
+        if not self._ready:
+            return []
+        rows = self.client.query(self.collection, filter=self._filter_in("doc_id", [doc_id]), output_fields=["pk"])
+        return [int(r["pk"]) for r in rows]
+
+    def delete_document(self, doc_id: str) -> int:
+        ids = self.document_ids(doc_id)
+        if ids:
+            self.client.delete(self.collection, ids=ids)
+            self._dirty = True
+            self._writes += 1
+        return len(ids)
+
+    def get_items(self, ids) -> List[Optional[Dict]]:
+        """기본 키 목록 → 아이템(faiss_id=pk, id, chunk_id, text, meta) 목록. -1/없는 키는 None"""
+        ids = [int(i) for i in ids]
+        want = sorted({i for i in ids if i >= 0})
+        found: Dict[int, Dict] = {}
+        if want and self._ready:
+            fields = ["pk", "uid", "chunk_id", "text", "meta"]
+            for r in self.client.get(self.collection, ids=want, output_fields=fields):
+                found[int(r["pk"])] = {
+                    "faiss_id": int(r["pk"]),
+                    "id": r["uid"],
+                    "chunk_id": r["chunk_id"],
+                    "text": r["text"],
+                    "meta": r["meta"],
+                }
+        return [found.get(i) for i in ids]
+
+    def search(self, vectors, k: int = 5):
+        """Milvus ANN 검색 → FAISS와 같은 (D, I) 배열 (모자란 자리는 -1)"""
+        import numpy as np
+
+        if not self._ready:
+            raise RuntimeError(f"Milvus 컬렉션이 없습니다: {self.collection}")
+        self._flush_pending()
+        q = np.ascontiguousarray(vectors, dtype="float32")
+        res = self.client.search(
+            self.collection,
+            data=q.tolist(),
+            limit=k,
+            search_params={"metric_type": self.metric_type, "params": self.search_params},
+            output_fields=[],
+        )
+        fill = np.finfo("float32").min if self.metric == "IP" else np.finfo("float32").max
+        D = np.full((len(q), k), fill, dtype="float32")
+        I = np.full((len(q), k), -1, dtype="int64")
+        for qi, hits in enumerate(res):
+            for j, h in enumerate(hits[:k]):
+                D[qi, j] = h["distance"]
+                I[qi, j] = h["id"]
+        return D, I
+
+    def close(self):
+        """남은 버퍼 insert 후 flush 한 번 (클라이언트는 프로세스 내에서 재사용하므로 닫지 않음)"""
+        self._flush_pending()
+        if self._dirty:
+            self.client.flush(self.collection)
+            self._dirty = False
 
-    def upsert(self, chunks: List[Dict], vectors: List[List[float]]):
-        raise NotImplementedError("MilvusVectorSink: TODO - Implement with pymilvus")
+
+def _faiss_item(c: Dict) -> Dict:
+    doc_id = c.get("meta", {}).get("doc_id", "unknown")
+    key_src = f"{doc_id}-{c.get('id')}"
+    uid = hashlib.md5(key_src.encode("utf-8")).hexdigest()
+    return {
+        "id": uid,
+        "chunk_id": c.get("id"),
+        "text": c.get("text"),
+        "meta": c.get("meta", {}),
+    }
 
 
 class FaissVectorSink:
-    """FAISS 기반 벡터 저장/검색"""
+    """FAISS 기반 벡터 저장/검색 (append-only 세그먼트 + 안정적인 int64 id)
 
-    def __init__(self, cfg: Dict):
+    <index_path>.segments/ 아래에 업서트마다 불변 세그먼트를 추가하고 manifest 교체로 커밋한다.
+    세그먼트는 IndexIDMap2로 FAISS id(doc_key << 24 | 문서 내 청크 순번)를 직접 저장하므로
+    병합/삭제 뒤에도 id가 바뀌지 않는다. 검색은 세그먼트별 결과를 전역 top-k로 병합한다.
+    같은 doc_id를 다시 업서트하면 기존 벡터를 교체하고, delete_document()로 문서 단위 삭제.
+    작은 세그먼트가 쌓이면 백그라운드 스레드가 인접한 것끼리 병합한다.
+    세그먼트 도입 전의 단일 인덱스 파일(index_path + meta_path)은 첫 세그먼트로 그대로 참조하며
+    그 벡터들의 id는 행 번호다.
+    readonly=True: 검색 전용. 세그먼트를 mmap으로 열어 같은 호스트의 여러 검색 프로세스가
+    페이지 캐시를 공유하고(프로세스별 힙 복사 없음), 쓰기 메서드는 RuntimeError.
+    """
+
+    def __init__(self, cfg: Dict, readonly: bool = False):
         self.cfg = cfg
+        self.readonly = readonly
         self.index_path = cfg.get("index_path", "./data/index.faiss")
         self.metric = cfg.get("metric", "L2").upper()
+        # 세그먼트 도입 전 단일 파일 메타 경로
         self.meta_path = cfg.get("meta_path", self.index_path + ".meta.json")
-        os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+        scfg = cfg.get("segments") or {}
+        self.seg_dir = scfg.get("dir") or self.index_path + ".segments"
+        self.compact_min_rows = int(scfg.get("compact_min_rows", 10000))
+        self.compact_trigger = int(scfg.get("compact_trigger", 8))
+        self.search_threads = int(scfg.get("search_threads", 0))
+        # ANN 인덱스 종류/학습/검색 파라미터 (기본: Flat 전수 검색)
+        self.index_cfg = cfg.get("index") or {}
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
 
         try:
             import faiss  # type: ignore
@@ -82,67 +521,1058 @@ class FaissVectorSink:
             raise ImportError("faiss 패키지가 필요합니다") from e
         self.faiss = faiss
 
-        if os.path.exists(self.index_path):
-            self.index = self.faiss.read_index(self.index_path)
-        else:
-            self.index = None
+        self.store = SegmentStore(self.seg_dir)
+        self._lock = threading.RLock()
+        self._compactor: Optional[threading.Thread] = None
+        self._executor = None
+        self._template = None
+        self._segs: List[Dict] = []
+        self.items: Optional[MetaStore] = None
+        self._stamp = None
+        self._load()
 
+    # --- 로드 ---
+    def _legacy_manifest(self) -> Dict:
+        """단일 인덱스 파일을 첫 세그먼트로 참조하는 manifest (커밋 전까지 메모리에만 존재)"""
+        m = empty_manifest()
+        meta = {}
         if os.path.exists(self.meta_path):
             with open(self.meta_path, "r", encoding="utf-8") as f:
-                self.meta = json.load(f)
-        else:
-            self.meta = {"items": [], "dim": None, "metric": self.metric}
+                meta = json.load(f)
+            if isinstance(meta, list):  # 재청킹 스크립트가 만든 배열 형태
+                meta = {"items": meta}
+        index = self.faiss.read_index(self.index_path)
+        m.update(
+            {
+                "dim": meta.get("dim") or index.d,
+                "metric": meta.get("metric") or self.metric,
+                "segments": [
+                    {
+                        "name": "legacy",
+                        "index": os.path.relpath(self.index_path, self.seg_dir),
+                        "meta": os.path.relpath(self.meta_path, self.seg_dir),
+                        "ntotal": index.ntotal,
+                    }
+                ],
+            }
+        )
+        for key in ("stored_dim", "reduce"):
+            if key in meta:
+                m[key] = meta[key]
+        return m
 
+    def _load(self):
+        if not self.store.exists() and os.path.exists(self.index_path):
+            self.store.manifest = self._legacy_manifest()
+        m = self.store.manifest
+        spec = (m.get("index") or {}).get("spec")
+        if spec and self.index_cfg and spec != self._index_spec():
+            print(
+                f"[WARN] 설정의 인덱스({self._index_spec()})가 저장된 인덱스({spec})와 다릅니다. "
+                f"scripts/convert_index.py 로 변환하세요"
+            )
+        rmethod = ((self.cfg.get("reduce") or {}).get("method") or "none").lower()
+        if rmethod != "none" and m.get("template") and not m.get("reduce"):
+            print(
+                f"[WARN] 설정의 차원 축소(reduce.method={rmethod})가 이 인덱스에는 적용되지 않았습니다 "
+                f"(첫 업서트 샘플 부족 등). scripts/reindex.py 로 재색인하면 적용됩니다"
+            )
+        self._open_segments(m)
 
-    def _create_index(self, dim: int):
-        if self.metric == "IP":
-            return self.faiss.IndexFlatIP(dim)
-        else:
-            return self.faiss.IndexFlatL2(dim)
+    def _open_segments(self, m: Dict):
+        """manifest의 세그먼트/메타 저장소 열기. 이미 연 세그먼트 파일(불변)은 다시 읽지 않음"""
+        if m.get("metric"):
+            self.metric = m["metric"]
+        # 검색 파라미터(nprobe/efSearch)는 manifest에 저장된 값이 기준, 설정 값이 있으면 덮어씀
+        self.search_params = dict(m.get("search_params") or {})
+        self.search_params.update(self._config_search_params())
+        opened = {s["info"]["index"]: s["index"] for s in self._segs}
+        segs: List[Dict] = []
+        base = 0
+        for info in m["segments"]:
+            index = opened.get(info["index"]) or self.store.read_index(self.faiss, info["index"], mmap=self.readonly)
+            segs.append(self._segment(info, index, base))
+            base += index.ntotal
+        self._segs = segs
+        self.meta = {"dim": m.get("dim"), "metric": self.metric}
+        for key in ("stored_dim", "reduce"):
+            if key in m:
+                self.meta[key] = m[key]
+        # 청크 텍스트/메타는 SQLite에서 필요한 행만 조회
+        old_items = self.items
+        if m.get("meta_db"):
+            path = self.store.path(m["meta_db"])
+            if old_items is None or old_items.path != path:
+                self.items = MetaStore(path, readonly=self.readonly)
+        elif self._segs and self.readonly:
+            self._load_meta_in_memory()
+        elif self._segs:
+            self._migrate_meta()
+        if old_items is not None and old_items is not self.items:
+            old_items.close()
+        self._stamp = self._manifest_stamp()
 
-    def upsert(self, chunks: List[Dict], vectors: List[Sequence[float]]):
+    def _manifest_stamp(self):
+        """manifest 파일의 (mtime, 크기): 다른 프로세스의 커밋을 stat 한 번으로 감지"""
+        try:
+            st = os.stat(self.store.manifest_path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def stale(self) -> bool:
+        """다른 프로세스가 manifest를 커밋했는지 (stat만, 락 없음)"""
+        return self._manifest_stamp() != self._stamp
+
+    def refresh(self) -> bool:
+        """다른 프로세스(인제스트/삭제/병합)가 커밋한 manifest 반영: 새 세그먼트/메타 저장소를 열고
+        version이 바뀜 (읽기 전용 검색 서버의 결과 캐시 무효화). 변경 여부 반환
+
+        이 저장소로 검색 중인 스레드가 없을 때 호출 (교체된 메타 저장소는 닫힘)
+        """
+        if not self.stale():
+            return False
+        with self._lock:
+            self._stamp = self._manifest_stamp()
+            if not self.store.reload():
+                return False
+            self._open_segments(self.store.manifest)
+        print(f"[INFO] FAISS manifest 변경 반영: version={self.store.manifest.get('version')}, ntotal={self.ntotal}")
+        return True
+
+    def _segment(self, info: Dict, index, base: int = 0) -> Dict:
+        """메모리상의 세그먼트: 인덱스 + 저장된 FAISS id (정렬본은 id 소속 확인용)"""
         import numpy as np
 
-        if not vectors:
+        self._apply_search_params(index)
+        ids = self._ids_of(index)
+        positional = ids is None
+        if positional:
+            # id 매핑이 없는 (레지스트리 도입 전) 세그먼트: id = 행 번호
+            info.setdefault("id_base", base)
+            ids = np.arange(info["id_base"], info["id_base"] + index.ntotal, dtype="int64")
+        return {
+            "info": info,
+            "index": index,
+            "ntotal": index.ntotal,
+            "ids": ids,
+            "sorted_ids": np.sort(ids),
+            "id_base": info.get("id_base", 0) if positional else None,
+        }
+
+    def _migrate_meta(self):
+        """세그먼트별 메타 파일(단일 meta.json / *.jsonl)을 SQLite 메타 저장소로 옮김 (최초 1회)"""
+        t0 = time.perf_counter()
+        m = copy.deepcopy(self.store.manifest)
+        m["meta_db"] = self.store.new_name(m, "meta") + ".sqlite"
+        os.makedirs(self.seg_dir, exist_ok=True)
+        store = MetaStore(self.store.path(m["meta_db"]))
+        for s in self._segs:
+            store.put(s["ids"], self.store.read_items(s["info"]["meta"])[: s["ntotal"]])
+        store.merge_pages({int(r): p for r, p in m.pop("patches", {}).items()})
+        for info, s in zip(m["segments"], self._segs):
+            info.pop("meta", None)
+            if s["id_base"] is not None:
+                info["id_base"] = s["id_base"]
+        self.store.commit(m)
+        for s, info in zip(self._segs, m["segments"]):
+            s["info"] = info
+        self.store.cleanup()
+        self.items = store
+        print(
+            f"[INFO] 메타 → SQLite 이전: {self.ntotal} rows ({time.perf_counter() - t0:.2f}s) "
+            f"→ {store.path}"
+        )
+
+    def _load_meta_in_memory(self):
+        """읽기 전용으로 연 이전 형식(단일 meta.json / *.jsonl) 인덱스: 디스크에 쓰지 않고 메모리 SQLite로 서빙
+
+        이전(manifest/SQLite 기록)은 일반 모드로 한 번 열거나 scripts/convert_index.py 로 수행
+        """
+        t0 = time.perf_counter()
+        store = MetaStore(":memory:")
+        for s in self._segs:
+            store.put(s["ids"], self.store.read_items(s["info"]["meta"])[: s["ntotal"]])
+        store.merge_pages({int(r): p for r, p in (self.store.manifest.get("patches") or {}).items()})
+        self.items = store
+        print(
+            f"[WARN] 읽기 전용: 메타가 SQLite로 이전되지 않은 인덱스 → 메모리에 적재해 서빙합니다 "
+            f"({self.ntotal} rows, {time.perf_counter() - t0:.2f}s). "
+            f"일반 모드로 한 번 열거나 scripts/convert_index.py 로 이전하면 바로 시작됩니다"
+        )
+
+    def _open_meta_db(self, m: Dict) -> MetaStore:
+        m["meta_db"] = self.store.new_name(m, "meta") + ".sqlite"
+        os.makedirs(self.seg_dir, exist_ok=True)
+        return MetaStore(self.store.path(m["meta_db"]))
+
+    def _check_writable(self):
+        if self.readonly:
+            raise RuntimeError("읽기 전용(mmap)으로 연 FAISS 저장소에는 쓸 수 없습니다")
+
+    # --- 인덱스 구성 ---
+    def _create_index(self, dim: int, reduce: bool = True):
+        rcfg = self.cfg.get("reduce") or {}
+        method = (rcfg.get("method") or "none").lower()
+        out_dim = int(rcfg.get("dim") or dim)
+        if not reduce or method == "none" or out_dim >= dim:
+            return self._with_ids(self._create_base_index(dim))
+        base = self._with_ids(self._create_base_index(out_dim))
+        return self._wrap_reduce(base, method, dim, out_dim, rcfg)
+
+    def _index_spec(self) -> str:
+        """vector_sink.faiss.index 설정 → FAISS index_factory 문자열
+
+        - flat: 전수 검색 (기본)
+        - hnsw: HNSW{M} (학습 불필요, 문서 삭제 시 세그먼트 재구성)
+        - ivf_flat: IVF{nlist},Flat / ivf_pq: IVF{nlist},PQ{m}x{nbits} (샘플로 학습)
+        - factory: 임의의 index_factory 문자열 (예: "IVF4096,SQ8")
+        """
+        icfg = self.index_cfg
+        typ = (icfg.get("type") or "flat").lower()
+        if typ == "flat":
+            return "Flat"
+        if typ == "hnsw":
+            return f"HNSW{int(icfg.get('M', 32))}"
+        if typ == "ivf_flat":
+            return f"IVF{int(icfg.get('nlist', 1024))},Flat"
+        if typ == "ivf_pq":
+            return f"IVF{int(icfg.get('nlist', 1024))},PQ{int(icfg.get('pq_m', 16))}x{int(icfg.get('pq_nbits', 8))}"
+        if typ == "factory":
+            if not icfg.get("factory"):
+                raise ValueError("index.type=factory 에는 index.factory 문자열이 필요합니다")
+            return str(icfg["factory"])
+        raise ValueError(f"Unknown FAISS index type: {typ}")
+
+    def _create_base_index(self, dim: int):
+        spec = self._index_spec()
+        metric = self.faiss.METRIC_INNER_PRODUCT if self.metric == "IP" else self.faiss.METRIC_L2
+        index = self.faiss.index_factory(dim, spec, metric)
+        hnsw = getattr(self.faiss.downcast_index(index), "hnsw", None)
+        if hnsw is not None and self.index_cfg.get("efConstruction"):
+            hnsw.efConstruction = int(self.index_cfg["efConstruction"])
+        return index
+
+    def _config_search_params(self) -> Dict[str, int]:
+        return {k: int(self.index_cfg[k]) for k in ("nprobe", "efSearch") if self.index_cfg.get(k)}
+
+    def _apply_search_params(self, index):
+        """nprobe(IVF) / efSearch(HNSW) 적용. 해당 없는 파라미터는 무시"""
+        if not self.search_params:
             return
+        ps = self.faiss.ParameterSpace()
+        for name, value in self.search_params.items():
+            try:
+                ps.set_index_parameter(index, name, value)
+            except RuntimeError:
+                pass
 
-        vecs = np.array(vectors, dtype="float32")
-        if self.index is None:
-            self.index = self._create_index(vecs.shape[1])
-        # 최초 업서트 시 메타에 차원/메트릭 기록
-        if not self.meta.get("dim"):
-            self.meta["dim"] = vecs.shape[1]
-        self.meta["metric"] = self.metric
+    def set_search_params(self, **params):
+        """검색 파라미터를 바꾸고 manifest에 저장 (다른 프로세스도 다음 로드부터 사용)"""
+        self._check_writable()
+        with self._lock:
+            self.search_params.update({k: int(v) for k, v in params.items() if v is not None})
+            m = copy.deepcopy(self.store.manifest)
+            m["search_params"] = dict(self.search_params)
+            self.store.commit(m)
+            for seg in self._segs:
+                self._apply_search_params(seg["index"])
 
-        self.index.add(vecs)
+    def _wrap_reduce(self, base, method: str, dim: int, out_dim: int, rcfg: Dict):
+        """차원 축소 변환을 IndexPreTransform으로 감싸 인덱스 파일에 함께 저장
 
-        for c in chunks:
-            doc_id = c.get("meta", {}).get("doc_id", "unknown")
-            key_src = f"{doc_id}-{c.get('id')}"
-            uid = hashlib.md5(key_src.encode("utf-8")).hexdigest()
-            self.meta["items"].append(
-                {
-                    "id": uid,
-                    "chunk_id": c.get("id"),
-                    "text": c.get("text"),
-                    "meta": c.get("meta", {}),
-                }
+        검색 시 질의 벡터에도 같은 변환이 자동 적용된다.
+        - pca: 샘플로 학습한 PCA (첫 업서트 때 학습)
+        - truncate: 앞쪽 out_dim 차원만 사용 (Matryoshka 학습 모델용)
+        정규화된 벡터(IP/코사인)를 쓰면 축소 뒤 다시 L2 정규화한다.
+        """
+        if method == "pca":
+            # 첫 업서트(또는 reindex 전체 교체) 때 한 번만 학습. 이후 업서트로는 다시 학습하지 않음
+            vt = self.faiss.PCAMatrix(dim, out_dim)
+        elif method == "truncate":
+            vt = self.faiss.RemapDimensionsTransform(dim, out_dim, False)
+        else:
+            raise ValueError(f"Unknown reduce method: {method}")
+        index = self.faiss.IndexPreTransform(base)
+        if rcfg.get("renormalize", self.metric == "IP"):
+            index.prepend_transform(self.faiss.NormalizationTransform(out_dim, 2.0))
+        index.prepend_transform(vt)
+        return index
+
+    def _core(self, index):
+        """변환(IndexPreTransform) 안쪽 인덱스: id를 저장하는 IndexIDMap2 또는 IVF"""
+        if isinstance(index, self.faiss.IndexPreTransform):
+            return self.faiss.downcast_index(index.index)
+        return index
+
+    def _idmap_of(self, index):
+        """(변환 안쪽의) IndexIDMap2, 없으면 None"""
+        core = self._core(index)
+        return core if isinstance(core, self.faiss.IndexIDMap) else None
+
+    def _with_ids(self, base):
+        """id를 직접 저장하도록 감쌈: IVF는 역리스트에 id를 저장하므로 그대로, 나머지는 IndexIDMap2"""
+        if self.faiss.try_extract_index_ivf(base) is not None:
+            return base
+        idmap = self.faiss.IndexIDMap2(base)
+        # 안쪽 인덱스 소유권을 idmap(C++)으로 넘김: 변환 인덱스에 끼워 넣어도 수명이 묶이도록
+        idmap.own_fields = True
+        base.this.disown()
+        return idmap
+
+    def _with_id_map(self, index):
+        """id 매핑이 없는 (단일 파일 시절) 빈 인덱스를 IndexIDMap2로 감쌈"""
+        if not isinstance(index, self.faiss.IndexPreTransform):
+            return self.faiss.IndexIDMap2(index)
+        idmap = self.faiss.IndexIDMap2(self.faiss.downcast_index(index.index))
+        # 소유권을 C++ 쪽으로 넘김: index → idmap → 기존 내부 인덱스
+        idmap.own_fields = True
+        idmap.this.disown()
+        index.index = idmap
+        return index
+
+    def _ids_of(self, index):
+        """인덱스에 저장된 FAISS id (id가 없는 단일 파일 시절 인덱스는 None)"""
+        import numpy as np
+
+        idmap = self._idmap_of(index)
+        if idmap is not None:
+            return self.faiss.vector_to_array(idmap.id_map).astype("int64", copy=False)
+        ivf = self.faiss.try_extract_index_ivf(index)
+        if ivf is None:
+            return None
+        inv = ivf.invlists
+        parts = [
+            self.faiss.rev_swig_ptr(inv.get_ids(l), inv.list_size(l)).copy()
+            for l in range(ivf.nlist)
+            if inv.list_size(l)
+        ]
+        return np.concatenate(parts).astype("int64") if parts else np.zeros(0, dtype="int64")
+
+    def _direct_map(self, index):
+        """IVF 인덱스의 id → (리스트, 위치) 해시 매핑 생성 (reconstruct에 필요, 최초 1회)"""
+        ivf = self.faiss.try_extract_index_ivf(index)
+        if ivf is not None and ivf.direct_map.no():
+            ivf.set_direct_map_type(self.faiss.DirectMap.Hashtable)
+
+    def _clone(self, index):
+        """세그먼트 복제 (IVF 해시 매핑은 remove_ids/merge_from을 막으므로 빼고 복제)"""
+        index = self.faiss.clone_index(index)
+        ivf = self.faiss.try_extract_index_ivf(index)
+        if ivf is not None and not ivf.direct_map.no():
+            ivf.set_direct_map_type(self.faiss.DirectMap.NoMap)
+        return index
+
+    def _stored_vectors(self, index, ids):
+        """세그먼트의 저장 벡터, ids 순서 (차원 축소 인덱스는 변환 후 공간, PQ 등은 복원 근사값)"""
+        core = self._core(index)
+        idmap = self._idmap_of(index)
+        if idmap is not None:
+            inner = self.faiss.downcast_index(idmap.index)
+            return inner.reconstruct_n(0, inner.ntotal)
+        if self.faiss.try_extract_index_ivf(core) is not None:
+            self._direct_map(core)
+            return core.reconstruct_batch(ids)
+        return core.reconstruct_n(0, core.ntotal)
+
+    def _add_stored(self, dst, vecs, ids):
+        """변환 후 공간의 벡터를 id와 함께 추가 (병합/복사용: 변환을 다시 적용하지 않음)"""
+        core = self._core(dst)
+        core.add_with_ids(vecs, ids)
+        if isinstance(dst, self.faiss.IndexPreTransform):
+            dst.ntotal = core.ntotal
+
+    def _merge_into(self, dst, seg: Dict):
+        """세그먼트를 dst(같은 템플릿의 복제본)에 id 그대로 합침
+
+        Flat/IVF는 인코딩된 코드를 그대로 옮기고(merge_from),
+        지원하지 않는 인덱스(HNSW 등)는 저장 벡터를 복원해 다시 추가한다.
+        """
+        import numpy as np
+
+        clone = self._clone(seg["index"])  # merge_from은 원본을 비우므로 복제본 사용 (참조 유지)
+        core, src = self._core(dst), self._core(clone)
+        idmap = self._idmap_of(dst)
+        try:
+            if idmap is None:
+                # IVF: 역리스트에 id가 있으므로 그대로 합침
+                core.merge_from(src, 0)
+            else:
+                # IndexIDMap2.merge_from은 안쪽 IVF 등의 로컬 번호를 맞추지 않으므로 직접 이어 붙임
+                inner = self.faiss.downcast_index(idmap.index)
+                inner.merge_from(self.faiss.downcast_index(src.index), 0)
+                ids = np.concatenate([self.faiss.vector_to_array(idmap.id_map), seg["ids"]])
+                self.faiss.copy_array_to_vector(ids, idmap.id_map)
+                idmap.ntotal = inner.ntotal
+                idmap.construct_rev_map()
+        except RuntimeError:
+            self._add_stored(dst, self._stored_vectors(seg["index"], seg["ids"]), seg["ids"])
+            return
+        if isinstance(dst, self.faiss.IndexPreTransform):
+            dst.ntotal = core.ntotal
+
+    def _train(self, index, vecs):
+        """학습이 필요한 인덱스(PCA 등)를 샘플로 학습"""
+        import numpy as np
+
+        rcfg = self.cfg.get("reduce") or {}
+        n = int(self.index_cfg.get("train_size") or rcfg.get("train_size", 20000))
+        if len(vecs) > n:
+            rng = np.random.default_rng(0)
+            vecs = vecs[np.sort(rng.choice(len(vecs), n, replace=False))]
+        need = int(rcfg.get("dim") or 0) if isinstance(index, self.faiss.IndexPreTransform) else 0
+        if len(vecs) < need:
+            raise ValueError(
+                f"차원 축소 학습 샘플 부족: {len(vecs)}개 < dim {need} (첫 업서트 청크 수를 늘리거나 reindex로 재색인)"
+            )
+        ivf = self.faiss.try_extract_index_ivf(index)
+        if ivf is not None and len(vecs) < ivf.nlist:
+            raise ValueError(
+                f"IVF 학습 샘플 부족: {len(vecs)}개 < nlist {ivf.nlist} "
+                f"(flat으로 먼저 색인한 뒤 scripts/convert_index.py 로 변환하거나 nlist를 줄이세요)"
             )
+        t0 = time.perf_counter()
+        index.train(vecs)
+        if ivf is not None:
+            print(f"[INFO] 인덱스 학습: {len(vecs)} vectors, nlist={ivf.nlist} ({time.perf_counter() - t0:.1f}s)")
+
+    def _can_train_reduce(self, vecs) -> bool:
+        """PCA는 출력 차원 이상의 학습 샘플이 필요. 첫 업서트가 그보다 작으면 축소 없이 시작"""
+        rcfg = self.cfg.get("reduce") or {}
+        out_dim = int(rcfg.get("dim") or 0)
+        if (rcfg.get("method") or "none").lower() != "pca" or not out_dim or out_dim >= vecs.shape[1]:
+            return True
+        if len(vecs) >= out_dim:
+            return True
+        print(
+            f"[WARN] 첫 업서트 벡터 {len(vecs)}개 < reduce.dim {out_dim}: PCA를 학습할 수 없어 "
+            f"차원 축소 없이 {vecs.shape[1]}차원으로 저장합니다. 청크가 충분히 쌓이면 "
+            f"scripts/reindex.py 로 재색인해 PCA를 적용하세요 (기존 벡터 재사용)"
+        )
+        return False
+
+    def _get_template(self, m: Dict, vecs):
+        """세그먼트마다 복제해 쓰는 학습된 빈 인덱스 (PCA 등 학습 결과를 세그먼트 간에 공유)"""
+        if self._template is None and m.get("template"):
+            self._template = self.store.read_index(self.faiss, m["template"])
+        if self._template is not None:
+            return self._template
+        if self._segs:
+            # 단일 파일 인덱스: 기존 인덱스의 구성/학습 상태를 그대로 복제
+            tpl = self.faiss.clone_index(self._segs[0]["index"])
+            tpl.reset()
+            if self._ids_of(tpl) is None:
+                tpl = self._with_id_map(tpl)
+        else:
+            tpl = self._create_index(vecs.shape[1], reduce=self._can_train_reduce(vecs))
+            if not tpl.is_trained:
+                self._train(tpl, vecs)
+            # 최초 업서트 시 차원/메트릭 기록 (dim은 질의 벡터 차원)
+            m["dim"] = vecs.shape[1]
+            if isinstance(tpl, self.faiss.IndexPreTransform):
+                m["stored_dim"] = tpl.index.d
+                # 학습에 쓴 행 수 기록 (이후 업서트는 같은 투영을 그대로 사용)
+                m["reduce"] = {**(self.cfg.get("reduce") or {}), "trained_rows": len(vecs)}
+            m["index"] = {"spec": self._index_spec()}
+            m["search_params"] = dict(self.search_params)
+        self._apply_search_params(tpl)
+        m["metric"] = self.metric
+        m["template"] = self.store.new_name(m, "template") + ".faiss"
+        self.store.write_index(self.faiss, tpl, m["template"])
+        self._template = tpl
+        return tpl
 
-        self.faiss.write_index(self.index, self.index_path)
-        with open(self.meta_path, "w", encoding="utf-8") as f:
-            json.dump(self.meta, f, ensure_ascii=False, indent=2)
+    def _write_segment(self, m: Dict, index) -> Dict:
+        name = self.store.new_name(m, "seg")
+        info = {
+            "name": name,
+            "index": name + ".faiss",
+            "ntotal": index.ntotal,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        # 세그먼트 파일을 먼저 쓰고, manifest 커밋은 호출자가 한다
+        self.store.write_index(self.faiss, index, info["index"])
+        return info
 
-    def search(self, vectors: List[Sequence[float]], k: int = 5):
-        """주어진 벡터에 대해 FAISS 검색 수행"""
+    # --- 문서 id ---
+    def _assign_ids(self, chunks: List[Dict]):
+        """청크별 FAISS id 부여: 문서마다 doc_key를 등록하고 문서 내 순번을 붙인다
+
+        반환: (ids, {doc_key: 청크 수}, 교체 대상 문서의 id 구간 목록)
+        """
         import numpy as np
 
-        if self.index is None:
-            if os.path.exists(self.index_path):
-                self.index = self.faiss.read_index(self.index_path)
+        groups: Dict[str, List[int]] = {}
+        for i, c in enumerate(chunks):
+            groups.setdefault(c.get("meta", {}).get("doc_id", "unknown"), []).append(i)
+        ids = np.empty(len(chunks), dtype="int64")
+        counts: Dict[int, int] = {}
+        stale = []
+        for doc_id, pos in groups.items():
+            key = self.items.doc_key(doc_id)
+            if key is None:
+                key = self.items.doc_key(doc_id, create=True)
             else:
+                stale.append(doc_range(key))
+            ids[pos] = make_ids(key, len(pos))
+            counts[key] = len(pos)
+        return ids, counts, stale
+
+    def _has_ids_in(self, seg: Dict, lo: int, hi: int) -> bool:
+        import numpy as np
+
+        s = seg["sorted_ids"]
+        return bool(np.searchsorted(s, lo) < np.searchsorted(s, hi))
+
+    def _rewrite_without(self, m: Dict, ranges):
+        """id 구간에 속한 벡터를 뺀 세그먼트로 교체 (copy-on-write). (새 세그먼트 목록, 제거된 id) 반환"""
+        import numpy as np
+
+        segs: List[Dict] = []
+        removed: List[Any] = []
+        for s in self._segs:
+            hit = [(lo, hi) for lo, hi in ranges if s["id_base"] is None and self._has_ids_in(s, lo, hi)]
+            if not hit:
+                segs.append(s)
+                continue
+            mask = np.zeros(len(s["ids"]), dtype=bool)
+            for lo, hi in hit:
+                mask |= (s["ids"] >= lo) & (s["ids"] < hi)
+            index = self._clone(s["index"])
+            try:
+                for lo, hi in hit:
+                    index.remove_ids(self.faiss.IDSelectorRange(lo, hi))
+            except RuntimeError:
+                # remove_ids 미지원(HNSW 등): 남길 벡터만 템플릿 복제본에 다시 추가
+                index = self.faiss.clone_index(self._get_template(m, None))
+                vecs = self._stored_vectors(s["index"], s["ids"])
+                self._add_stored(index, vecs[~mask], s["ids"][~mask])
+            removed.append(s["ids"][mask])
+            pos = [x["name"] for x in m["segments"]].index(s["info"]["name"])
+            if index.ntotal == 0:
+                del m["segments"][pos]
+                continue
+            info = self._write_segment(m, index)
+            m["segments"][pos] = info
+            segs.append(self._segment(info, index))
+        return segs, (np.concatenate(removed) if removed else np.zeros(0, dtype="int64"))
+
+    def documents(self) -> List[Dict]:
+        """등록된 문서 목록 (doc_key, doc_id, chunks, updated)"""
+        return self.items.documents() if self.items is not None else []
+
+    def document_ids(self, doc_id: str) -> List[int]:
+        """문서에 현재 저장된 FAISS id 목록"""
+        import numpy as np
+
+        key = self.items.doc_key(doc_id) if self.items is not None else None
+        if key is None:
+            return []
+        lo, hi = doc_range(key)
+        out: List[int] = []
+        for s in self._segs:
+            ids = s["sorted_ids"]
+            out.extend(ids[np.searchsorted(ids, lo) : np.searchsorted(ids, hi)].tolist())
+        return out
+
+    # --- 쓰기 ---
+    def upsert(self, chunks: List[Dict], vectors, model_id: Optional[str] = None) -> List[int]:
+        """vectors: (n, dim) C-contiguous float32 행렬이면 복사 없이 index.add
+
+        청크의 meta.doc_id 별로 문서를 교체한다: 이미 등록된 문서의 기존 벡터를 뺀 세그먼트와
+        새 세그먼트를 manifest 교체 한 번으로 함께 커밋 (기존 세그먼트 파일은 건드리지 않음).
+        메타 행을 먼저 저장하므로 manifest 커밋 전에 중단돼도 검색 결과에는 영향이 없다.
+        model_id: 벡터를 만든 임베더 (manifest에 기록, reindex 벡터 재사용 판단용)
+        반환: 청크별 FAISS id
+        """
+        self._check_writable()
+        import numpy as np
+
+        if len(vectors) == 0:
+            # 빈 배치로는 어느 문서를 교체할지 알 수 없음 → 문서를 비우려면 delete_document()
+            return []
+
+        vecs = np.ascontiguousarray(vectors, dtype="float32")
+        items = [_faiss_item(c) for c in chunks]
+        with self._lock:
+            m = copy.deepcopy(self.store.manifest)
+            tpl = self._get_template(m, vecs)
+            if self.items is None:
+                self.items = self._open_meta_db(m)
+            ids, counts, stale = self._assign_ids(chunks)
+            segs, removed = self._rewrite_without(m, stale)
+
+            index = self.faiss.clone_index(tpl)
+            index.add_with_ids(vecs, ids)
+            self.items.put(ids, items)
+            info = self._write_segment(m, index)
+            m["segments"].append(info)
+            if model_id:
+                m["model_id"] = model_id
+            self.store.commit(m)
+
+            self._segs = segs + [self._segment(info, index)]
+            self.meta["dim"] = m.get("dim")
+            self.meta["metric"] = self.metric
+            # 교체된 문서에서 이번에 다시 쓰이지 않은 id의 메타 삭제
+            self.items.delete(np.setdiff1d(removed, ids).tolist())
+            for key, n in counts.items():
+                self.items.set_doc_chunks(key, n)
+            if stale:
+                self.store.cleanup()
+                print(f"[INFO] 문서 교체: {len(stale)}개 문서, 기존 벡터 {len(removed)}개 제거")
+        self._maybe_compact()
+        return ids.tolist()
+
+    def delete_document(self, doc_id: str) -> int:
+        """문서의 벡터/메타를 삭제하고 등록 해제. 삭제된 벡터 수 반환"""
+        self._check_writable()
+        self._join_compactor()
+        with self._lock:
+            key = self.items.doc_key(doc_id) if self.items is not None else None
+            if key is None:
+                return 0
+            m = copy.deepcopy(self.store.manifest)
+            segs, removed = self._rewrite_without(m, [doc_range(key)])
+            self.store.commit(m)
+            self._segs = segs
+            self.items.drop_doc(key)
+            self.store.cleanup()
+        return len(removed)
+
+    def replace_all(self, chunks: List[Dict], vectors, model_id: Optional[str] = None) -> List[int]:
+        """전체 내용을 새 세그먼트로 교체 (reindex용: manifest 교체 한 번으로 원자적 전환)"""
+        with self.replacing(model_id) as add:
+            ids = add(chunks, vectors)
+        return ids
+
+    @contextmanager
+    def replacing(self, model_id: Optional[str] = None) -> Iterator[Callable[[List[Dict], Any], List[int]]]:
+        """전체 교체를 블록 단위로: ``with sink.replacing(model_id) as add: ids = add(chunks, vecs)``
+
+        블록은 새 인덱스/메타 DB에 바로 넣고(전체 청크·벡터를 한 번에 들고 있지 않음), with 블록이
+        끝나면 새 세그먼트 하나를 manifest 교체로 커밋. 학습이 필요한 인덱스(PCA/IVF)는 train_size 행이
+        모일 때까지만 블록을 모아 학습한다. 예외가 나면 커밋하지 않고 기존 내용을 그대로 둔다.
+        같은 문서가 여러 블록에 나뉘어 와도 청크 순번이 이어진다.
+        """
+        self._check_writable()
+        import numpy as np
+
+        self._join_compactor()
+        with self._lock:
+            old = self.store.manifest
+            saved = (self._segs, self._template, self.meta, self.items)
+            m = empty_manifest()
+            m["version"] = old.get("version", 0)
+            m["next_seq"] = old.get("next_seq", 1)
+            if model_id:
+                m["model_id"] = model_id
+            self._segs = []
+            self._template = None
+            self.meta = {"dim": None, "metric": self.metric}
+            self.items = self._open_meta_db(m)
+            rcfg = self.cfg.get("reduce") or {}
+            train_rows = int(self.index_cfg.get("train_size") or rcfg.get("train_size", 20000))
+            counts: Dict[int, int] = {}
+            state: Dict[str, Any] = {"index": None, "pending": [], "rows": 0}
+
+            def start():
+                vecs = np.concatenate([v for _, v in state["pending"]])
+                ids = np.concatenate([i for i, _ in state["pending"]])
+                state["index"] = self.faiss.clone_index(self._get_template(m, vecs))
+                state["index"].add_with_ids(vecs, ids)
+                state["pending"] = []
+
+            def add(chunks: List[Dict], vectors) -> List[int]:
+                vecs = np.ascontiguousarray(vectors, dtype="float32")
+                groups: Dict[str, List[int]] = {}
+                for i, c in enumerate(chunks):
+                    groups.setdefault(c.get("meta", {}).get("doc_id", "unknown"), []).append(i)
+                ids = np.empty(len(chunks), dtype="int64")
+                for doc_id, pos in groups.items():
+                    key = self.items.doc_key(doc_id, create=True)
+                    ids[pos] = make_ids(key, len(pos), counts.get(key, 0))
+                    counts[key] = counts.get(key, 0) + len(pos)
+                self.items.put(ids, [_faiss_item(c) for c in chunks])
+                if len(vecs) and state["index"] is not None:
+                    state["index"].add_with_ids(vecs, ids)
+                elif len(vecs):
+                    state["pending"].append((ids, vecs))
+                    state["rows"] += len(vecs)
+                    if state["rows"] >= train_rows:
+                        start()
+                return ids.tolist()
+
+            try:
+                yield add
+                if state["pending"]:
+                    start()
+            except BaseException:
+                self.items.close()
+                self._segs, self._template, self.meta, self.items = saved
+                raise
+            index = state["index"]
+            if index is not None and index.ntotal:
+                self._segs = [self._segment(self._write_segment(m, index), index)]
+                m["segments"] = [s["info"] for s in self._segs]
+            for key, n in counts.items():
+                self.items.set_doc_chunks(key, n)
+            self.store.commit(m)
+            if saved[3] is not None:
+                saved[3].close()
+            self.meta["dim"] = m.get("dim")
+            self.store.cleanup()
+
+    def merge_pages(self, row_pages: Dict[int, List[int]]):
+        """근사 중복으로 합쳐진 청크의 페이지를 기존 아이템 meta.pages에 병합 (키: FAISS id)"""
+        self._check_writable()
+        if not row_pages or self.items is None:
+            return
+        with self._lock:
+            self.items.merge_pages(row_pages)
+            # 세그먼트는 그대로지만 manifest 버전을 올려 다른 검색 프로세스의 결과 캐시도 비워지게 함
+            self.store.commit(copy.deepcopy(self.store.manifest))
+
+    # --- 인덱스 종류 변환 ---
+    def convert(self, index_cfg: Dict) -> Dict:
+        """저장된 벡터로 인덱스 종류를 바꿔 다시 구성 (재임베딩 없음, FAISS id 유지)
+
+        샘플로 새 템플릿을 학습한 뒤 세그먼트별로 저장 벡터를 옮겨 담고 manifest 교체 한 번으로 전환.
+        차원 축소 인덱스는 기존 변환(PCA 등)을 그대로 두고 안쪽 인덱스만 바꾼다.
+        """
+        self._check_writable()
+        import numpy as np
+
+        self._join_compactor()
+        with self._lock:
+            if not self._segs:
                 raise RuntimeError("FAISS 인덱스가 존재하지 않습니다")
+            m = copy.deepcopy(self.store.manifest)
+            old_tpl = self._get_template(m, None)
+            self.index_cfg = dict(index_cfg or {})
+            self.search_params = self._config_search_params()
+            stored_dim = self._core(old_tpl).d
+            base = self._with_ids(self._create_base_index(stored_dim))
+            if isinstance(old_tpl, self.faiss.IndexPreTransform):
+                tpl = self.faiss.clone_index(old_tpl)
+                base.this.disown()  # tpl이 소유
+                tpl.index = base
+            else:
+                tpl = base
+
+            t0 = time.perf_counter()
+            if not base.is_trained:
+                # 세그먼트별로 저장 벡터에서 고르게 표본 추출 (전체를 메모리에 올리지 않음)
+                n = int(self.index_cfg.get("train_size", 20000))
+                rng = np.random.default_rng(0)
+                sample = []
+                for seg in self._segs:
+                    take = max(1, round(n * seg["ntotal"] / max(self.ntotal, 1)))
+                    vecs = self._stored_vectors(seg["index"], seg["ids"])
+                    sample.append(vecs[np.sort(rng.choice(len(vecs), min(take, len(vecs)), replace=False))])
+                self._train(base, np.vstack(sample))
+                tpl.is_trained = True
+            self._apply_search_params(tpl)
+
+            segs: List[Dict] = []
+            m["segments"] = []
+            for seg in self._segs:
+                index = self.faiss.clone_index(tpl)
+                self._add_stored(index, self._stored_vectors(seg["index"], seg["ids"]), seg["ids"])
+                info = self._write_segment(m, index)
+                m["segments"].append(info)
+                segs.append(self._segment(info, index))
+            m["index"] = {"spec": self._index_spec()}
+            m["search_params"] = dict(self.search_params)
+            m["template"] = self.store.new_name(m, "template") + ".faiss"
+            self.store.write_index(self.faiss, tpl, m["template"])
+            self.store.commit(m)
+            self._template = tpl
+            self._segs = segs
+            self.store.cleanup()
+        print(f"[INFO] 인덱스 변환: {m['index']['spec']} ({self.ntotal} rows, {time.perf_counter() - t0:.1f}s)")
+        return m["index"]
+
+    # --- 병합(compaction) ---
+    def _maybe_compact(self):
+        small = [s for s in self._segs if s["ntotal"] < self.compact_min_rows]
+        if len(small) < max(2, self.compact_trigger):
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, name="faiss-compact", daemon=True)
+        self._compactor.start()
+
+    def compact(self) -> int:
+        """인접한 작은 세그먼트들을 하나로 병합 (id 유지). 병합된 세그먼트 수 반환"""
+        self._check_writable()
+        with self._lock:
+            segs = list(self._segs)
+            m = copy.deepcopy(self.store.manifest)
+            if len(segs) < 2:
+                return 0
+            tpl = self._get_template(m, None)
+        runs: List[List[Dict]] = []
+        cur: List[Dict] = []
+        for s in segs:
+            if s["ntotal"] < self.compact_min_rows:
+                cur.append(s)
+                continue
+            if len(cur) > 1:
+                runs.append(cur)
+            cur = []
+        if len(cur) > 1:
+            runs.append(cur)
+
+        merged = 0
+        for run in runs:
+            # 무거운 작업(복사/쓰기)은 락 밖에서: 그동안의 업서트는 뒤쪽에 세그먼트를 추가할 뿐이다
+            index = self.faiss.clone_index(tpl)
+            for s in run:
+                self._merge_into(index, s)
+            with self._lock:
+                m = copy.deepcopy(self.store.manifest)
+                names = [s["info"]["name"] for s in self._segs]
+                first = names.index(run[0]["info"]["name"]) if run[0]["info"]["name"] in names else -1
+                if first < 0 or names[first : first + len(run)] != [s["info"]["name"] for s in run]:
+                    continue  # 그 사이 문서 교체/삭제로 세그먼트가 바뀜: 다음 병합에서 다시 시도
+                info = self._write_segment(m, index)
+                m["segments"][first : first + len(run)] = [info]
+                self.store.commit(m)
+                self._segs = self._segs[:first] + [self._segment(info, index)] + self._segs[first + len(run) :]
+            merged += len(run)
+            print(f"[INFO] FAISS 세그먼트 병합: {len(run)}개 → {info['name']} ({index.ntotal} rows)")
+        if merged:
+            with self._lock:
+                self.store.cleanup()
+        return merged
+
+    def _join_compactor(self):
+        if self._compactor is not None:
+            self._compactor.join()
+            self._compactor = None
+
+    def close(self):
+        """백그라운드 병합이 끝날 때까지 대기한 뒤 자원 정리"""
+        self._join_compactor()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        if self.items is not None:
+            self.items.close()
+            self.items = None
+
+    # --- 읽기 ---
+    @property
+    def ntotal(self) -> int:
+        return sum(s["ntotal"] for s in self._segs)
+
+    @property
+    def version(self):
+        """manifest 버전: 업서트/삭제/페이지 병합/세그먼트 병합/변환 커밋마다 바뀜 (검색 결과 캐시 무효화 기준)"""
+        return int(self.store.manifest.get("version", 0))
+
+    @property
+    def is_reduced(self) -> bool:
+        """차원 축소(IndexPreTransform) 인덱스 여부: 복원 벡터가 원본과 다름"""
+        return bool(self._segs) and isinstance(self._segs[0]["index"], self.faiss.IndexPreTransform)
+
+    @property
+    def is_lossy(self) -> bool:
+        """저장 벡터가 원본과 다른지 (차원 축소 또는 PQ/SQ 등 압축 코드)"""
+        if not self._segs or self.is_reduced:
+            return self.is_reduced
+        index = self._segs[0]["index"]
+        idmap = self._idmap_of(index)
+        if idmap is not None:
+            index = idmap.index
+        exact = (self.faiss.IndexFlat, self.faiss.IndexIVFFlat, self.faiss.IndexHNSWFlat)
+        return not isinstance(self.faiss.downcast_index(index), exact)
+
+    @property
+    def index_spec(self) -> str:
+        return (self.store.manifest.get("index") or {}).get("spec") or "Flat"
+
+    @property
+    def model_id(self) -> Optional[str]:
+        """저장된 벡터를 만든 임베더 model_id (기록 전 인덱스는 None)"""
+        return self.store.manifest.get("model_id")
+
+    def all_ids(self):
+        """저장된 전체 FAISS id (세그먼트 순서)"""
+        import numpy as np
+
+        if not self._segs:
+            return np.zeros(0, dtype="int64")
+        return np.concatenate([s["ids"] for s in self._segs])
+
+    def count(self) -> int:
+        return self.ntotal
+
+    def get_items(self, ids) -> List[Optional[Dict]]:
+        """FAISS id 목록 → 아이템(faiss_id, id, chunk_id, text, meta) 목록. -1/없는 id는 None"""
+        ids = [int(i) for i in ids]
+        if self.items is None:
+            return [None] * len(ids)
+        return self.items.get(ids)
+
+    def iter_items(self, batch: int = 2000):
+        """저장된 전체 아이템을 세그먼트 순서대로 순회"""
+        if self.items is None:
+            return
+        for s in self._segs:
+            ids = s["ids"].tolist()
+            for i in range(0, len(ids), batch):
+                for it in self.items.get(ids[i : i + batch]):
+                    if it is not None:
+                        yield it
+
+    def reconstruct(self, fid: int):
+        import numpy as np
+
+        for s in self._segs:
+            j = np.searchsorted(s["sorted_ids"], fid)
+            if j < len(s["sorted_ids"]) and s["sorted_ids"][j] == fid:
+                local = fid - s["id_base"] if s["id_base"] is not None else fid
+                self._direct_map(s["index"])
+                return s["index"].reconstruct(int(local))
+        raise KeyError(f"FAISS id {fid} 없음")
+
+    def reconstruct_n(self, start: int = 0, n: Optional[int] = None):
+        """세그먼트 순서로 이어 붙인 벡터 중 [start, start+n) (id 무관)"""
+        import numpy as np
+
+        stop = self.ntotal if n is None else min(self.ntotal, start + n)
+        parts = []
+        base = 0
+        for s in self._segs:
+            lo, hi = max(start, base), min(stop, base + s["ntotal"])
+            if lo < hi:
+                self._direct_map(s["index"])
+                if s["id_base"] is not None:
+                    parts.append(s["index"].reconstruct_n(lo - base, hi - lo))
+                else:
+                    parts.append(s["index"].reconstruct_batch(s["ids"][lo - base : hi - base]))
+            base += s["ntotal"]
+        if not parts:
+            return np.zeros((0, self.meta.get("dim") or 0), dtype="float32")
+        return np.vstack(parts)
+
+    def _selector_params(self, index, sel):
+        """IDSelector를 담은 검색 파라미터 (인덱스에 설정된 nprobe/efSearch 유지)"""
+        ivf = self.faiss.try_extract_index_ivf(index)
+        core = self._core(index)
+        if isinstance(core, self.faiss.IndexIDMap):
+            core = self.faiss.downcast_index(core.index)
+        hnsw = getattr(core, "hnsw", None)
+        if ivf is not None:
+            params = self.faiss.SearchParametersIVF()
+            params.nprobe = ivf.nprobe
+        elif hnsw is not None:
+            params = self.faiss.SearchParametersHNSW()
+            params.efSearch = hnsw.efSearch
+        else:
+            params = self.faiss.SearchParameters()
+        params.sel = sel
+        return params
+
+    def _empty_result(self, nq: int, k: int):
+        import numpy as np
+
+        fill = np.finfo("float32").min if self.metric == "IP" else np.finfo("float32").max
+        return np.full((nq, k), fill, dtype="float32"), np.full((nq, k), -1, dtype="int64")
+
+    def _search_segment(self, seg: Dict, q, k: int, allowed=None):
+        """allowed: 허용 FAISS id (정렬된 배열, None이면 전체). 세그먼트에 없으면 검색 생략"""
+        import numpy as np
+
+        if allowed is None:
+            D, I = seg["index"].search(q, k)
+        else:
+            local = np.intersect1d(seg["sorted_ids"], allowed, assume_unique=True)
+            if not len(local):
+                return self._empty_result(len(q), k)
+            if len(local) == seg["ntotal"]:
+                D, I = seg["index"].search(q, k)
+            else:
+                if seg["id_base"] is not None:
+                    local = local - seg["id_base"]
+                sel = self.faiss.IDSelectorBatch(local)
+                D, I = seg["index"].search(q, k, params=self._selector_params(seg["index"], sel))
+        if seg["id_base"]:
+            I = I + seg["id_base"] * (I >= 0)
+        return D, I
+
+    def lexical_search(self, query: str, k: int = 5, filter: Optional[Dict] = None):
+        """BM25 어휘 검색 (메타 SQLite FTS5) → (FAISS id 목록, 점수 목록). 점수는 클수록 관련
+        (한 질의 안의 순위용, 질의 사이에는 비교 불가: MetaStore.lexical_search)
+
+        manifest 세그먼트에 없는 id(중단된 업서트 잔여분)는 뺀다.
+        """
+        import numpy as np
+
+        from pipeline.lexical import match_query
+
+        if self.items is None:
+            return [], []
+        hits = self.items.lexical_search(match_query(query), k, filter)
+        live = []
+        for fid, score in hits:
+            for s in self._segs:
+                j = np.searchsorted(s["sorted_ids"], fid)
+                if j < len(s["sorted_ids"]) and s["sorted_ids"][j] == fid:
+                    live.append((fid, score))
+                    break
+        return [f for f, _ in live], [s for _, s in live]
+
+    def search(self, vectors, k: int = 5, filter: Optional[Dict] = None):
+        """주어진 벡터에 대해 세그먼트별 FAISS 검색 후 전역 top-k 병합 (I는 FAISS id)
+
+        filter: {"doc_id", "block_type", "source", "pages"} 조건 (pipeline.meta_store.filter_clauses).
+        posting 테이블로 구한 id 집합을 IDSelector로 넘겨 FAISS 안에서 거르므로(사전 필터링)
+        Flat은 조건 안에서의 정확한 top-k, 조건에 맞는 행이 없는 세그먼트는 검색하지 않는다.
+        """
+        import numpy as np
+
+        segs = self._segs
+        if not segs:
+            raise RuntimeError("FAISS 인덱스가 존재하지 않습니다")
+
+        q = np.ascontiguousarray(vectors, dtype="float32")
+        allowed = self.items.filter_ids(filter) if filter and self.items is not None else None
+        if allowed is not None and not len(allowed):
+            return self._empty_result(len(q), k)
+        if len(segs) == 1:
+            return self._search_segment(segs[0], q, k, allowed)
+        if self._executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            n = self.search_threads or min(len(segs), os.cpu_count() or 1)
+            self._executor = ThreadPoolExecutor(max_workers=n, thread_name_prefix="faiss-seg")
+        res = list(self._executor.map(lambda s: self._search_segment(s, q, k, allowed), segs))
+        return merge_topk([d for d, _ in res], [i for _, i in res], k, self.metric)
+
+
+def open_vector_sink(vcfg: Dict, readonly: bool = False):
+    """vector_sink 설정(type: json | milvus | faiss)으로 검색/업서트용 저장소 열기"""
+    typ = vcfg.get("type", "faiss")
+    if typ == "milvus":
+        return MilvusVectorSink(vcfg.get("milvus", {}))
+    if typ == "json":
+        return JSONVectorSink(
+            vcfg.get("json_path", "./data/index.json"),
+            metric=vcfg.get("json_metric", "L2"),
+            block_rows=vcfg.get("json_block_rows", 65536),
+        )
+    return open_faiss_sink(vcfg.get("faiss", {}), readonly)
+
+
+def open_faiss_sink(cfg: Dict, readonly: bool = False):
+    """vector_sink.faiss 설정으로 FAISS 저장소 열기 (샤딩 설정/샤드 목록이 있으면 ShardedFaissSink)
 
-        q = np.array(vectors, dtype="float32")
-        return self.index.search(q, k)
+    readonly: 검색 전용 mmap 로드 (설정 mmap_search: false 이면 일반 로드)
+    """
+    from pipeline.sharded_sink import ShardedFaissSink, is_sharded
 
+    readonly = readonly and cfg.get("mmap_search", True)
+    return ShardedFaissSink(cfg, readonly) if is_sharded(cfg) else FaissVectorSink(cfg, readonly)
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+배치 검색 (평가/분석용 대량 질의)
+
+    python scripts/batch_search.py --input queries.jsonl --output results.jsonl --k 10
+    cat queries.txt | python scripts/batch_search.py --k 20 > results.jsonl
+
+- 입력: 한 줄에 질의 하나. JSON 객체면 {"qid": ..., "query": ..., "k": ..., "filter": {...}},
+  그 밖의 줄은 질의 문장 그대로 (qid = 줄 번호)
+- 모델/인덱스를 한 번만 로드하고 --batch 개씩 읽어 encode 1회 + index.search 1회(필터 조합별 1회)로 처리
+- 결과는 블록마다 JSONL로 바로 내보냄 (qid, query, hits[rank, score, faiss_id, doc_id, pages, heading_path ...])
+- 처리량(queries/sec)과 단계별 시간은 stderr로 출력
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def read_blocks(f, size: int):
+    """입력 줄 → 질의 dict 블록 (빈 줄은 건너뜀)"""
+    block = []
+    for lineno, line in enumerate(f, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        q = {"query": line}
+        if line.startswith("{"):
+            try:
+                q = json.loads(line)
+            except json.JSONDecodeError:
+                pass
+            if not q.get("query"):
+                print(f"[WARN] {lineno}번째 줄: query 없음, 건너뜀", file=sys.stderr)
+                continue
+        q.setdefault("qid", lineno)
+        block.append(q)
+        if len(block) >= size:
+            yield block
+            block = []
+    if block:
+        yield block
+
+
+def search_block(sink, qv, block, k_default: int, with_text: bool, hybrid_cfg=None):
+    """필터 조합별로 묶어 다중 질의 search 1회 → 질의별 결과 (입력 순서)
+
+    hybrid_cfg: 주면 벡터 + BM25 어휘 검색을 RRF로 결합 (pipeline/lexical.py)
+    """
+    from pipeline.lexical import hybrid_search
+    from pipeline.search_service import make_hits
+
+    groups = {}
+    for i, q in enumerate(block):
+        key = json.dumps(q.get("filter") or None, sort_keys=True, ensure_ascii=False)
+        groups.setdefault(key, []).append(i)
+
+    t_search = t_meta = 0.0
+    out = [None] * len(block)
+    for key, idx in groups.items():
+        flt = json.loads(key)
+        kmax = max(int(block[i].get("k") or k_default) for i in idx)
+        t0 = time.perf_counter()
+        if hybrid_cfg is not None:
+            D, I = hybrid_search(sink, qv[idx], [block[i]["query"] for i in idx], kmax, flt, hybrid_cfg)
+        elif flt:
+            D, I = sink.search(qv[idx], k=kmax, filter=flt)
+        else:
+            D, I = sink.search(qv[idx], k=kmax)
+        t1 = time.perf_counter()
+        # 블록 전체의 결과 행을 한 번에 조회
+        flat = [int(x) for x in I.ravel() if x >= 0]
+        found = dict(zip(flat, sink.get_items(flat)))
+        for row, i in enumerate(idx):
+            k = int(block[i].get("k") or k_default)
+            items = [found.get(int(x)) for x in I[row, :k]]
+            out[i] = make_hits(D[row, :k], I[row, :k], items, text=with_text)
+        t_search += t1 - t0
+        t_meta += time.perf_counter() - t1
+    return out, t_search, t_meta
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="./configs/config.yaml", help="설정 파일 경로")
+    ap.add_argument("--input", default="-", help="질의 파일 (JSONL 또는 한 줄 한 질의, 기본: stdin)")
+    ap.add_argument("--output", default="-", help="결과 JSONL 경로 (기본: stdout)")
+    ap.add_argument("--k", type=int, default=10, help="질의별 결과 수 (줄에 k가 있으면 그 값)")
+    ap.add_argument("--batch", type=int, default=256, help="한 번에 임베딩/검색할 질의 수")
+    ap.add_argument("--text", action="store_true", help="결과에 청크 본문 포함")
+    ap.add_argument("--mode", default=None, choices=["dense", "hybrid"],
+                    help="dense=벡터만, hybrid=BM25 RRF 결합 (기본: config vector_sink.faiss.hybrid.enabled)")
+    args = ap.parse_args()
+
+    import numpy as np
+    import yaml
+
+    from pipeline.embedder import get_embedder
+    from pipeline.vector_sink import open_vector_sink
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+
+    t_load = time.perf_counter()
+    sink = open_vector_sink(cfg["vector_sink"], readonly=True)
+    if sink.ntotal == 0:
+        raise SystemExit("[ERROR] 벡터 인덱스가 비어 있습니다 → 먼저 ingest.py로 색인하세요.")
+    hcfg = (cfg["vector_sink"].get("faiss") or {}).get("hybrid") or {}
+    mode = args.mode or ("hybrid" if hcfg.get("enabled", True) else "dense")
+    if mode == "hybrid" and not hasattr(sink, "lexical_search"):
+        print("[WARN] 이 벡터 저장소에는 어휘 색인이 없어 dense로 검색합니다", file=sys.stderr)
+        mode = "dense"
+    emb = get_embedder(cfg["embedder"])
+    t_load = time.perf_counter() - t_load
+    print(f"[INFO] 모델/인덱스 로드 {t_load:.2f}s (ntotal={sink.ntotal}, mode={mode})", file=sys.stderr)
+
+    fin = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    fout = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    n = 0
+    t_embed = t_search = t_meta = 0.0
+    t_start = time.perf_counter()
+    try:
+        for block in read_blocks(fin, args.batch):
+            t0 = time.perf_counter()
+            qv = np.ascontiguousarray(emb.encode([q["query"] for q in block]), dtype="float32")
+            t_embed += time.perf_counter() - t0
+            results, ts, tm = search_block(sink, qv, block, args.k, args.text, hcfg if mode == "hybrid" else None)
+            t_search += ts
+            t_meta += tm
+            for q, hits in zip(block, results):
+                rec = {"qid": q["qid"], "query": q["query"], "hits": hits}
+                if q.get("filter"):
+                    rec["filter"] = q["filter"]
+                fout.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            fout.flush()
+            n += len(block)
+            el = time.perf_counter() - t_start
+            print(f"[INFO] {n} queries ({n / el:.1f} q/s)", file=sys.stderr)
+    finally:
+        if fin is not sys.stdin:
+            fin.close()
+        if fout is not sys.stdout:
+            fout.close()
+        emb.close()
+        sink.close()
+
+    el = time.perf_counter() - t_start
+    print(
+        f"[OK] {n} queries in {el:.2f}s → {n / el if el else 0:.1f} q/s "
+        f"(embed {t_embed:.2f}s, search {t_search:.2f}s, meta {t_meta:.2f}s)",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CPU 임베딩 배치 벤치마크: 고정 batch_size vs 토큰 예산 길이 버킷
+- 입력: 샘플 청크 메타(*.faiss.meta.json)
+- 출력: 방식별 texts/s, 패딩 비율, 결과 벡터 최대 오차
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pipeline.batching import estimate_lengths, token_budget_batches
+from pipeline.embedder import _st_encode
+from scripts.rechunk_meta import load_items
+
+
+def padding_ratio(lengths, batches):
+    """배치 내 최대 길이로 패딩했을 때 전체 토큰 중 패딩 비율"""
+    real = sum(lengths)
+    padded = sum(max(lengths[i] for i in b) * len(b) for b in batches)
+    return 1.0 - real / max(padded, 1)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument(
+        "--meta",
+        nargs="+",
+        default=[
+            "./data/sample_index.faiss.meta.json",
+            "./data/sample_index_rechunk.faiss.meta.json",
+        ],
+        help="청크 메타 JSON 경로(여러 개 가능)",
+    )
+    ap.add_argument("--model", default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    ap.add_argument("--batch_size", type=int, default=16, help="고정 배치 크기")
+    ap.add_argument("--token_budget", type=int, default=4096, help="버킷 배치 토큰 예산")
+    ap.add_argument("--repeat", type=int, default=2, help="반복 측정 횟수(최솟값 사용)")
+    args = ap.parse_args()
+
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(args.model, device="cpu")
+    for path in args.meta:
+        texts = [it.get("text", "") for it in load_items(path)]
+        lengths = estimate_lengths(texts, model.tokenizer, model.max_seq_length)
+        fixed = [list(range(i, min(i + args.batch_size, len(texts)))) for i in range(0, len(texts), args.batch_size)]
+        bucketed = token_budget_batches(lengths, args.token_budget)
+
+        results = {}
+        for name, budget in (("fixed", None), ("bucketed", args.token_budget)):
+            best = float("inf")
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                embs = _st_encode(model, texts, args.batch_size, budget)
+                best = min(best, time.perf_counter() - t0)
+            results[name] = (best, np.asarray(embs, dtype="float32"))
+
+        diff = float(np.abs(results["fixed"][1] - results["bucketed"][1]).max())
+        print(f"=== {path} ({len(texts)} texts, 평균 {np.mean(lengths):.0f} tokens) ===")
+        print(f"fixed    bs={args.batch_size:<5} {len(texts) / results['fixed'][0]:8.1f} texts/s  padding={padding_ratio(lengths, fixed):.1%}")
+        print(f"bucketed tok={args.token_budget:<4} {len(texts) / results['bucketed'][0]:8.1f} texts/s  padding={padding_ratio(lengths, bucketed):.1%}  batches={len(bucketed)}")
+        print(f"max |Δ| = {diff:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+CLI 시작 시간 점검 (-X importtime 리포트)
+- 각 엔트리포인트를 `python -X importtime <script> --help` 로 실행
+- 누적 임포트 시간 상위 모듈과 전체 시간을 출력
+- 무거운 선택 백엔드(fitz, cv2, torch, faiss ...)가 --help 단계에서 로드되거나
+  예산(--budget_ms)을 넘으면 종료 코드 1 → 시작 시간 회귀 방지용
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRYPOINTS = [
+    "ingest.py",
+    "scripts/search.py",
+    "scripts/faiss_search.py",
+    "scripts/faiss_info.py",
+    "scripts/rechunk_meta.py",
+    "scripts/reindex.py",
+    "scripts/search_server.py",
+]
+
+# --help 에서 절대 로드되면 안 되는 최상위 패키지
+FORBIDDEN = [
+    "fitz",
+    "cv2",
+    "pytesseract",
+    "pykospacing",
+    "tensorflow",
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "onnxruntime",
+    "faiss",
+    "openai",
+    "pymilvus",
+]
+
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def importtime(script: str) -> Tuple[float, List[Tuple[str, int, int]]]:
+    """(wall ms, [(모듈, self us, cumulative us), ...])"""
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", script, "--help"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    wall = (time.perf_counter() - t0) * 1000.0
+    mods = []
+    for ln in proc.stderr.splitlines():
+        m = LINE.match(ln)
+        if m:
+            mods.append((m.group(4), int(m.group(1)), int(m.group(2))))
+    if proc.returncode != 0:
+        print(proc.stderr[-2000:])
+        raise RuntimeError(f"{script} --help 실패 (exit {proc.returncode})")
+    return wall, mods
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("scripts", nargs="*", default=ENTRYPOINTS, help="점검할 스크립트 (기본: 주요 CLI)")
+    ap.add_argument("--budget_ms", type=float, default=400.0, help="스크립트별 임포트 누적 시간 예산")
+    ap.add_argument("--top", type=int, default=8, help="출력할 상위 모듈 수")
+    args = ap.parse_args()
+
+    failed = False
+    for script in args.scripts:
+        wall, mods = importtime(script)
+        total_ms = sum(s for _, s, _ in mods) / 1000.0
+        loaded = {name.split(".")[0] for name, _, _ in mods}
+        bad = sorted(loaded & set(FORBIDDEN))
+        # 최상위 모듈(들여쓰기 없는 줄) 기준 누적 시간 상위
+        top: Dict[str, int] = {}
+        for name, _, cum in mods:
+            root = name.split(".")[0]
+            top[root] = max(top.get(root, 0), cum)
+        status = "OK"
+        if bad or total_ms > args.budget_ms:
+            status = "FAIL"
+            failed = True
+        print(f"=== {script}: import {total_ms:.0f}ms (wall {wall:.0f}ms) [{status}] ===")
+        for root, cum in sorted(top.items(), key=lambda x: -x[1])[: args.top]:
+            print(f"  {cum / 1000.0:8.1f}ms  {root}")
+        if bad:
+            print(f"  [FAIL] --help 에서 무거운 백엔드 로드: {', '.join(bad)}")
+        if total_ms > args.budget_ms:
+            print(f"  [FAIL] 예산 초과: {total_ms:.0f}ms > {args.budget_ms:.0f}ms")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+메타 로드 시간 비교: 단일 meta.json 전체 파싱 vs SQLite 메타 저장소에서 k행 조회
+- 합성 청크 N개(기본 100만)로 meta.json과 SQLite를 만든 뒤
+  각 방식을 새 프로세스에서 실행해 "열기 + 상위 k행 조회" 시간과 최대 RSS를 잰다.
+- SQLite는 pipeline/meta_store.py (FaissVectorSink가 쓰는 것과 동일)
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+_SYLLABLES = "가나다라마바사아자차카타파하교육과정평가성취수준학생교사수업"
+
+
+def synth_items(n: int, text_chars: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(n):
+        text = "".join(rng.choice(_SYLLABLES) for _ in range(text_chars))
+        yield {
+            "id": f"{i:032x}",
+            "chunk_id": f"chunk-{i:07d}",
+            "text": text,
+            "meta": {
+                "pages": [1 + i // 20],
+                "heading_path": ["Ⅰ. 서론", f"{1 + i % 9}. 절"],
+                "source": "pdf_text",
+                "block_type": "paragraph",
+            },
+        }
+
+
+def build(n: int, text_chars: int, out_dir: str):
+    from pipeline.meta_store import MetaStore
+
+    json_path = os.path.join(out_dir, "bench.faiss.meta.json")
+    db_path = os.path.join(out_dir, "bench.sqlite")
+    t0 = time.perf_counter()
+    # 기존 FaissVectorSink 메타 파일과 같은 {"items": [...]} 구조 (메모리 절약을 위해 스트리밍 기록)
+    with open(json_path, "w", encoding="utf-8") as f:
+        f.write('{"dim": 1024, "metric": "IP", "items": [\n')
+        for i, it in enumerate(synth_items(n, text_chars)):
+            f.write((",\n" if i else "") + json.dumps(it, ensure_ascii=False))
+        f.write("\n]}")
+    t_json = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    store = MetaStore(db_path)
+    batch, start = [], 0
+    for it in synth_items(n, text_chars):
+        batch.append(it)
+        if len(batch) == 10000:
+            start += store.put(range(start, start + len(batch)), batch)
+            batch = []
+    store.put(range(start, start + len(batch)), batch)
+    store.close()
+    t_db = time.perf_counter() - t0
+    print(
+        f"[INFO] 생성: meta.json {os.path.getsize(json_path) / 2**20:.0f}MB ({t_json:.1f}s), "
+        f"sqlite {os.path.getsize(db_path) / 2**20:.0f}MB ({t_db:.1f}s)"
+    )
+    return json_path, db_path
+
+
+def child(mode: str, path: str, n: int, k: int):
+    rows = random.Random(1).sample(range(n), k)
+    t0 = time.perf_counter()
+    if mode == "json":
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f)["items"]
+        hits = [items[r] for r in rows]
+    else:
+        from pipeline.meta_store import MetaStore
+
+        hits = MetaStore(path, readonly=True).get(rows)
+    dt = time.perf_counter() - t0
+    assert all(h is not None for h in hits)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({"mode": mode, "seconds": dt, "max_rss_mb": rss}))
+
+
+def run_child(mode: str, path: str, n: int, k: int):
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", mode, "--path", path, "--n", str(n), "--k", str(k)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=1_000_000, help="합성 청크 수")
+    ap.add_argument("--text_chars", type=int, default=300, help="청크당 글자 수")
+    ap.add_argument("--k", type=int, default=10, help="조회할 행 수 (검색 top-k)")
+    ap.add_argument("--dir", default=None, help="작업 디렉터리 (기본: 임시 디렉터리)")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--path", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        return child(args.child, args.path, args.n, args.k)
+
+    out_dir = args.dir or tempfile.mkdtemp()
+    os.makedirs(out_dir, exist_ok=True)
+    json_path, db_path = build(args.n, args.text_chars, out_dir)
+    print(f"=== 메타 로드 + top-{args.k} 조회 (n={args.n}) ===")
+    print(f"{'store':<10}{'seconds':>10}{'max_rss_mb':>12}")
+    for mode, path in (("json", json_path), ("sqlite", db_path)):
+        r = run_child(mode, path, args.n, args.k)
+        print(f"{mode:<10}{r['seconds']:>10.3f}{r['max_rss_mb']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
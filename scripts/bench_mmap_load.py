@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FAISS 인덱스 로드 비교: 힙 로드(기존) vs mmap 읽기 전용(vector_sink.faiss.mmap_search)
+- 합성 벡터 N개(또는 --index 로 기존 인덱스)를 FaissVectorSink 세그먼트로 만든 뒤
+  각 방식을 새 프로세스에서 열어 "열기 시간 / 첫 질의 지연 / RSS / PSS"를 잰다.
+- --workers W: 같은 방식으로 W개 프로세스를 동시에 띄워 모두 로드된 뒤의 PSS를 잰다.
+  (PSS는 공유 페이지를 프로세스 수로 나눈 값 → mmap이면 워커가 늘수록 1인당 PSS가 줄어듦)
+- --drop_caches: 방식마다 페이지 캐시를 비우고 측정 (root 필요, 콜드 스타트)
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def build(n: int, dim: int, out_dir: str, index_cfg: dict) -> dict:
+    import numpy as np
+
+    from pipeline.vector_sink import FaissVectorSink
+
+    cfg = {"index_path": os.path.join(out_dir, "bench.faiss"), "index": index_cfg}
+    sink = FaissVectorSink(cfg)
+    if sink.ntotal:
+        print(f"[INFO] 기존 벤치 인덱스 사용: {sink.ntotal} rows ({sink.index_spec})")
+        sink.close()
+        return cfg
+    rng = np.random.default_rng(0)
+    t0 = time.perf_counter()
+    step = 50000
+    for s in range(0, n, step):
+        m = min(step, n - s)
+        vecs = rng.standard_normal((m, dim), dtype="float32")
+        # 배치마다 다른 doc_id (같은 doc_id로 업서트하면 문서 교체가 됨)
+        meta = {"doc_id": f"bench-{s // step}"}
+        chunks = [{"id": f"{s + i:08d}", "chunk_id": f"chunk-{s + i:07d}", "text": "", "meta": meta} for i in range(m)]
+        sink.upsert(chunks, vecs)
+    sink.compact()
+    print(f"[INFO] 생성: {sink.ntotal} rows × {dim}d ({sink.index_spec}, {time.perf_counter() - t0:.1f}s)")
+    sink.close()
+    return cfg
+
+
+def _mem_mb():
+    """(현재 RSS, PSS) MB. PSS는 /proc/self/smaps_rollup (리눅스 4.14+)"""
+    rss = pss = None
+    try:
+        with open("/proc/self/status") as f:
+            for ln in f:
+                if ln.startswith("VmRSS:"):
+                    rss = int(ln.split()[1]) / 1024
+        with open("/proc/self/smaps_rollup") as f:
+            for ln in f:
+                if ln.startswith("Pss:"):
+                    pss = int(ln.split()[1]) / 1024
+    except OSError:
+        pass
+    return rss, pss
+
+
+def child(mode: str, cfg_json: str, hold: float):
+    import numpy as np
+
+    import faiss  # noqa: F401  (임포트 시간은 로드 시간에서 제외)
+    from pipeline.vector_sink import open_faiss_sink
+
+    cfg = json.loads(cfg_json)
+    cfg["mmap_search"] = True
+    base_rss, _ = _mem_mb()
+    t0 = time.perf_counter()
+    sink = open_faiss_sink(cfg, readonly=(mode == "mmap"))
+    t_open = time.perf_counter() - t0
+    q = np.random.default_rng(1).standard_normal((1, sink.meta["dim"]), dtype="float32")
+    t0 = time.perf_counter()
+    sink.search(q, 10)
+    t_query = time.perf_counter() - t0
+    # 동시 워커가 모두 로드될 때까지 대기한 뒤 공유 후 메모리를 잰다
+    time.sleep(hold)
+    rss, pss = _mem_mb()
+    sink.close()
+    print(json.dumps({
+        "mode": mode,
+        "open_s": t_open,
+        "query_s": t_query,
+        "rss_mb": rss - base_rss if rss is not None else None,
+        "pss_mb": pss,
+    }))
+
+
+def run_mode(mode: str, cfg: dict, workers: int, hold: float):
+    cmd = [sys.executable, __file__, "--child", mode, "--cfg", json.dumps(cfg), "--hold", str(hold)]
+    procs = [subprocess.Popen(cmd, stdout=subprocess.PIPE, text=True) for _ in range(workers)]
+    out = []
+    for p in procs:
+        stdout, _ = p.communicate()
+        if p.returncode:
+            raise SystemExit(f"[ERROR] {mode} 워커 실패 (exit {p.returncode})")
+        out.append(json.loads(stdout.strip().splitlines()[-1]))
+    return out
+
+
+def drop_caches() -> bool:
+    try:
+        os.sync()
+        with open("/proc/sys/vm/drop_caches", "w") as f:
+            f.write("3\n")
+        return True
+    except OSError:
+        return False
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--n", type=int, default=200_000, help="합성 벡터 수")
+    ap.add_argument("--dim", type=int, default=384, help="벡터 차원")
+    ap.add_argument("--type", default="flat", help="flat | hnsw | ivf_flat | ivf_pq (합성 인덱스 종류)")
+    ap.add_argument("--nlist", type=int, default=1024, help="ivf_* 리스트 수")
+    ap.add_argument("--index", default=None, help="기존 FAISS 인덱스 경로 (지정 시 합성 생략)")
+    ap.add_argument("--workers", type=int, default=1, help="동시 워커 프로세스 수")
+    ap.add_argument("--hold", type=float, default=None, help="로드 후 대기 초 (기본: 워커>1이면 3초)")
+    ap.add_argument("--drop_caches", action="store_true", help="방식마다 페이지 캐시 비우기 (root)")
+    ap.add_argument("--dir", default=None, help="작업 디렉터리 (기본: 임시 디렉터리)")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--cfg", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        return child(args.child, args.cfg, args.hold or 0.0)
+
+    if args.index:
+        cfg = {"index_path": args.index}
+    else:
+        out_dir = args.dir or tempfile.mkdtemp()
+        os.makedirs(out_dir, exist_ok=True)
+        cfg = build(args.n, args.dim, out_dir, {"type": args.type, "nlist": args.nlist})
+    hold = args.hold if args.hold is not None else (3.0 if args.workers > 1 else 0.0)
+
+    print(f"=== 인덱스 로드 ({cfg['index_path']}, workers={args.workers}) ===")
+    print(f"{'mode':<8}{'open_ms':>10}{'query_ms':>10}{'rss_mb':>10}{'pss_mb':>10}")
+    for mode in ("heap", "mmap"):
+        if args.drop_caches and not drop_caches():
+            print("[WARN] drop_caches 실패 (root 권한 필요) → 웜 캐시로 측정")
+        rs = run_mode(mode, cfg, args.workers, hold)
+        avg = {k: sum(r[k] or 0 for r in rs) / len(rs) for k in ("open_s", "query_s", "rss_mb", "pss_mb")}
+        print(
+            f"{mode:<8}{avg['open_s'] * 1000:>10.1f}{avg['query_s'] * 1000:>10.2f}"
+            f"{avg['rss_mb']:>10.0f}{avg['pss_mb']:>10.0f}"
+        )
+    if args.workers > 1:
+        print("[INFO] rss/pss는 워커 평균. PSS 합계 ≈ 전체 물리 메모리 사용량")
+
+
+if __name__ == "__main__":
+    main()
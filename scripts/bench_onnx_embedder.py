@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+ONNX(int8) 임베더 정확도·처리량 점검
+- 샘플 청크에 대해 fp32 SentenceTransformer 벡터와의 코사인 유사도(평균/최소)
+- 두 경로의 CPU texts/s 비교, top-k 검색 결과 일치율
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pipeline.embedder import LocalSBERTEmbedder, OnnxEmbedder
+from scripts.rechunk_meta import load_items
+
+
+def timed_encode(emb, texts):
+    t0 = time.perf_counter()
+    m = emb.encode(texts)
+    return m, len(texts) / max(time.perf_counter() - t0, 1e-9)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--meta", default="./data/sample_index.faiss.meta.json", help="샘플 청크 메타 JSON")
+    ap.add_argument("--model", default="sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+    ap.add_argument("--onnx_dir", default=None, help="ONNX 내보내기 디렉터리")
+    ap.add_argument("--batch_size", type=int, default=16)
+    ap.add_argument("--k", type=int, default=10, help="검색 일치율 계산용 top-k")
+    ap.add_argument("--min_cos", type=float, default=0.99, help="평균 코사인 허용 하한")
+    args = ap.parse_args()
+
+    texts = [it.get("text", "") for it in load_items(args.meta)]
+    ref = LocalSBERTEmbedder(args.model, normalize=True, batch_size=args.batch_size)
+    onnx = OnnxEmbedder(args.model, onnx_dir=args.onnx_dir, normalize=True, batch_size=args.batch_size)
+
+    # 워밍업 후 측정
+    ref.encode(texts[:8])
+    onnx.encode(texts[:8])
+    v_ref, tps_ref = timed_encode(ref, texts)
+    v_onnx, tps_onnx = timed_encode(onnx, texts)
+
+    cos = np.einsum("ij,ij->i", v_ref, v_onnx)
+    k = min(args.k, len(texts))
+    top_ref = np.argsort(-(v_ref @ v_ref.T), axis=1)[:, :k]
+    top_onnx = np.argsort(-(v_onnx @ v_onnx.T), axis=1)[:, :k]
+    overlap = np.mean([len(set(a) & set(b)) / k for a, b in zip(top_ref, top_onnx)])
+
+    print(f"=== {args.meta} ({len(texts)} texts) ===")
+    print(f"fp32 torch : {tps_ref:8.1f} texts/s")
+    print(f"onnx int8  : {tps_onnx:8.1f} texts/s  (x{tps_onnx / tps_ref:.2f})")
+    print(f"cosine     : mean={cos.mean():.4f} min={cos.min():.4f}")
+    print(f"top-{k} 일치율: {overlap:.1%}")
+    if cos.mean() < args.min_cos:
+        print(f"[FAIL] 평균 코사인 {cos.mean():.4f} < {args.min_cos}")
+        sys.exit(1)
+    print("[OK] 정확도 기준 통과")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+차원 축소 recall 리포트: 전체 차원 Flat 검색 대비 PCA / 절단(truncate) recall@k
+- 입력: 기존 (Flat) FAISS 인덱스의 벡터
+- 질의: --queries 파일(줄당 1문장, config 임베더로 임베딩) 또는 코퍼스 벡터 샘플(자기 자신 제외)
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+import faiss
+import numpy as np
+import yaml
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pipeline.vector_sink import FaissVectorSink
+
+
+def topk(index, q, k, exclude=None):
+    D, I = index.search(q, k + (1 if exclude is not None else 0))
+    if exclude is None:
+        return I
+    return np.array([[j for j in row if j != ex][:k] for row, ex in zip(I, exclude)])
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="./configs/config.yaml", help="설정 파일 경로")
+    ap.add_argument("--index", default=None, help="FAISS 인덱스 (기본: config의 index_path)")
+    ap.add_argument("--queries", default=None, help="질의 문장 파일(줄당 1개)")
+    ap.add_argument("--n_queries", type=int, default=200, help="코퍼스 샘플 질의 수")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--dims", default="32,64,96,128,192,256", help="비교할 축소 차원 목록")
+    ap.add_argument("--methods", default="pca,truncate")
+    args = ap.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    fcfg = cfg["vector_sink"]["faiss"]
+    index_path = args.index or fcfg.get("index_path", "./data/index.faiss")
+    src = FaissVectorSink({**fcfg, "index_path": index_path})
+    if src.is_lossy:
+        raise SystemExit("[ERROR] 이미 차원 축소/압축된 인덱스입니다. 전체 차원 Flat 인덱스를 지정하세요")
+    xb = src.reconstruct_n()
+    metric = src.metric
+    full = faiss.IndexFlatIP(xb.shape[1]) if metric == "IP" else faiss.IndexFlatL2(xb.shape[1])
+    full.add(xb)
+
+    exclude = None
+    if args.queries:
+        from pipeline.embedder import get_embedder
+
+        with open(args.queries, "r", encoding="utf-8") as f:
+            qs = [ln.strip() for ln in f if ln.strip()]
+        xq = get_embedder(cfg["embedder"]).encode(qs)
+    else:
+        rng = np.random.default_rng(0)
+        exclude = rng.choice(len(xb), min(args.n_queries, len(xb)), replace=False)
+        xq = xb[exclude]
+    k = min(args.k, full.ntotal - 1)
+    gt = topk(full, xq, k, exclude)
+
+    print(f"=== {index_path}: n={full.ntotal} d={full.d} metric={metric} queries={len(xq)} k={k} ===")
+    print(f"{'method':<10}{'dim':>6}{'recall@k':>10}{'bytes/vec':>11}")
+    tmp = tempfile.mkdtemp()
+    for method in args.methods.split(","):
+        for d in (int(x) for x in args.dims.split(",")):
+            if d >= full.d or (method == "pca" and d > len(xb)):
+                continue
+            # 파일은 만들지 않고 인덱스 구성만 재사용
+            sink = FaissVectorSink(
+                {
+                    "index_path": os.path.join(tmp, "bench.faiss"),
+                    "metric": metric,
+                    "reduce": {"method": method, "dim": d},
+                }
+            )
+            idx = sink._create_index(full.d)
+            if not idx.is_trained:
+                idx.train(xb)
+            idx.add_with_ids(xb, np.arange(len(xb), dtype="int64"))
+            res = topk(idx, xq, k, exclude)
+            recall = np.mean([len(set(a) & set(b)) / k for a, b in zip(gt, res)])
+            print(f"{method:<10}{d:>6}{recall:>10.3f}{d * 4:>11}")
+    print(f"{'full':<10}{full.d:>6}{1.0:>10.3f}{full.d * 4:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+임베딩 batch_size / 스레드 수 캘리브레이션
+- 기존 청크 메타에서 실제 텍스트를 샘플링해 get_embedder(calibrate=...) 실행
+- 결과는 embedder.autotune.path(기본 ./data/autotune.json)에 모델·호스트별로 저장
+- embedder.token_budget 이 있으면 batch_size 대신 token_budget 을 스윕 (실행 때와 같은 배치 방식)
+"""
+import argparse
+import os
+import random
+import sys
+
+import yaml
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pipeline.embedder import get_embedder
+from scripts.rechunk_meta import load_items
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="./configs/config.yaml", help="설정 파일 경로")
+    ap.add_argument("--meta", default=None, help="샘플 청크 메타 JSON (기본: config의 index_path)")
+    ap.add_argument("--n", type=int, default=256, help="샘플 텍스트 수")
+    ap.add_argument("--batch_sizes", default=None, help="예: 4,8,16,32,64 (token_budget 미사용 시)")
+    ap.add_argument("--token_budgets", default=None, help="예: 2048,4096,8192 (embedder.token_budget 사용 시)")
+    ap.add_argument("--threads", default=None, help="예: 1,2,4,8")
+    ap.add_argument("--max_rss_mb", type=float, default=None, help="허용 최대 RSS(MB)")
+    args = ap.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    meta = args.meta or cfg["vector_sink"]["faiss"].get("index_path", "./data/index.faiss")
+    texts = [it.get("text", "") for it in load_items(meta) if it.get("text")]
+    random.Random(0).shuffle(texts)
+    texts = texts[: args.n]
+    print(f"[INFO] 캘리브레이션 샘플: {len(texts)} texts ({meta})")
+
+    ecfg = dict(cfg["embedder"])
+    acfg = dict(ecfg.get("autotune") or {})
+    if args.batch_sizes:
+        acfg["batch_sizes"] = [int(x) for x in args.batch_sizes.split(",")]
+    if args.token_budgets:
+        acfg["token_budgets"] = [int(x) for x in args.token_budgets.split(",")]
+    if args.threads:
+        acfg["threads"] = [int(x) for x in args.threads.split(",")]
+    if args.max_rss_mb is not None:
+        acfg["max_rss_mb"] = args.max_rss_mb
+    ecfg["autotune"] = acfg
+    get_embedder(ecfg, calibrate=texts).close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+저장된 벡터로 FAISS 인덱스 종류 변환 (재임베딩 없음) / 검색 파라미터 조정
+- vector_sink.faiss.index 설정(또는 --type 등 인자)대로 새 템플릿을 샘플로 학습한 뒤
+  세그먼트별로 벡터를 옮겨 담고 manifest 교체로 전환한다. FAISS id와 메타는 그대로.
+- 변환 전 인덱스로 구한 top-k와 비교해 recall@k / 질의 지연을 출력
+- --nprobe / --efSearch 만 주면 변환 없이 검색 파라미터만 manifest에 저장
+"""
+import argparse
+import os
+import sys
+import time
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def sample_queries(sink, n: int, seed: int = 0):
+    """저장된 벡터 일부를 질의로 사용 (질의 공간 = 임베딩 공간)"""
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    ids = sink.all_ids()
+    pick = rng.choice(ids, min(n, len(ids)), replace=False)
+    return np.vstack([sink.reconstruct(int(i)) for i in pick]).astype("float32")
+
+
+def timed_search(sink, q, k: int):
+    t0 = time.perf_counter()
+    _, I = sink.search(q, k)
+    return I, (time.perf_counter() - t0) * 1000 / len(q)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="./configs/config.yaml", help="설정 파일 경로")
+    ap.add_argument("--index", default=None, help="FAISS 인덱스 경로 (기본: config의 index_path)")
+    ap.add_argument("--type", default=None, help="flat | hnsw | ivf_flat | ivf_pq | factory (기본: config)")
+    ap.add_argument("--factory", default=None, help="index_factory 문자열 (--type factory)")
+    ap.add_argument("--nlist", type=int, default=None, help="IVF 리스트 수")
+    ap.add_argument("--M", type=int, default=None, help="HNSW 이웃 수")
+    ap.add_argument("--nprobe", type=int, default=None, help="IVF 검색 리스트 수")
+    ap.add_argument("--efSearch", type=int, default=None, help="HNSW 검색 후보 수")
+    ap.add_argument("--queries", type=int, default=200, help="recall 측정 질의 수 (0=측정 안 함)")
+    ap.add_argument("--k", type=int, default=10, help="recall@k")
+    args = ap.parse_args()
+
+    import numpy as np
+    import yaml
+
+    from pipeline.vector_sink import open_faiss_sink
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    fcfg = dict(cfg["vector_sink"]["faiss"])
+    if args.index:
+        fcfg["index_path"] = args.index
+        fcfg.pop("meta_path", None)
+    icfg = dict(fcfg.get("index") or {})
+    for key in ("type", "factory", "nlist", "M", "nprobe", "efSearch"):
+        if getattr(args, key) is not None:
+            icfg[key] = getattr(args, key)
+    params_only = args.type is None and args.factory is None and args.nlist is None and args.M is None
+    params_only = params_only and (args.nprobe is not None or args.efSearch is not None)
+
+    sink = open_faiss_sink(fcfg)
+    try:
+        if not sink.ntotal:
+            raise SystemExit(f"[ERROR] FAISS 인덱스가 비어 있습니다: {fcfg.get('index_path')}")
+        before = sink.index_spec
+        q = sample_queries(sink, args.queries) if args.queries else None
+        if q is not None:
+            gt, ms0 = timed_search(sink, q, args.k)
+
+        if params_only:
+            sink.set_search_params(nprobe=args.nprobe, efSearch=args.efSearch)
+            print(f"[OK] 검색 파라미터 저장: {sink.search_params}")
+        else:
+            sink.convert(icfg)
+            print(f"[OK] {before} → {sink.index_spec} ({sink.ntotal} rows)")
+
+        if q is not None:
+            res, ms1 = timed_search(sink, q, args.k)
+            recall = np.mean([len(set(a) & set(b)) / args.k for a, b in zip(gt, res)])
+            print(f"[INFO] recall@{args.k} (변환 전 대비) = {recall:.3f}, 질의당 {ms0:.2f}ms → {ms1:.2f}ms")
+    finally:
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+FAISS 인덱스에서 문서(doc_id) 단위 삭제 / 등록 문서 목록
+- 문서의 벡터를 뺀 세그먼트를 새로 쓰고 manifest 교체로 커밋 (다른 문서의 id는 그대로)
+- 근사 중복 서명(<index>.minhash.json)에서도 해당 id를 제거
+"""
+import argparse
+import os
+import sys
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="./configs/config.yaml", help="설정 파일 경로")
+    ap.add_argument("--doc", action="append", default=[], help="삭제할 doc_id (여러 번 지정 가능)")
+    ap.add_argument("--list", action="store_true", help="등록된 문서 목록 출력")
+    args = ap.parse_args()
+
+    import yaml
+
+    from pipeline.dedup import from_config as near_dup_from_config, signature_path
+    from pipeline.vector_sink import open_faiss_sink
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    fcfg = cfg["vector_sink"]["faiss"]
+    index_path = fcfg.get("index_path", "./data/index.faiss")
+
+    sink = open_faiss_sink(fcfg)
+    try:
+        if args.list or not args.doc:
+            print(f"{'doc_key':>8}  {'chunks':>7}  {'updated':<20} doc_id")
+            for d in sink.documents():
+                print(f"{d['doc_key']:>8}  {d['chunks']:>7}  {d['updated'] or '':<20} {d['doc_id']}")
+
+        near_dup = near_dup_from_config(cfg.get("chunk", {}), index_path) if args.doc else None
+        for doc_id in args.doc:
+            ids = sink.document_ids(doc_id)
+            n = sink.delete_document(doc_id)
+            if not n and not ids:
+                print(f"[WARN] 등록되지 않은 문서: {doc_id}")
+                continue
+            if near_dup is not None:
+                near_dup.remove(ids)
+            print(f"[OK] 삭제: {doc_id} ({n} chunks)")
+        if near_dup is not None:
+            near_dup.save(signature_path(index_path))
+        if args.doc:
+            print(f"[INFO] 남은 벡터 수: {sink.ntotal}")
+    finally:
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
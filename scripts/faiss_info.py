@@ -1,6 +1,23 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import argparse, os, json, faiss
+import argparse, os, sys
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def print_segments(sink):
+    m = sink.store.manifest
+    print("세그먼트 경로:", sink.seg_dir, "" if sink.store.exists() else "(단일 파일, 아직 세그먼트 없음)")
+    print("manifest 버전:", m.get("version"))
+    print("벡터 수(ntotal):", sink.ntotal)
+    print("인덱스 종류:", sink.index_spec, sink.search_params or "")
+    for s in sink._segs:
+        ids = s["sorted_ids"]
+        span = f"ids={ids[0]}..{ids[-1]}" if len(ids) else "ids=-"
+        print(f"{s['info']['name']:<14} rows={s['ntotal']:<8} {span:<32} {s['info'].get('created', '')}")
+    print("메타 저장소:", sink.items.path if sink.items is not None else None)
+
 
 def main():
     ap = argparse.ArgumentParser()
@@ -8,40 +25,59 @@ def main():
     ap.add_argument(
         "--meta",
         default=None,
-        help="메타 JSON 경로 (기본값: <index>.faiss.meta.json)",
+        help="(세그먼트 도입 전 단일 파일) 메타 JSON 경로 (기본값: <index>.faiss.meta.json)",
     )
+    ap.add_argument("--compact", action="store_true", help="작은 세그먼트 병합 실행")
+    ap.add_argument("--add-shard", action="store_true", help="빈 샤드 추가 (기존 샤드는 그대로)")
+
 
-    
     args = ap.parse_args()
 
     index_path = args.index
     # ingest.py와 동일하게 <index>.faiss.meta.json 규칙 사용
     meta_path = args.meta or (index_path + ".meta.json")
 
-    if not os.path.exists(index_path):
-        raise FileNotFoundError(f"FAISS 인덱스를 찾을 수 없습니다: {index_path}")
-    if not os.path.exists(meta_path):
-        raise FileNotFoundError(f"메타 JSON을 찾을 수 없습니다: {meta_path}")
+    # faiss: --help 에서는 로드하지 않음
+    from pipeline.sharded_sink import ShardedFaissSink
+    from pipeline.vector_sink import open_faiss_sink
 
-    index = faiss.read_index(index_path)
-    with open(meta_path, "r", encoding="utf-8") as f:
-        meta = json.load(f)
+    cfg = {"index_path": index_path, "meta_path": meta_path}
+    if args.add_shard:
+        cfg["shards"] = {"enabled": True, "count": 1}
+    # 조회만 할 때는 mmap 읽기 전용 (인덱스 전체를 힙에 올리지 않음)
+    sink = open_faiss_sink(cfg, readonly=not (args.compact or args.add_shard))
+    if args.add_shard:
+        sink.add_shard()
+    if not sink.ntotal and not isinstance(sink, ShardedFaissSink):
+        raise FileNotFoundError(f"FAISS 인덱스를 찾을 수 없습니다: {index_path}")
+    if args.compact:
+        sink.compact()
+    meta = sink.meta
 
     print("=== FAISS 인덱스 정보 ===")
     print("인덱스 경로:", index_path)
-    print("벡터 수(ntotal):", index.ntotal)
-    print("차원(dim):", index.d)
+    print("벡터 수(ntotal):", sink.ntotal)
+    print("메트릭:", sink.metric)
+    print()
+    if isinstance(sink, ShardedFaissSink):
+        print(f"=== 샤드 ({len(sink.shards)}개, 배치 정책={sink.layout['policy']}) ===")
+        for sid, sh in enumerate(sink.shards):
+            print(f"--- 샤드 #{sid}: {sh.index_path}")
+            print_segments(sh)
+    else:
+        print("=== 세그먼트 ===")
+        print_segments(sink)
     print()
     print("=== 메타 정보 ===")
-    print("메타 경로:", meta_path)
     print("차원:", meta.get("dim"))
-    print("아이템 수:", len(meta.get("items", [])))
-    if meta.get("items"):
-        it0 = meta["items"][0]
+    print("문서 수:", len(sink.documents()))
+    it0 = next(sink.iter_items(), None)
+    if it0:
         print()
         print("=== 첫 번째 아이템 예시 ===")
         print("텍스트:", (it0.get("text","")[:200] + ("..." if len(it0.get("text",""))>200 else "")))
         print("메타:", it0.get("meta"))
+    sink.close()
 
 if __name__ == "__main__":
     main()
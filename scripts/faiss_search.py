@@ -1,18 +1,50 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import argparse, os, json, yaml, faiss, sys
-import numpy as np
-from sentence_transformers import SentenceTransformer
+import argparse, os, sys
+
+# faiss(vector_sink) / numpy / yaml / sentence_transformers 는 임포트 비용이 커서
+# 인자 파싱(--help) 및 --server 클라이언트 분기 이후에 불러온다.
+
+# repo root를 import 경로에 추가 (--server 클라이언트용)
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
 
 def load_cfg(path="./configs/config.yaml"):
+    import yaml
+
     with open(path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
 
-def compute_meta_path(index_path: str) -> str:
-    """ingest.py와 동일한 규칙(<index>.faiss.meta.json)으로 메타 경로 계산"""
-    return index_path + ".meta.json"
+def print_hits(hits, query: str):
+    query_terms = query.split()
+    for h in hits:
+        text = h.get("text", "").replace("\n", " ")
+        for qt in query_terms:
+            if qt:
+                text = text.replace(qt, f"[{qt}]")
+        # BM25 점수는 작은 코퍼스에서 1e-6 수준까지 작아져 유효숫자로 출력
+        print(f"[{h['rank']}] 점수={h['score']:.4g} 페이지={h.get('pages')}")
+        print(text[:300] + ("..." if len(text) > 300 else ""))
+        print("-" * 80)
+
+
+def show(sink, D, I, args, flt, mode):
+    """4) 결과 출력 (D: 점수 — dense는 거리/유사도, lexical은 BM25(질의 내 순위용), hybrid는 RRF)"""
+    print(f"\n=== 검색 결과 상위 {args.k}개 [{mode}] ===" + (f" (필터: {flt})" if flt else ""))
+    hits = []
+    for rank, (score, it) in enumerate(zip(D[0], sink.get_items(I[0])), start=1):
+        if it is None:
+            continue
+        hits.append(
+            {
+                "rank": rank,
+                "score": float(score),
+                "pages": it.get("meta", {}).get("pages"),
+                "text": it.get("text", ""),
+            }
+        )
+    print_hits(hits, args.query)
 
 
 def main():
@@ -21,31 +53,52 @@ def main():
     ap.add_argument("--config", default="./configs/config.yaml", help="설정 파일 경로")
     ap.add_argument("--k", type=int, default=10, help="상위 몇 개를 볼지")
     ap.add_argument("--device", default="cpu", help="SentenceTransformer 실행 장치(cpu/cuda)")
+    ap.add_argument("--server", default=None, help="검색 서버 URL (예: http://127.0.0.1:8765)")
+    ap.add_argument("--doc", action="append", default=[], help="doc_id 필터 (여러 번 지정 가능)")
+    ap.add_argument("--pages", default=None, help="쪽 범위 필터 (예: 3-10, 7)")
+    ap.add_argument("--block_type", action="append", default=[], help="block_type 필터 (paragraph, table, ...)")
+    ap.add_argument("--source", action="append", default=[], help="source 필터 (ocr, pdf_text, vision_infer)")
+    ap.add_argument("--mode", default=None, choices=["dense", "hybrid", "lexical"],
+                    help="dense=벡터만, lexical=BM25만, hybrid=RRF 결합 (기본: config hybrid.enabled)")
     args = ap.parse_args()
+    # 메타 필터 (FAISS IDSelector로 사전 필터링)
+    flt = {"doc_id": args.doc, "pages": args.pages, "block_type": args.block_type, "source": args.source}
+    flt = {key: val for key, val in flt.items() if val}
+
+    if args.server:
+        # 상주 서버에 질의만 전달 (모델/인덱스 로드 없음)
+        from pipeline.search_service import remote_search
+
+        res = remote_search(args.server, args.query, k=args.k, filter=flt or None)
+        print(f"\n=== 검색 결과 상위 {args.k}개 ({res['took_ms']:.1f}ms) ===")
+        print_hits(res["hits"], args.query)
+        return
+
+    import numpy as np
+    from pipeline.vector_sink import open_faiss_sink
 
     cfg = load_cfg(args.config)
     vcfg = cfg["vector_sink"]["faiss"]
     index_path = vcfg.get("index_path", "./data/index.faiss")
-    meta_path = compute_meta_path(index_path)
 
-    if not os.path.exists(index_path):
-        print(f"[ERROR] FAISS 인덱스를 찾을 수 없습니다: {index_path}\n→ 먼저 ingest.py로 색인하세요.")
-        sys.exit(1)
-    if not os.path.exists(meta_path):
-        print(f"[ERROR] 메타 JSON을 찾을 수 없습니다: {meta_path}")
+    # 1) 인덱스/메타 로드 (세그먼트 manifest 또는 단일 인덱스 파일, 샤드 목록)
+    sink = open_faiss_sink(vcfg, readonly=True)
+    if sink.ntotal == 0:
+        print(f"[ERROR] FAISS 인덱스가 비어 있거나 없습니다: {index_path}\n→ 먼저 ingest.py로 색인하세요.")
         sys.exit(1)
 
-    # 1) 인덱스/메타 로드
-    index = faiss.read_index(index_path)
-    with open(meta_path, "r", encoding="utf-8") as f:
-        meta = json.load(f)
-    # items = meta.get("items", [])  # 기본
-    items = meta if isinstance(meta, list) else meta.get("items", []) # 수정
+    hcfg = vcfg.get("hybrid") or {}
+    mode = args.mode or ("hybrid" if hcfg.get("enabled", True) else "dense")
 
-    if index.ntotal == 0 or len(items) == 0:
-        raise RuntimeError("인덱스가 비어 있습니다. (chunks=0)")
+    if mode == "lexical":
+        # BM25만: 임베더 로드 없음
+        ids, scores = sink.lexical_search(args.query, args.k, filter=flt or None)
+        D, I = np.asarray([scores], dtype="float32"), np.asarray([ids], dtype="int64")
+        return show(sink, D, I, args, flt, mode)
 
     # 2) 임베더 로드
+    from sentence_transformers import SentenceTransformer
+
     ecfg = cfg["embedder"]
     model_id = ecfg.get("model", "Qwen/Qwen3-Embedding-0.6B")
     print(f"[INFO] 임베더 로드: {model_id} (장치={args.device})")
@@ -54,27 +107,13 @@ def main():
     # 3) 질의 문장을 임베딩하고 검색
     qvec = model.encode([args.query], normalize_embeddings=True)
     qvec = np.asarray(qvec, dtype="float32")
-    D, I = index.search(qvec, k=args.k)
-
-    # 4) 결과 출력
-    print(f"\n=== 검색 결과 상위 {args.k}개 ===")
-
-    
-    query_terms = args.query.split()
-    for rank, (idx, score) in enumerate(zip(I[0], D[0]), start=1):
-        if idx < 0 or idx >= len(items):
-            continue
-        it = items[idx]
-        text = it.get("text", "").replace("\n", " ")
-        for qt in query_terms:
-            if qt:
-                text = text.replace(qt, f"[{qt}]")
-        meta_info = it.get("meta", {})
-        print(f"[{rank}] 점수={float(score):.4f} 페이지={meta_info.get('pages')}")
+    if mode == "hybrid":
+        from pipeline.lexical import hybrid_search
 
-        
-        print(text[:300] + ("..." if len(text) > 300 else ""))
-        print("-" * 80)
+        D, I = hybrid_search(sink, qvec, [args.query], args.k, flt or None, hcfg)
+    else:
+        D, I = sink.search(qvec, k=args.k, filter=flt or None)
+    show(sink, D, I, args, flt, mode)
 
 
 if __name__ == "__main__":
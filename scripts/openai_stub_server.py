@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+OpenAI 임베딩 엔드포인트(/v1/embeddings) 로컬 스텁 서버
+- 텍스트 해시로 만든 결정적 벡터 반환 (dimensions 파라미터 반영)
+- 429/500 오류 주입(비율 또는 처음 N개 요청), 지연, 요청당 토큰 상한으로 OpenAIEmbedder 동작 점검
+
+사용 예:
+    python scripts/openai_stub_server.py --port 8089 --fail_rate 0.2 --delay_ms 50
+    OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8089/v1 python ingest.py ...
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+
+def stub_vector(text: str, dim: int) -> list:
+    seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:4], "little")
+    return np.random.RandomState(seed).standard_normal(dim).astype("float32").tolist()
+
+
+def make_handler(args, stats):
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, code: int, body: dict):
+            data = json.dumps(body).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, fmt, *a):  # 요청 로그 생략
+            pass
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/embeddings"):
+                return self._send(404, {"error": {"message": "not found"}})
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            inputs = body.get("input", [])
+            if isinstance(inputs, str):
+                inputs = [inputs]
+            with lock:
+                stats["requests"] += 1
+                stats["inflight"] += 1
+                stats["max_inflight"] = max(stats["max_inflight"], stats["inflight"])
+                stats["max_inputs"] = max(stats["max_inputs"], len(inputs))
+            try:
+                if args.delay_ms:
+                    time.sleep(args.delay_ms / 1000.0)
+                with lock:
+                    # 처음 fail_first개 요청은 429/500 번갈아 실패 (재시도 테스트용)
+                    forced = stats["requests"] <= args.fail_first
+                    nth = stats["requests"]
+                r = random.random()
+                if forced or r < args.fail_rate:
+                    code = (429 if nth % 2 else 500) if forced else (429 if r < args.fail_rate / 2 else 500)
+                    with lock:
+                        stats["errors"] += 1
+                    return self._send(code, {"error": {"message": "stub injected error", "type": "stub"}})
+                tokens = sum(len(t) for t in inputs)
+                if tokens > args.max_request_tokens or len(inputs) > 2048:
+                    return self._send(400, {"error": {"message": "request too large", "type": "invalid_request_error"}})
+                dim = int(body.get("dimensions") or args.dim)
+                data = [
+                    {"object": "embedding", "index": i, "embedding": stub_vector(t, dim)}
+                    for i, t in enumerate(inputs)
+                ]
+                self._send(
+                    200,
+                    {
+                        "object": "list",
+                        "data": data,
+                        "model": body.get("model"),
+                        "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+                    },
+                )
+            finally:
+                with lock:
+                    stats["inflight"] -= 1
+
+    return Handler
+
+
+def serve(host: str = "127.0.0.1", port: int = 8089, **opts):
+    """백그라운드 스레드로 서버 시작. (server, stats) 반환"""
+    args = argparse.Namespace(
+        dim=opts.get("dim", 3072),
+        fail_rate=opts.get("fail_rate", 0.0),
+        fail_first=opts.get("fail_first", 0),
+        delay_ms=opts.get("delay_ms", 0),
+        max_request_tokens=opts.get("max_request_tokens", 300_000),
+    )
+    stats = {"requests": 0, "errors": 0, "inflight": 0, "max_inflight": 0, "max_inputs": 0}
+    server = ThreadingHTTPServer((host, port), make_handler(args, stats))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8089)
+    ap.add_argument("--dim", type=int, default=3072, help="dimensions 미지정 시 벡터 차원")
+    ap.add_argument("--fail_rate", type=float, default=0.0, help="429/500 오류 주입 비율")
+    ap.add_argument("--fail_first", type=int, default=0, help="처음 N개 요청을 429/500으로 실패")
+    ap.add_argument("--delay_ms", type=int, default=0, help="요청당 지연(ms)")
+    ap.add_argument("--max_request_tokens", type=int, default=300_000, help="요청당 토큰(문자) 상한")
+    args = ap.parse_args()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(args, {"requests": 0, "errors": 0, "inflight": 0, "max_inflight": 0, "max_inputs": 0}))
+    print(f"[INFO] OpenAI 임베딩 스텁: http://{args.host}:{args.port}/v1/embeddings")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -63,22 +63,44 @@ def iter_units(chunk: Dict) -> List[Dict]:
     return units
 
 
-def process(meta_path: str, out_path: str, max_chars: int, min_chars: int, overlap: int):
+def load_items(meta_path: str) -> List[Dict]:
+    if not meta_path.endswith(".json"):
+        # FAISS 인덱스 경로: 세그먼트 메타를 이어 붙여 반환
+        from pipeline.vector_sink import open_faiss_sink
+
+        return list(open_faiss_sink({"index_path": meta_path}).iter_items())
     data = json.load(open(meta_path, "r", encoding="utf-8"))
     # FaissVectorSink 메타 파일({"items": [...]})과
     # 기존 배열 형태([{"text": ..., "meta": ...}, ...])를 모두 지원
     if isinstance(data, dict) and "items" in data:
         data = data["items"]
+    return data
 
-    all_units: List[Dict] = []
-    for chunk in data:
-        all_units.extend(iter_units(chunk))
-    chunks = split_into_chunks(
-        all_units,
-        max_chars=max_chars,
-        min_chars=min_chars,
-        overlap_chars=overlap,
-    )
+
+def rechunk(
+    items: List[Dict], max_chars: int, min_chars: int, overlap: int, near_dup=None
+) -> List[Dict]:
+    # 문서(meta.doc_id)별로 재청킹: 청크가 문서 경계를 넘지 않아야 문서 단위 교체/삭제가 가능
+    docs: Dict[Optional[str], List[Dict]] = {}
+    for chunk in items:
+        docs.setdefault(chunk.get("meta", {}).get("doc_id"), []).extend(iter_units(chunk))
+    chunks: List[Dict] = []
+    for doc_id, units in docs.items():
+        chunks.extend(
+            split_into_chunks(
+                units,
+                max_chars=max_chars,
+                min_chars=min_chars,
+                overlap_chars=overlap,
+                near_dup=near_dup,
+                doc_id=doc_id,
+            )
+        )
+    return chunks
+
+
+def process(meta_path: str, out_path: str, max_chars: int, min_chars: int, overlap: int):
+    chunks = rechunk(load_items(meta_path), max_chars, min_chars, overlap)
     with open(out_path, "w", encoding="utf-8") as f:
         json.dump(chunks, f, ensure_ascii=False, indent=2)
     print(f"[INFO] Wrote {len(chunks)} chunks → {out_path}")
@@ -86,7 +108,7 @@ def process(meta_path: str, out_path: str, max_chars: int, min_chars: int, overl
 
 def main():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--meta", required=True, help="기존 meta.json 경로")
+    ap.add_argument("--meta", required=True, help="기존 meta.json 또는 FAISS 인덱스 경로")
     ap.add_argument("--out", default="meta_rechunk.json", help="출력 경로")
     ap.add_argument("--max_chars", type=int, default=800, help="청크 최대 길이")
     ap.add_argument("--min_chars", type=int, default=300, help="청크 최소 길이")
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+기존 FAISS 메타 → 재청킹 → 임베딩 → 새 FAISS 인덱스 (OCR 재실행 없이)
+- 원본은 읽기 전용으로 열어 문서 단위 블록으로 스트리밍 (전체 아이템/벡터를 메모리에 올리지 않음)
+- 새 세그먼트를 나란히 쓴 뒤 manifest 교체 한 번으로 전환 (기존 세그먼트는 그 후 삭제)
+- 텍스트가 바뀌지 않은 청크는 기존 인덱스의 벡터를 재사용 (모델 ID와 차원이 같을 때)
+- 청크 설정을 바꿔가며 실험할 때 사용
+"""
+import argparse
+import hashlib
+import os
+import sys
+import time
+from typing import Dict, Iterator, List
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pipeline.dedup import from_config as near_dup_from_config, signature_path
+from pipeline.embedder import get_embedder
+from pipeline.vector_sink import open_faiss_sink
+from scripts.rechunk_meta import rechunk
+
+
+def _text_key(text: str) -> str:
+    return hashlib.md5((text or "").encode("utf-8")).hexdigest()
+
+
+class _NoChunks(Exception):
+    """재청킹 결과가 비어 전체 교체를 취소"""
+
+
+def _doc_blocks(items, block: int) -> Iterator[List[Dict]]:
+    """연속된 같은 문서의 아이템을 묶어 block개 이상이 되면 내보냄
+    (문서를 블록 사이에 쪼개지 않음. doc_id가 없는 레거시 아이템은 block개씩)"""
+    group: List[Dict] = []
+    last = None
+    for it in items:
+        doc_id = it.get("meta", {}).get("doc_id")
+        if len(group) >= block and (doc_id != last or doc_id is None):
+            yield group
+            group = []
+        group.append(it)
+        last = doc_id
+    if group:
+        yield group
+
+
+def reindex(
+    cfg: Dict,
+    src_index: str,
+    out_index: str,
+    max_chars: int,
+    min_chars: int,
+    overlap: int,
+    block: int = 256,
+    reuse: bool = True,
+):
+    import numpy as np
+
+    fcfg = dict(cfg.get("vector_sink", {}).get("faiss", {}))
+    # 원본은 읽기 전용: 레거시 원본도 마이그레이션/재작성하지 않고 그대로 읽음
+    src = open_faiss_sink(
+        {**fcfg, "index_path": src_index, "meta_path": src_index + ".meta.json", "mmap_search": True},
+        readonly=True,
+    )
+    print(f"[INFO] 원본: {src_index} (items={src.ntotal})")
+    if not src.ntotal:
+        src.close()
+        print("[WARN] 원본 인덱스가 비어 있습니다. 인덱스를 만들지 않습니다")
+        return
+
+    embedder = get_embedder(cfg["embedder"])
+    model_id = getattr(embedder, "model_id", None)
+    # 차원 축소/PQ 압축 인덱스에서 복원한 벡터는 원본이 아니므로 재사용하지 않음
+    # 같은 차원의 다른 모델일 수 있으므로 인덱스에 기록된 model_id가 같을 때만 재사용
+    src_dim = src.meta.get("dim")
+    if reuse and src.is_lossy:
+        print("[INFO] 원본 인덱스가 압축/차원 축소되어 벡터를 재사용하지 않습니다 (전체 재임베딩)")
+        reuse = False
+    elif reuse and src.model_id is None:
+        print("[WARN] 원본 인덱스에 임베딩 모델 기록이 없어 벡터를 재사용하지 않습니다 (전체 재임베딩)")
+        reuse = False
+    elif reuse and src.model_id != model_id:
+        print(f"[INFO] 임베딩 모델이 다릅니다 ({src.model_id} → {model_id}): 전체 재임베딩")
+        reuse = False
+    # 임베더 차원을 모르면(onnx/캐시 래퍼 등) 원본 첫 아이템을 한 번 인코딩해 판단
+    dim = getattr(embedder, "dim", None)
+    if reuse and dim is None:
+        first = next(iter(src.iter_items(batch=1)), {})
+        dim = int(embedder.encode([first.get("text", "")]).shape[1])
+    if reuse and dim != src_dim:
+        print(f"[INFO] 임베딩 차원이 다릅니다 ({src_dim} → {dim}): 전체 재임베딩")
+        reuse = False
+
+    ccfg = dict(cfg.get("chunk", {}))
+    # 근사 중복 서명은 새 인덱스 기준으로 다시 만든다 (from_config가 <경로>.minhash.json 을 붙이므로 인덱스 경로만 넘김)
+    near_dup = near_dup_from_config(ccfg, out_index + ".tmp")
+    # 같은 경로여도 쓰기용으로 따로 연다 (원본 읽기 인스턴스는 교체 커밋 전에 닫음)
+    out = open_faiss_sink({**fcfg, "index_path": out_index, "meta_path": out_index + ".meta.json"})
+
+    n_items = 0
+    n_chunks = 0
+    reused = 0
+    embedded = 0
+    t_chunk = t_embed = t_write = 0.0
+    t_start = time.perf_counter()
+    try:
+        with out.replacing(model_id=model_id) as add:
+            for group in _doc_blocks(src.iter_items(), block):
+                # 1) 재청킹 (문서 단위 블록)
+                t0 = time.perf_counter()
+                chunks = rechunk(group, max_chars, min_chars, overlap, near_dup=near_dup)
+                t_chunk += time.perf_counter() - t0
+                n_items += len(group)
+                # 텍스트 해시 → 기존 FAISS id (청크는 같은 문서의 아이템에서만 나오므로 블록 안에서 찾음)
+                old_rows: Dict[str, int] = {}
+                if reuse:
+                    for it in group:
+                        old_rows.setdefault(_text_key(it.get("text", "")), it["faiss_id"])
+
+                # 2) 텍스트가 같은 청크는 기존 벡터 재사용, 나머지는 block개씩 임베딩
+                for start in range(0, len(chunks), block):
+                    t0 = time.perf_counter()
+                    part = chunks[start : start + block]
+                    rows = [old_rows.get(_text_key(c["text"])) for c in part]
+                    todo = [i for i, r in enumerate(rows) if r is None]
+                    new = embedder.encode([part[i]["text"] for i in todo]) if todo else None
+                    vecs = np.empty((len(part), src_dim if new is None else new.shape[1]), dtype="float32")
+                    if todo:
+                        vecs[todo] = new
+                    for i, r in enumerate(rows):
+                        if r is not None:
+                            vecs[i] = src.reconstruct(int(r))
+                    reused += len(part) - len(todo)
+                    embedded += len(todo)
+                    t_embed += time.perf_counter() - t0
+
+                    # 3) 새 세그먼트에 블록 추가 (교체 커밋 전까지 검색은 기존 세그먼트를 사용)
+                    t0 = time.perf_counter()
+                    ids = add(part, vecs)
+                    if near_dup is not None:
+                        near_dup.commit(ids)
+                    t_write += time.perf_counter() - t0
+                    n_chunks += len(part)
+                rate = n_chunks / max(time.perf_counter() - t_start, 1e-9)
+                print(f"[INFO] {n_items}/{src.ntotal} items → {n_chunks} chunks ({rate:.1f} chunks/s, 재사용 {reused})")
+            if not n_chunks:
+                raise _NoChunks()
+            # 교체 커밋이 기존 세그먼트/메타 DB를 지우기 전에 원본 읽기 인스턴스를 닫음
+            src.close()
+            t0 = time.perf_counter()
+        t_write += time.perf_counter() - t0
+    except _NoChunks:
+        print("[WARN] 청크가 없습니다. 인덱스를 교체하지 않습니다")
+        return
+    finally:
+        src.close()
+        out.close()
+        embedder.close()
+
+    if near_dup is not None:
+        near_dup.save(signature_path(out_index))
+
+    total = t_chunk + t_embed + t_write
+    print(
+        f"[OK] {out_index}: {n_items} items → {n_chunks} chunks (임베딩 {embedded}, 재사용 {reused}) "
+        f"chunk={t_chunk:.2f}s embed={t_embed:.2f}s write={t_write:.2f}s "
+        f"→ {n_chunks / max(total, 1e-9):.1f} chunks/s"
+    )
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="./configs/config.yaml", help="설정 파일 경로")
+    ap.add_argument("--index", default=None, help="원본 FAISS 인덱스 (기본: config의 index_path)")
+    ap.add_argument("--out", default=None, help="새 인덱스 경로 (기본: 원본을 교체)")
+    ap.add_argument("--max_chars", type=int, default=None, help="청크 최대 길이 (기본: config)")
+    ap.add_argument("--min_chars", type=int, default=None, help="청크 최소 길이 (기본: config)")
+    ap.add_argument("--overlap", type=int, default=None, help="오버랩 문자 수 (기본: config)")
+    ap.add_argument("--block", type=int, default=256, help="한 번에 임베딩할 청크 수")
+    ap.add_argument("--no-reuse", action="store_true", help="기존 벡터를 재사용하지 않음")
+    args = ap.parse_args()
+
+    import yaml
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    ccfg = cfg.get("chunk", {})
+    src_index = args.index or cfg["vector_sink"]["faiss"].get("index_path", "./data/index.faiss")
+    reindex(
+        cfg,
+        src_index,
+        args.out or src_index,
+        max_chars=args.max_chars if args.max_chars is not None else ccfg.get("max_chars", 800),
+        min_chars=args.min_chars if args.min_chars is not None else ccfg.get("min_chars", 300),
+        overlap=args.overlap if args.overlap is not None else ccfg.get("overlap_chars", 80),
+        block=args.block,
+        reuse=not args.no_reuse,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,66 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import argparse, yaml
+import argparse, os, sys
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
 from pipeline.embedder import get_embedder
-from pipeline.vector_sink import FaissVectorSink
+from pipeline.vector_sink import open_vector_sink
+
+
+def print_hits(hits):
+    for h in hits:
+        print(
+            f"[{h['rank']}] 점수={h['score']:.4f} 페이지={h.get('pages')} 제목경로={h.get('heading_path')}"
+        )
+        t = h["text"].replace("\n", " ")
+        print(t[:300] + ("..." if len(t) > 300 else ""))
+        print("-" * 80)
+
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--query", required=True, help="검색할 문장")
     ap.add_argument("--config", default="./configs/config.yaml", help="설정 파일 경로")
+    ap.add_argument("--k", type=int, default=5, help="상위 몇 개를 볼지 (대량 질의는 scripts/batch_search.py)")
+    ap.add_argument("--server", default=None, help="검색 서버 URL (예: http://127.0.0.1:8765)")
     args = ap.parse_args()
 
+    if args.server:
+        # 상주 서버에 질의만 전달 (모델/인덱스 로드 없음)
+        from pipeline.search_service import remote_search
+
+        print_hits(remote_search(args.server, args.query, k=args.k)["hits"])
+        return
+
+    import yaml
+
     cfg = yaml.safe_load(open(args.config, "r", encoding="utf-8"))
     emb = get_embedder(cfg["embedder"])
 
     # 질의 문장을 벡터로 변환
     qv = emb.encode([args.query])
+    emb.close()
 
-    # FAISS 인덱스 로드 후 검색 수행
-
-    
-    vcfg = cfg["vector_sink"]["faiss"]
-    sink = FaissVectorSink(vcfg)
-    D, I = sink.search(qv, k=5)
-    items = sink.meta["items"]
-    for rank, (idx, score) in enumerate(zip(I[0], D[0]), start=1):
-        if idx < 0 or idx >= len(items):
+    # 인덱스 로드 후 검색 수행 (vector_sink.type: json 이면 faiss 없이 numpy 검색)
+    sink = open_vector_sink(cfg["vector_sink"], readonly=True)
+    D, I = sink.search(qv, k=args.k)
+    items = sink.get_items(I[0])
+    hits = []
+    for rank, (score, it) in enumerate(zip(D[0], items), start=1):
+        if it is None:
             continue
-        it = items[idx]
-        print(
-            f"[{rank}] 점수={float(score):.4f} 페이지={it['meta'].get('pages')} 제목경로={it['meta'].get('heading_path')}"
+        hits.append(
+            {
+                "rank": rank,
+                "score": float(score),
+                "pages": it["meta"].get("pages"),
+                "heading_path": it["meta"].get("heading_path"),
+                "text": it["text"],
+            }
         )
-        t = it["text"].replace("\n", " ")
-        print(t[:300] + ("..." if len(t) > 300 else ""))
-        print("-" * 80)
+    print_hits(hits)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
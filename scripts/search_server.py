@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+상주형 검색 서버 실행 (모델/인덱스 1회 로드)
+
+    python scripts/search_server.py --config ./configs/config.yaml --port 8765
+    python scripts/search.py --server http://127.0.0.1:8765 --query "최소 성취수준"
+    curl http://127.0.0.1:8765/stats
+"""
+import argparse
+import os
+import sys
+
+import yaml
+
+# repo root를 import 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from pipeline.search_service import serve
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--config", default="./configs/config.yaml", help="설정 파일 경로")
+    ap.add_argument("--host", default=None, help="바인드 주소 (기본: config search_server.host)")
+    ap.add_argument("--port", type=int, default=None, help="포트 (기본: config search_server.port)")
+    args = ap.parse_args()
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        cfg = yaml.safe_load(f)
+    scfg = cfg.get("search_server", {}) or {}
+    server = serve(
+        cfg,
+        host=args.host or scfg.get("host", "127.0.0.1"),
+        port=args.port or scfg.get("port", 8765),
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.close()
+
+
+if __name__ == "__main__":
+    main()
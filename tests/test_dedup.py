@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""NearDupIndex: 같은 문서 안에서만 근사 중복을 합치고, 다른 문서의 페이지는 섞지 않음"""
+from pipeline.chunker import split_into_chunks
+from pipeline.dedup import NearDupIndex, signature_path
+
+BOILER = "본 자료는 교육부 평가 지침에 따라 작성되었으며 무단 복제를 금합니다. 문의: 평가지원센터 "
+
+
+def chunk(text, doc, page):
+    return {"text": text, "meta": {"doc_id": doc, "pages": [page]}}
+
+
+def test_collapses_within_a_document_and_merges_pages():
+    nd = NearDupIndex()
+    kept = nd.collapse([chunk(BOILER + "1쪽", "A", 1), chunk(BOILER + "2쪽", "A", 2)])
+    assert len(kept) == 1
+    assert kept[0]["meta"]["pages"] == [1, 2]
+
+    nd.commit([100])
+    assert nd.collapse([chunk(BOILER + "7쪽", "A", 7)]) == []
+    assert nd.merged_pages == {100: [7]}
+
+
+def test_other_document_keeps_its_own_row():
+    nd = NearDupIndex()
+    nd.collapse([chunk(BOILER, "A", 2)])
+    nd.commit([100])
+    kept = nd.collapse([chunk(BOILER, "B", 9)])
+    assert len(kept) == 1 and kept[0]["meta"]["pages"] == [9]
+    assert nd.merged_pages == {}
+    nd.commit([200])
+    assert nd.docs == {100: "A", 200: "B"}
+
+
+def test_chunker_sets_doc_id_before_collapse():
+    nd = NearDupIndex()
+    units = [{"text": BOILER * 3, "page": 2}]
+    a = split_into_chunks(units, max_chars=800, min_chars=10, overlap_chars=0, near_dup=nd, doc_id="A")
+    nd.commit(range(len(a)))
+    b = split_into_chunks(
+        [{"text": BOILER * 3, "page": 9}], max_chars=800, min_chars=10, overlap_chars=0, near_dup=nd, doc_id="B"
+    )
+    assert len(b) == len(a) and all(c["meta"]["doc_id"] == "B" for c in b)
+    assert nd.merged_pages == {}
+
+
+def test_save_load_keeps_document_scope(tmp_path):
+    path = signature_path(str(tmp_path / "index.faiss"))
+    nd = NearDupIndex()
+    nd.collapse([chunk(BOILER, "A", 1)])
+    nd.commit([5])
+    nd.save(path)
+
+    loaded = NearDupIndex.load(path)
+    assert loaded.docs == {5: "A"}
+    assert loaded.collapse([chunk(BOILER, "B", 3)])  # 다른 문서는 그대로 유지
+    assert loaded.collapse([chunk(BOILER, "A", 3)]) == []
+    assert loaded.merged_pages == {5: [3]}
+
+
+def test_remove_forgets_replaced_rows():
+    nd = NearDupIndex()
+    nd.collapse([chunk(BOILER, "A", 1)])
+    nd.commit([5])
+    nd.remove([5, 99])
+    assert nd.signatures == {} and nd.docs == {}
+    assert len(nd.collapse([chunk(BOILER, "A", 1)])) == 1
+    assert nd.merged_pages == {}
+
+
+def test_load_ignores_signatures_with_other_params(tmp_path, capsys):
+    path = signature_path(str(tmp_path / "index.faiss"))
+    nd = NearDupIndex(num_perm=64, bands=16)
+    nd.collapse([chunk(BOILER, "A", 1)])
+    nd.commit([5])
+    nd.save(path)
+
+    assert NearDupIndex.load(path, num_perm=64, bands=16).docs == {5: "A"}
+    assert NearDupIndex.load(path, num_perm=128, bands=32).signatures == {}
+    assert "파라미터 불일치" in capsys.readouterr().out
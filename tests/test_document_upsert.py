@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""문서 단위 업서트/삭제 (ingest의 근사 중복 → 업서트 → merge_pages 순서): 다른 문서의 행은 영향 없음"""
+import zlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from pipeline.chunker import split_into_chunks
+from pipeline.dedup import NearDupIndex
+from pipeline.vector_sink import FaissVectorSink
+
+DIM = 8
+BOILER = "본 자료는 교육부 평가 지침에 따라 작성되었으며 무단 복제를 금합니다. 문의: 평가지원센터 " * 2
+
+
+def embed(texts):
+    out = np.zeros((len(texts), DIM), dtype="float32")
+    for i, t in enumerate(texts):
+        out[i] = np.random.RandomState(zlib.crc32(t.encode("utf-8"))).rand(DIM)
+    return out
+
+
+def ingest(sink, nd, doc_id, pages):
+    """ingest.py 4)~6) 단계와 같은 순서 (OCR/임베딩 모델 없이)"""
+    replaced = sink.document_ids(doc_id)
+    nd.remove(replaced)
+    units = [{"text": text, "page": page} for page, text in pages]
+    chunks = split_into_chunks(units, max_chars=200, min_chars=10, overlap_chars=0, near_dup=nd, doc_id=doc_id)
+    ids = sink.upsert(chunks, embed([c["text"] for c in chunks]))
+    if not chunks and replaced:
+        sink.delete_document(doc_id)
+    sink.merge_pages(nd.merged_pages)
+    nd.commit(ids)
+    return ids
+
+
+def doc_texts(sink, doc_id):
+    D, I = sink.search(embed([BOILER]), k=10, filter={"doc_id": doc_id})
+    return [(it["text"], it["meta"]["pages"]) for it in sink.get_items([i for i in I[0] if i >= 0])]
+
+
+@pytest.fixture
+def sink(tmp_path):
+    s = FaissVectorSink({"index_path": str(tmp_path / "index.faiss")})
+    yield s
+    s.close()
+
+
+def test_shared_boilerplate_keeps_one_row_per_document(sink):
+    nd = NearDupIndex()
+    ingest(sink, nd, "A", [(2, BOILER)])
+    ingest(sink, nd, "B", [(9, BOILER)])
+    assert sink.ntotal == 2
+    assert doc_texts(sink, "A") == [(BOILER, [2])]
+    assert doc_texts(sink, "B") == [(BOILER, [9])]
+
+
+def test_delete_document_leaves_other_documents(sink):
+    nd = NearDupIndex()
+    ingest(sink, nd, "A", [(2, BOILER)])
+    ingest(sink, nd, "B", [(9, BOILER)])
+    assert sink.delete_document("A") == 1
+    assert doc_texts(sink, "A") == []
+    assert doc_texts(sink, "B") == [(BOILER, [9])]
+    assert sink.lexical_search("평가지원센터", 5)[0] == sink.document_ids("B")
+
+
+def test_reingest_replaces_only_that_document(sink):
+    nd = NearDupIndex()
+    ingest(sink, nd, "A", [(2, BOILER), (3, "A 문서 본문: 성취기준과 평가 방법을 설명합니다.")])
+    ingest(sink, nd, "B", [(9, BOILER)])
+    b_ids = sink.document_ids("B")
+
+    ingest(sink, nd, "A", [(4, "A 문서 개정판 본문")])
+    assert [t for t, _ in doc_texts(sink, "A")] == ["A 문서 개정판 본문"]
+    assert sink.document_ids("B") == b_ids
+    assert doc_texts(sink, "B") == [(BOILER, [9])]
+
+
+def test_reingest_without_chunks_drops_the_old_rows(sink):
+    nd = NearDupIndex()
+    ingest(sink, nd, "A", [(2, BOILER)])
+    ingest(sink, nd, "A", [])
+    assert sink.document_ids("A") == []
+    assert sink.ntotal == 0
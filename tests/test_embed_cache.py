@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""EmbeddingCache: 같은 디렉터리를 여는 두 인스턴스(= 두 프로세스)의 슬롯 할당/스냅숏 병합, LRU"""
+import numpy as np
+
+from pipeline.embed_cache import EmbeddingCache, text_key
+
+DIM = 4
+
+
+def make(root, **kw):
+    kw.setdefault("flush_every", 1024)
+    return EmbeddingCache(str(root), "test-model", True, **kw)
+
+
+def vec(x):
+    return np.full((1, DIM), x, dtype="float32")
+
+
+def test_two_writers_never_share_a_slot(tmp_path):
+    a, b = make(tmp_path), make(tmp_path)
+    ka, kb = text_key("text-A"), text_key("text-B")
+    a.put_many([ka], vec(1))
+    b.put_many([kb], vec(2))
+    assert a.slots[ka] != b.slots[kb]
+    np.testing.assert_array_equal(b.get_many([ka])[ka], vec(1)[0])
+    np.testing.assert_array_equal(a.get_many([kb])[kb], vec(2)[0])
+    a.close()
+    b.close()
+
+    c = make(tmp_path)
+    got = c.get_many([ka, kb])
+    np.testing.assert_array_equal(got[ka], vec(1)[0])
+    np.testing.assert_array_equal(got[kb], vec(2)[0])
+    c.close()
+
+
+def test_interleaved_flushes_merge_both_writers(tmp_path):
+    a, b = make(tmp_path, flush_every=2), make(tmp_path, flush_every=3)
+    keys = {}
+    for i in range(12):
+        cache = a if i % 2 else b
+        keys[i] = text_key(f"t{i}")
+        cache.put_many([keys[i]], vec(i))
+    a.close()
+    b.close()
+
+    c = make(tmp_path)
+    got = c.get_many(list(keys.values()))
+    assert len(got) == 12
+    for i, k in keys.items():
+        np.testing.assert_array_equal(got[k], vec(i)[0])
+    assert len(set(c.slots.values())) == 12
+    c.close()
+
+
+def test_lru_eviction_is_seen_by_the_other_writer(tmp_path):
+    a, b = make(tmp_path, max_entries=2), make(tmp_path, max_entries=2)
+    k = [text_key(f"t{i}") for i in range(3)]
+    a.put_many(k[:2], np.vstack([vec(0), vec(1)]))
+    b.put_many(k[2:], vec(2))  # 가득 참 → t0 슬롯 재사용
+    got = a.get_many(k)
+    assert k[0] not in got
+    np.testing.assert_array_equal(got[k[2]], vec(2)[0])
+    np.testing.assert_array_equal(got[k[1]], vec(1)[0])
+    a.close()
+    b.close()
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""FaissVectorSink: 세그먼트/manifest, 문서 단위 안정 id, 교체/삭제, 병합, 필터 검색, 읽기 전용 이전"""
+import json
+import os
+import zlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from pipeline.faiss_store import SegmentStore
+from pipeline.meta_store import DOC_SHIFT
+from pipeline.vector_sink import FaissVectorSink
+
+DIM = 8
+
+
+def embed(texts):
+    out = np.zeros((len(texts), DIM), dtype="float32")
+    for i, t in enumerate(texts):
+        out[i] = np.random.RandomState(zlib.crc32(t.encode("utf-8"))).rand(DIM)
+    return out
+
+
+def doc(doc_id, n, tag="", pages=None):
+    return [
+        {"text": f"{doc_id} 청크 {i}{tag}", "meta": {"doc_id": doc_id, "pages": [pages or i + 1]}}
+        for i in range(n)
+    ]
+
+
+def put(sink, chunks, **kw):
+    return sink.upsert(chunks, embed([c["text"] for c in chunks]), **kw)
+
+
+def top1(sink, text, **kw):
+    D, I = sink.search(embed([text]), k=1, **kw)
+    return int(I[0][0])
+
+
+def open_sink(path, readonly=False, **cfg):
+    # 테스트에서는 백그라운드 병합을 끄고 compact()를 직접 호출
+    return FaissVectorSink(
+        {"index_path": str(path), "segments": {"compact_trigger": 1000, "compact_min_rows": 100}, **cfg},
+        readonly=readonly,
+    )
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "index.faiss"
+
+
+def test_each_upsert_commits_a_segment_and_bumps_manifest_version(path):
+    sink = open_sink(path)
+    put(sink, doc("A", 3), model_id="m1")
+    v1 = sink.version
+    put(sink, doc("B", 2))
+    assert sink.version == v1 + 1
+    assert len(sink.store.manifest["segments"]) == 2
+    assert sink.ntotal == 5
+    # 참조되지 않는 파일은 남지 않음
+    assert set(os.listdir(sink.seg_dir)) <= sink.store.referenced()
+    sink.close()
+
+    manifest = SegmentStore(sink.seg_dir).manifest
+    assert manifest["version"] == v1 + 1
+    assert manifest["dim"] == DIM and manifest["model_id"] == "m1"
+    again = open_sink(path)
+    assert again.ntotal == 5
+    assert again.get_items([top1(again, "B 청크 1")])[0]["text"] == "B 청크 1"
+    again.close()
+
+
+def test_ids_are_stable_per_document(path):
+    sink = open_sink(path)
+    a = put(sink, doc("A", 3))
+    b = put(sink, doc("B", 2))
+    ka, kb = a[0] >> DOC_SHIFT, b[0] >> DOC_SHIFT
+    assert ka != kb
+    assert a == [(ka << DOC_SHIFT) | i for i in range(3)]
+    assert b == [(kb << DOC_SHIFT) | i for i in range(2)]
+
+    # A 교체: A는 같은 doc_key에서 0부터 다시, B의 id/검색 결과는 그대로
+    a2 = put(sink, doc("A", 2, tag=" 개정"))
+    assert a2 == a[:2]
+    assert sorted(sink.document_ids("A")) == a2
+    assert sorted(sink.document_ids("B")) == b
+    assert top1(sink, "B 청크 1") == b[1]
+    assert sink.get_items([a2[0]])[0]["text"] == "A 청크 0 개정"
+    assert sink.ntotal == 4
+    assert {d["doc_id"]: d["chunks"] for d in sink.documents()} == {"A": 2, "B": 2}
+    sink.close()
+
+
+def test_delete_document_removes_rows_and_registration(path):
+    sink = open_sink(path)
+    put(sink, doc("A", 3))
+    b = put(sink, doc("B", 2))
+    assert sink.delete_document("A") == 3
+    assert sink.delete_document("A") == 0
+    assert sink.document_ids("A") == []
+    assert [d["doc_id"] for d in sink.documents()] == ["B"]
+    assert sink.ntotal == 2
+    D, I = sink.search(embed(["A 청크 0"]), k=5)
+    assert sorted(i for i in I[0] if i >= 0) == b
+    sink.close()
+
+
+def test_replace_all_swaps_content_in_one_commit(path):
+    sink = open_sink(path)
+    put(sink, doc("A", 3))
+    put(sink, doc("B", 2))
+    v = sink.version
+    old_files = set(os.listdir(sink.seg_dir))
+    chunks = doc("C", 4) + doc("A", 1, tag=" 새")
+    ids = sink.replace_all(chunks, embed([c["text"] for c in chunks]), model_id="m2")
+    assert sink.version == v + 1
+    assert sink.ntotal == 5 and sink.model_id == "m2"
+    assert len(sink.store.manifest["segments"]) == 1
+    assert sorted(d["doc_id"] for d in sink.documents()) == ["A", "C"]
+    assert sink.get_items([top1(sink, "A 청크 0 새")])[0]["text"] == "A 청크 0 새"
+    assert ids[4] in sink.document_ids("A")
+    # 교체 전 세그먼트/메타 DB는 정리됨
+    assert not old_files & set(os.listdir(sink.seg_dir)) - {"manifest.json"}
+    sink.close()
+
+
+def test_replacing_aborts_without_touching_the_index(path):
+    sink = open_sink(path)
+    a = put(sink, doc("A", 3))
+    v = sink.version
+    with pytest.raises(RuntimeError):
+        with sink.replacing() as add:
+            chunks = doc("Z", 2)
+            add(chunks, embed([c["text"] for c in chunks]))
+            raise RuntimeError("중단")
+    assert sink.version == v
+    assert sorted(sink.document_ids("A")) == a
+    assert top1(sink, "A 청크 2") == a[2]
+    sink.close()
+
+
+def test_compact_merges_small_segments_and_keeps_ids(path):
+    sink = open_sink(path)
+    ids = {}
+    for d in "ABCD":
+        ids[d] = put(sink, doc(d, 2))
+    assert len(sink.store.manifest["segments"]) == 4
+    assert sink.compact() == 4
+    assert len(sink.store.manifest["segments"]) == 1
+    assert sink.ntotal == 8
+    for d, got in ids.items():
+        assert sorted(sink.document_ids(d)) == got
+        assert top1(sink, f"{d} 청크 1") == got[1]
+    assert set(os.listdir(sink.seg_dir)) <= sink.store.referenced()
+    sink.close()
+
+
+def test_filtered_search_only_returns_matching_rows(path):
+    sink = open_sink(path)
+    a = put(sink, doc("A", 4))
+    b = put(sink, doc("B", 4))
+    D, I = sink.search(embed(["A 청크 0"]), k=8, filter={"doc_id": "B"})
+    assert sorted(i for i in I[0] if i >= 0) == b
+    D, I = sink.search(embed(["A 청크 0"]), k=8, filter={"doc_id": ["A", "B"], "pages": "2-3"})
+    assert sorted(i for i in I[0] if i >= 0) == sorted(a[1:3] + b[1:3])
+    D, I = sink.search(embed(["A 청크 0"]), k=3, filter={"doc_id": "없음"})
+    assert (I == -1).all()
+    with pytest.raises(ValueError):
+        sink.search(embed(["x"]), k=1, filter={"unknown": 1})
+    sink.close()
+
+
+def test_readonly_sees_other_process_commits_after_refresh(path):
+    writer = open_sink(path)
+    put(writer, doc("A", 2))
+    reader = open_sink(path, readonly=True)
+    v = reader.version
+    with pytest.raises(RuntimeError):
+        put(reader, doc("X", 1))
+    b = put(writer, doc("B", 2))
+    assert reader.stale()
+    assert reader.refresh()
+    assert reader.version > v and not reader.stale()
+    assert top1(reader, "B 청크 0") == b[0]
+    assert not reader.refresh()
+    reader.close()
+    writer.close()
+
+
+def write_legacy(path, n=5):
+    """세그먼트 도입 전 단일 파일 인덱스 (index_path + meta.json, id = 행 번호)"""
+    import faiss
+
+    texts = [f"레거시 청크 {i}" for i in range(n)]
+    index = faiss.IndexFlatL2(DIM)
+    index.add(embed(texts))
+    faiss.write_index(index, str(path))
+    items = [{"text": t, "meta": {"pages": [i + 1]}} for i, t in enumerate(texts)]
+    with open(str(path) + ".meta.json", "w", encoding="utf-8") as f:
+        json.dump({"items": items, "dim": DIM, "metric": "L2"}, f, ensure_ascii=False)
+    return texts
+
+
+def listing(root):
+    return sorted(os.path.relpath(os.path.join(d, f), root) for d, _, fs in os.walk(root) for f in fs)
+
+
+def test_readonly_legacy_index_is_served_without_migration(path):
+    texts = write_legacy(path)
+    before = listing(path.parent)
+    reader = open_sink(path, readonly=True)
+    assert listing(path.parent) == before
+    assert reader.ntotal == len(texts)
+    assert reader.get_items([top1(reader, texts[3])])[0]["text"] == texts[3]
+
+    # 쓰기 모드로 열면 SQLite로 이전 (행 번호 id 유지) → 읽기 전용 인스턴스는 refresh로 따라감
+    writer = open_sink(path)
+    assert writer.store.manifest.get("meta_db")
+    assert top1(writer, texts[3]) == 3
+    assert reader.refresh()
+    assert reader.get_items([3])[0]["text"] == texts[3]
+    reader.close()
+    writer.close()
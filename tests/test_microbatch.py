@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+"""MicroBatcher: 동시 요청을 한 번의 batch_fn 호출로 묶고 결과/예외를 호출자별로 돌려줌"""
+import threading
+
+import pytest
+
+from pipeline.microbatch import MicroBatcher
+
+
+def test_concurrent_calls_are_batched_and_answered_in_order():
+    seen = []
+    gate = threading.Event()
+
+    def batch_fn(items):
+        gate.wait(5)  # 첫 배치가 처리되는 동안 나머지 요청이 큐에 쌓이도록
+        seen.append(list(items))
+        return [x * 10 for x in items]
+
+    mb = MicroBatcher(batch_fn, max_batch=4, max_wait_ms=50)
+    futs = [mb.submit(i) for i in range(10)]
+    gate.set()
+    assert [f.result(5) for f in futs] == [i * 10 for i in range(10)]
+    assert all(len(b) <= 4 for b in seen)
+    assert sorted(x for b in seen for x in b) == list(range(10))
+    assert mb.batches == len(seen) < 10
+    assert mb.mean_batch == 10 / len(seen)
+    mb.close()
+
+
+def test_threads_share_batches():
+    mb = MicroBatcher(lambda items: [x + 1 for x in items], max_batch=64, max_wait_ms=100)
+    out = {}
+    barrier = threading.Barrier(8)
+
+    def worker(i):
+        barrier.wait()
+        out[i] = mb(i, timeout=5)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert out == {i: i + 1 for i in range(8)}
+    assert mb.items == 8 and mb.batches < 8
+    mb.close()
+
+
+def test_batch_error_is_raised_to_every_caller():
+    def batch_fn(items):
+        raise ValueError("배치 실패")
+
+    mb = MicroBatcher(batch_fn, max_batch=8, max_wait_ms=20)
+    futs = [mb.submit(i) for i in range(3)]
+    for f in futs:
+        with pytest.raises(ValueError):
+            f.result(5)
+    # 실패 후에도 배처는 계속 동작
+    mb.batch_fn = lambda items: items
+    assert mb("ok", timeout=5) == "ok"
+    mb.close()
+
+
+def test_close_drains_pending_and_rejects_new_items():
+    mb = MicroBatcher(lambda items: items, max_batch=2, max_wait_ms=1)
+    futs = [mb.submit(i) for i in range(5)]
+    mb.close()
+    assert [f.result(1) for f in futs] == list(range(5))
+    with pytest.raises(RuntimeError):
+        mb.submit(1)
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""OpenAIEmbedder ↔ scripts/openai_stub_server.py: 요청 묶음, 순서, 429/5xx 재시도, 이벤트 루프 안 호출"""
+import asyncio
+
+import numpy as np
+import pytest
+
+pytest.importorskip("openai")
+
+from pipeline.embedder import OpenAIEmbedder
+from scripts.openai_stub_server import serve, stub_vector
+
+DIM = 16
+TEXTS = [f"문서 {i} " + "가나다라" * (i % 5) for i in range(10)]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    def start(**opts):
+        server, stats = serve(port=0, **opts)
+        started.append(server)
+        host, port = server.server_address[:2]
+        return f"http://{host}:{port}/v1", stats
+
+    started = []
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    yield start
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+
+def expected(texts):
+    m = np.asarray([stub_vector(t, DIM) for t in texts], dtype="float32")
+    return m / np.linalg.norm(m, axis=1, keepdims=True)
+
+
+def make(url, **kw):
+    return OpenAIEmbedder(model="text-embedding-3-small", dim=DIM, base_url=url, **kw)
+
+
+def test_batches_keep_input_order(stub):
+    url, stats = stub(delay_ms=20)
+    emb = make(url, batch_size=3, concurrency=3)
+    out = emb.encode(TEXTS)
+    assert out.shape == (len(TEXTS), DIM)
+    np.testing.assert_allclose(out, expected(TEXTS), rtol=1e-5, atol=1e-6)
+    assert stats["requests"] == len(emb.pack(TEXTS)) == 4
+    assert stats["max_inputs"] <= 3
+    assert stats["max_inflight"] > 1
+
+
+def test_token_budget_splits_requests(stub):
+    url, stats = stub()
+    emb = make(url, batch_size=64, max_request_tokens=20)
+    batches = emb.pack(TEXTS)
+    assert len(batches) > 1
+    assert [t for _, b in batches for t in b] == TEXTS
+    np.testing.assert_allclose(emb.encode(TEXTS), expected(TEXTS), rtol=1e-5, atol=1e-6)
+    assert stats["requests"] == len(batches)
+
+
+def test_retries_on_429_and_500(stub):
+    url, stats = stub(fail_first=2)
+    emb = make(url, batch_size=5, concurrency=1, max_retries=3)
+    np.testing.assert_allclose(emb.encode(TEXTS), expected(TEXTS), rtol=1e-5, atol=1e-6)
+    assert stats["errors"] == 2
+    assert emb.retries == 2
+    assert stats["requests"] == 2 + 2
+
+
+def test_gives_up_after_max_retries(stub):
+    import openai
+
+    url, _ = stub(fail_first=10)
+    emb = make(url, batch_size=64, max_retries=1)
+    with pytest.raises((openai.RateLimitError, openai.InternalServerError)):
+        emb.encode(TEXTS[:2])
+
+
+def test_encode_inside_running_loop(stub):
+    url, _ = stub()
+    emb = make(url, batch_size=4)
+
+    async def main():
+        sync = emb.encode(TEXTS)
+        native = await emb.aencode(TEXTS)
+        return sync, native
+
+    sync, native = asyncio.run(main())
+    np.testing.assert_allclose(sync, expected(TEXTS), rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(native, sync)
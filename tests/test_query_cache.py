@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""QueryCache: 정규화 정확 일치, 근사 일치(모드별 어휘 토큰 조건, 후보 상한), 인덱스 버전 무효화"""
+import numpy as np
+
+from pipeline.query_cache import QueryCache, cached_search, normalize_query
+
+DIM = 16
+
+
+def unit(seed, noise=0.0, base=None):
+    rng = np.random.RandomState(seed)
+    v = (base if base is not None else rng.rand(DIM)) + noise * rng.rand(DIM)
+    return (v / np.linalg.norm(v)).astype("float32")
+
+
+def test_normalized_exact_hit():
+    assert normalize_query("  최소 성취수준?") == normalize_query("최소   성취수준")
+    cache = QueryCache()
+    cache.put(QueryCache.key("최소 성취수준?", 5), None, ["r"], 1)
+    assert cache.get(QueryCache.key("최소  성취수준", 5), 1) == ["r"]
+    assert cache.get(QueryCache.key("최소 성취수준", 3), 1) is None
+
+
+def test_version_change_clears():
+    cache = QueryCache()
+    key = QueryCache.key("q", 5)
+    cache.put(key, None, ["old"], (1, 0))
+    assert cache.get(key, (1, 0)) == ["old"]
+    assert cache.get(key, (2, 0)) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_dense_near_match_reuses_close_query():
+    cache = QueryCache(max_distance=0.05)
+    base = unit(0)
+    cache.put(QueryCache.key("AB-1234 교체", 5), base, ["r1"], 1)
+    near = unit(1, 0.001, base)
+    assert cache.get_near(QueryCache.key("AB-1235 교체", 5), near, 1) == ["r1"]
+    assert cache.get_near(QueryCache.key("AB-1235 교체", 3), near, 1) is None
+    assert cache.get_near(QueryCache.key("other", 5), unit(7), 1) is None
+
+
+def test_hybrid_near_match_requires_same_lexical_tokens():
+    cache = QueryCache(max_distance=0.05)
+    base = unit(0)
+    cache.put(QueryCache.key("AB-1234 교체", 5, mode="hybrid"), base, ["r1"], 1)
+    near = unit(1, 0.001, base)
+    assert cache.get_near(QueryCache.key("AB-1235 교체", 5, mode="hybrid"), near, 1) is None
+    assert cache.get_near(QueryCache.key("교체 AB-1234!", 5, mode="hybrid"), near, 1) == ["r1"]
+    assert cache.get_near(QueryCache.key("AB-1235 교체", 5, mode="lexical"), near, 1) is None
+
+
+def test_near_candidates_are_capped_and_follow_eviction():
+    cache = QueryCache(max_entries=4, max_distance=0.01, near_max_entries=2)
+    vecs = np.eye(DIM, dtype="float32")
+    for i in range(3):
+        cache.put(QueryCache.key(f"q{i}", 5), vecs[i], i, 1)
+    assert cache.get_near(QueryCache.key("x", 5), vecs[0], 1) is None  # 후보 상한 밖
+    assert cache.get_near(QueryCache.key("x", 5), vecs[2], 1) == 2
+    for i in range(3, 6):
+        cache.put(QueryCache.key(f"q{i}", 5), vecs[i], i, 1)
+    assert cache.stats()["entries"] == 4
+    assert cache.get_near(QueryCache.key("x", 5), vecs[5], 1) == 5
+
+
+def test_cached_search_runs_only_misses():
+    class Sink:
+        version = 1
+
+    cache = QueryCache(max_distance=0.05)
+    calls = []
+
+    def run(idx):
+        calls.append(list(idx))
+        return [f"res{i}" for i in idx]
+
+    keys = [QueryCache.key(q, 5) for q in ("a", "b")]
+    qv = np.vstack([unit(0), unit(1)])
+    assert cached_search(cache, Sink, keys, qv, run) == ["res0", "res1"]
+    keys2 = [QueryCache.key(q, 5) for q in ("a2", "c")]
+    qv2 = np.vstack([unit(2, 0.001, unit(0)), unit(3)])
+    assert cached_search(cache, Sink, keys2, qv2, run) == ["res0", "res1"]
+    assert calls == [[0, 1], [1]]
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""scripts/reindex: 읽기 전용 원본에서 블록 단위로 재색인, 차원을 모르는 임베더의 벡터 재사용 판단"""
+import os
+import zlib
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from pipeline.vector_sink import FaissVectorSink
+from scripts import reindex as reindex_mod
+
+DIM = 8
+
+
+class FakeEmbedder:
+    """onnx/캐시 래퍼처럼 첫 인코딩 전에는 dim을 모르는 임베더"""
+
+    def __init__(self, dim=DIM, model_id="fake-model"):
+        self.model_id = model_id
+        self.dim = None
+        self._dim = dim
+        self.encoded = 0
+
+    def encode(self, texts):
+        self.encoded += len(texts)
+        out = np.zeros((len(texts), self._dim), dtype="float32")
+        for i, t in enumerate(texts):
+            out[i] = np.random.RandomState(zlib.crc32(t.encode("utf-8"))).rand(self._dim)
+        return out
+
+    def close(self):
+        pass
+
+
+def build_source(path, docs=3, paras=4):
+    chunks = []
+    for d in range(docs):
+        for p in range(paras):
+            text = f"문서 {d} 문단 {p}: 재청킹 후에도 그대로 남는 충분히 긴 문단 텍스트입니다."
+            chunks.append({"text": text, "meta": {"doc_id": f"doc{d}", "pages": [p + 1]}})
+    sink = FaissVectorSink({"index_path": str(path)})
+    sink.upsert(chunks, FakeEmbedder().encode([c["text"] for c in chunks]), model_id="fake-model")
+    sink.close()
+    return chunks
+
+
+def run(monkeypatch, src, out, embedder, block=2):
+    monkeypatch.setattr(reindex_mod, "get_embedder", lambda cfg: embedder)
+    cfg = {"embedder": {}, "chunk": {}, "vector_sink": {"faiss": {}}}
+    reindex_mod.reindex(cfg, str(src), str(out), max_chars=60, min_chars=10, overlap=0, block=block)
+
+
+def snapshot(directory):
+    """원본 파일 내용 (SQLite WAL 독자가 만드는 -wal/-shm 은 제외)"""
+    out = {}
+    for root, _, files in os.walk(directory):
+        for n in files:
+            if not n.endswith(("-wal", "-shm")):
+                with open(os.path.join(root, n), "rb") as f:
+                    out[os.path.join(root, n)] = f.read()
+    return out
+
+
+def test_source_is_read_only_and_vectors_are_reused(tmp_path, monkeypatch):
+    (tmp_path / "src").mkdir()
+    src = tmp_path / "src" / "index.faiss"
+    chunks = build_source(src)
+    before = snapshot(tmp_path / "src")
+
+    emb = FakeEmbedder()
+    run(monkeypatch, src, tmp_path / "out.faiss", emb)
+    assert snapshot(tmp_path / "src") == before
+    # dim을 모르는 임베더: 차원 확인용 1회 인코딩 외에는 모두 재사용
+    assert emb.encoded == 1
+
+    out = FaissVectorSink({"index_path": str(tmp_path / "out.faiss")}, readonly=True)
+    assert out.ntotal == len(chunks)
+    assert sorted(d["doc_id"] for d in out.documents()) == ["doc0", "doc1", "doc2"]
+    q = FakeEmbedder().encode([chunks[5]["text"]])
+    D, I = out.search(q, k=1, filter={"doc_id": "doc1"})
+    assert out.get_items([int(I[0][0])])[0]["text"] == chunks[5]["text"]
+    out.close()
+
+
+def test_dimension_change_is_detected_after_first_encode(tmp_path, monkeypatch, capsys):
+    src = tmp_path / "index.faiss"
+    chunks = build_source(src)
+    emb = FakeEmbedder(dim=DIM * 2)
+    run(monkeypatch, src, src, emb)
+    assert "임베딩 차원이 다릅니다" in capsys.readouterr().out
+    assert emb.encoded == len(chunks) + 1
+
+    out = FaissVectorSink({"index_path": str(src)})
+    assert out.ntotal == len(chunks)
+    assert out.meta["dim"] == DIM * 2
+    out.close()
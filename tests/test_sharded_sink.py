@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+"""ShardedFaissSink: 문서 단위 샤드 배치, 전역 id, 병합 검색, 샤드 간 BM25 순위 병합"""
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+
+from pipeline.lexical import rrf_fuse
+from pipeline.vector_sink import open_faiss_sink
+
+DIM = 8
+
+
+def chunk(doc_id, text):
+    return {"id": f"{doc_id}-1", "text": text, "meta": {"doc_id": doc_id, "pages": [1]}}
+
+
+@pytest.fixture
+def sink(tmp_path):
+    cfg = {"index_path": str(tmp_path / "index.faiss"), "shards": {"enabled": True, "policy": "size", "max_rows": 3}}
+    s = open_faiss_sink(cfg)
+    yield s
+    s.close()
+
+
+def fill(sink, texts):
+    rng = np.random.RandomState(0)
+    for i, text in enumerate(texts):
+        sink.upsert([chunk(f"d{i}", text)], rng.rand(1, DIM).astype("float32"))
+
+
+def test_size_policy_and_global_ids(sink):
+    fill(sink, [f"문서 {i}" for i in range(5)])
+    assert [sh.ntotal for sh in sink.shards] == [3, 2]
+    ids = sink.all_ids()
+    assert {sink.split_id(int(i))[0] for i in ids} == {0, 1}
+    items = sink.get_items(ids)
+    assert sorted(it["meta"]["doc_id"] for it in items) == [f"d{i}" for i in range(5)]
+
+    D, I = sink.search(np.random.rand(2, DIM).astype("float32"), k=4)
+    assert I.shape == (2, 4) and set(I.ravel()) <= set(ids.tolist())
+    D, I = sink.search(np.random.rand(1, DIM).astype("float32"), k=4, filter={"doc_id": "d4"})
+    assert [int(i) for i in I[0] if i >= 0] == sink.document_ids("d4")
+
+
+def test_lexical_merges_shards_by_rank_not_raw_bm25(sink):
+    # 샤드 0: 세 문서 모두 AB-1234 (IDF 낮음), 샤드 1: 한 문서만 (IDF 높음)
+    fill(
+        sink,
+        [
+            "AB-1234 교체 절차 AB-1234",
+            "AB-1234 점검",
+            "AB-1234 부품 목록",
+            "AB-1234",
+            "관련 없는 문서",
+            "또 다른 문서",
+        ],
+    )
+    per_shard = [sh.lexical_search("AB-1234", 5)[0] for sh in sink.shards]
+    raw = [sh.lexical_search("AB-1234", 5)[1] for sh in sink.shards]
+    assert max(raw[1]) > max(raw[0])  # 원점수로 합치면 샤드 1이 항상 앞섬
+
+    ids, _ = sink.lexical_search("AB-1234", 5)
+    rankings = [[sink.to_global(sid, i) for i in r] for sid, r in enumerate(per_shard)]
+    assert ids == rrf_fuse(rankings, 5)[0]
+    assert set(ids[:2]) == {rankings[0][0], rankings[1][0]}